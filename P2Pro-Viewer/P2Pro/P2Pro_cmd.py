@@ -1,7 +1,11 @@
 import enum
+import queue
 import struct
 import time
 import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
 
 import usb.util
 import usb.core
@@ -78,11 +82,25 @@ class CmdCode(enum.IntEnum):
 class P2Pro:
     _dev: usb.core.Device
 
-    def __init__(self):
+    def __init__(self, poll_min: float = 0.0002, poll_max: float = 0.02):
+        """
+        :param poll_min: Shortest wait between two "camera ready" polls in seconds
+        :param poll_max: Longest wait between two polls (the wait doubles up to this while the camera is busy)
+        """
         self._dev = usb.core.find(idVendor=0x0BDA, idProduct=0x5830)
         if (self._dev == None):
             raise FileNotFoundError("Infiray P2 Pro thermal module not found, please connect and try again!")
-        pass
+
+        self.poll_min = poll_min
+        self.poll_max = poll_max
+        # smoothed time the camera needs to finish a command, per (kind, CMD code): a slow flash
+        # write must not make every quick command sleep that long first
+        self.ready_times: Dict[Tuple[str, int], float] = {}
+        self.polls = 0          # total "camera ready" polls, for comparing poll strategies
+        self._device_info: Dict[DeviceInfoType, bytes] = {}  # read-only, so read once
+        self._tpd_params: Dict[PropTpdParams, int] = {}      # last known value of each TPD parameter
+        # called with the known TPD parameters after they changed, e.g. TemperatureConverter.update_tpd
+        self.tpd_listeners: List[Callable[[Dict[PropTpdParams, int]], None]] = []
 
     def _check_camera_ready(self) -> bool:
         """
@@ -98,21 +116,34 @@ class P2Pro:
             raise UserWarning(f"vdcmd status error {ret[0]:#X}")
         return False
 
-    def _block_until_camera_ready(self, timeout: int = 5) -> bool:
+    def _block_until_camera_ready(self, key: Tuple[str, int], timeout: int = 5) -> bool:
         """
-        Blocks until the camera is ready or the timeout is reached
+        Blocks until the camera is ready or the timeout is reached.
+        Instead of spinning at a fixed rate, it first sleeps for most of the time the camera
+        usually needs (learned from previous commands), then backs off exponentially
+        (poll_min .. poll_max). Quick commands cost one or two polls, and slow ones
+        (e.g. flash writes) don't flood the bus with control transfers.
 
+        :param key: (kind, CMD code) the ready time is learned for, e.g. ('read', cmd)
         :param timeout: Timeout in seconds
         :return: True if the camera is ready, False if the timout occured
         :raises UserWarning: When the return code of the camera is abnormal
         """
-        start = time.time()
+        start = time.perf_counter()
+        ready_time = self.ready_times.get(key, 0.0)
+        if ready_time:
+            time.sleep(0.9 * ready_time)
+        delay = self.poll_min
         while True:
+            self.polls += 1
             if (self._check_camera_ready()):
+                elapsed = time.perf_counter() - start
+                self.ready_times[key] = elapsed if ready_time == 0 else 0.8 * ready_time + 0.2 * elapsed
                 return True
-            time.sleep(0.001)
-            if (time.time() > start + timeout):
+            if (time.perf_counter() > start + timeout):
                 return False
+            time.sleep(delay)
+            delay = min(delay * 2, self.poll_max)
 
     def _long_cmd_write(self, cmd: int, p1: int, p2: int, p3: int = 0, p4: int = 0):
         data1 = struct.pack("<H", cmd)
@@ -122,7 +153,7 @@ class P2Pro:
         log.debug(f'l_cmd_w {0x1d08:#x} {data2.hex()} ')
         self._dev.ctrl_transfer(0x41, 0x45, 0x78, 0x9d00, data1)
         self._dev.ctrl_transfer(0x41, 0x45, 0x78, 0x1d08, data2)
-        self._block_until_camera_ready()
+        self._block_until_camera_ready(('long_write', cmd))
 
     def _long_cmd_read(self, cmd: int, p1: int, p2: int = 0, p3: int = 0, dataLen: int = 2):
         data1 = struct.pack("<H", cmd)
@@ -132,7 +163,7 @@ class P2Pro:
         log.debug(f'l_cmd_r {0x1d08:#x} {data2.hex()} ')
         self._dev.ctrl_transfer(0x41, 0x45, 0x78, 0x9d00, data1)
         self._dev.ctrl_transfer(0x41, 0x45, 0x78, 0x1d08, data2)
-        self._block_until_camera_ready()
+        self._block_until_camera_ready(('long_read', cmd))
         log.debug(f'l_cmd_r {0x1d10:#x} ...')
         res = self._dev.ctrl_transfer(0xC1, 0x44, 0x78, 0x1d10, dataLen)
         return bytes(res)
@@ -158,7 +189,7 @@ class P2Pro:
             d += struct.pack(">I2x", cmd_param)
             log.debug(f's_cmd_w {0x1d00:#x} ({len(d):2}) {d.hex()}')
             self._dev.ctrl_transfer(0x41, 0x45, 0x78, 0x1d00, d)
-            self._block_until_camera_ready()
+            self._block_until_camera_ready(('write', cmd))
             return
 
         outer_chunk_size = 0x100
@@ -175,7 +206,7 @@ class P2Pro:
             initial_data += struct.pack(">IH", cmd_param + i, len(outer_chunk))
             log.debug(f's_cmd_w {0x9d00:#x} ({len(initial_data):2}) {initial_data.hex()}')
             self._dev.ctrl_transfer(0x41, 0x45, 0x78, 0x9d00, initial_data)
-            self._block_until_camera_ready()
+            self._block_until_camera_ready(('write', cmd))
 
             # Each vendor control transfer can be 64 bytes max. Split up and send with incrementing wIndex value
             for j in range(0, len(outer_chunk), inner_chunk_size):
@@ -187,14 +218,14 @@ class P2Pro:
                 if (to_send <= 8):
                     log.debug(f's_cmd_w {(0x1d08 + j):#x} ({len(inner_chunk):2}) {inner_chunk.hex()}')
                     self._dev.ctrl_transfer(0x41, 0x45, 0x78, 0x1d08 + j, inner_chunk)
-                    self._block_until_camera_ready()
+                    self._block_until_camera_ready(('write_data', cmd))
                 elif (to_send <= 64):
                     log.debug(f's_cmd_w {(0x9d08 + j):#x} ({len(inner_chunk[:-8]):2}) {inner_chunk[:-8].hex()}')
                     log.debug(
                         f's_cmd_w {(0x1d08 + j + to_send - 8):#x} ({len(inner_chunk[-8:]):2}) {inner_chunk[-8:].hex()}')
                     self._dev.ctrl_transfer(0x41, 0x45, 0x78, 0x9d08 + j, inner_chunk[:-8])
                     self._dev.ctrl_transfer(0x41, 0x45, 0x78, 0x1d08 + j + to_send - 8, inner_chunk[-8:])
-                    self._block_until_camera_ready()
+                    self._block_until_camera_ready(('write_data', cmd))
                 else:
                     log.debug(f's_cmd_w {(0x9d08 + j):#x} ({len(inner_chunk):2}) {inner_chunk.hex()}')
                     self._dev.ctrl_transfer(0x41, 0x45, 0x78, 0x9d08 + j, inner_chunk)
@@ -226,7 +257,7 @@ class P2Pro:
             initial_data += struct.pack(">IH", cmd_param + i, to_read)
             log.debug(f's_cmd_r {0x1d00:#x} ({len(initial_data):2}) {initial_data.hex()}')
             self._dev.ctrl_transfer(0x41, 0x45, 0x78, 0x1d00, initial_data)
-            self._block_until_camera_ready()
+            self._block_until_camera_ready(('read', cmd))
 
             # read request (USB: 0xC1, 0x44)
             log.debug(f's_cmd_r {0x1d08:#x} ({to_read:2}) ...')
@@ -242,13 +273,141 @@ class P2Pro:
         res = self._standard_cmd_read(CmdCode.pseudo_color, preview_path, 1)
         return PseudoColorTypes(int.from_bytes(res, 'little'))
 
-    def set_prop_tpd_params(self, tpd_param: PropTpdParams, value: int):
+    def _tpd_param_known(self, tpd_param: PropTpdParams, value: int, notify: bool = True):
+        tpd_param = PropTpdParams(tpd_param)
+        if self._tpd_params.get(tpd_param) == value:
+            return
+        self._tpd_params[tpd_param] = value
+        if notify:
+            self._notify_tpd()
+
+    def _notify_tpd(self):
+        for listener in self.tpd_listeners:
+            listener(dict(self._tpd_params))
+
+    def set_prop_tpd_params(self, tpd_param: PropTpdParams, value: int, notify: bool = True):
         self._long_cmd_write(CmdCode.prop_tpd_params | CmdDir.SET, tpd_param, value)
+        self._tpd_param_known(tpd_param, value, notify)
+
+    def set_tpd_params(self, params: Dict[PropTpdParams, int], force: bool = False) -> Dict[PropTpdParams, int]:
+        """
+        Writes several TPD parameters in one sequence, skipping the ones that already have the value
+
+        :param force: Write every parameter, even if it is known to be unchanged
+        :return: The parameters that were actually written
+        """
+        written = {}
+        for tpd_param, value in params.items():
+            tpd_param = PropTpdParams(tpd_param)
+            if not force and self._tpd_params.get(tpd_param) == value:
+                continue
+            self.set_prop_tpd_params(tpd_param, value, notify=False)
+            written[tpd_param] = value
+        if written:
+            self._notify_tpd()  # once per batch
+        return written
 
     def get_prop_tpd_params(self, tpd_param: PropTpdParams) -> int:
         res = self._long_cmd_read(CmdCode.prop_tpd_params, tpd_param)
-        return struct.unpack(">H", res)[0]
+        value = struct.unpack(">H", res)[0]
+        self._tpd_param_known(tpd_param, value)
+        return value
 
-    def get_device_info(self, dev_info: DeviceInfoType):
-        res = self._standard_cmd_read(CmdCode.get_device_info, dev_info, DeviceInfoType_len[dev_info])
-        return res
+    def get_device_info(self, dev_info: DeviceInfoType, refresh: bool = False) -> bytes:
+        """
+        Device info never changes while the camera is connected, so it is only read once
+
+        :param refresh: Read it from the camera again
+        """
+        dev_info = DeviceInfoType(dev_info)
+        if refresh or dev_info not in self._device_info:
+            self._device_info[dev_info] = self._standard_cmd_read(CmdCode.get_device_info, dev_info,
+                                                                  DeviceInfoType_len[dev_info])
+        return self._device_info[dev_info]
+
+
+class CommandWorker:
+    """
+    Runs all camera commands on one dedicated thread, so configuring the camera never stalls
+    the capture or UI threads. Every call returns a concurrent.futures.Future.
+    TPD parameter writes that arrive while earlier commands are still running are merged
+    (last value per parameter wins) and sent as one sequence.
+    Once a worker is used, send all commands through it - the USB protocol is not thread safe.
+    """
+
+    def __init__(self, cam: Optional[P2Pro] = None):
+        """
+        :param cam: Camera to control (default: the first P2 Pro found)
+        """
+        self.cam = cam or P2Pro()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending_tpd: Dict[PropTpdParams, int] = {}
+        self._tpd_future: Optional[Future] = None
+        self._thread = threading.Thread(target=self._run, name="p2pro-cmd", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                log.warning(f"Camera command {getattr(fn, '__name__', fn)} failed: {e!r}")
+                future.set_exception(e)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queue any call (usually a P2Pro method) for the command thread"""
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def close(self, wait: bool = True):
+        """Stops the worker after the already queued commands"""
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
+
+    def pseudo_color_set(self, preview_path: int, color_type: PseudoColorTypes) -> Future:
+        return self.submit(self.cam.pseudo_color_set, preview_path, color_type)
+
+    def pseudo_color_get(self, preview_path: int = 0) -> Future:
+        return self.submit(self.cam.pseudo_color_get, preview_path)
+
+    def set_prop_tpd_params(self, tpd_param: PropTpdParams, value: int) -> Future:
+        return self.set_tpd_params({tpd_param: value})
+
+    def set_tpd_params(self, params: Dict[PropTpdParams, int]) -> Future:
+        """
+        Queue TPD parameter writes. Until the worker gets to them, further writes are merged into
+        the same batch, so e.g. dragging an emissivity slider doesn't queue hundreds of commands.
+
+        :return: Future of the batch (result: the parameters that were actually written)
+        """
+        with self._lock:
+            self._pending_tpd.update({PropTpdParams(k): v for k, v in params.items()})
+            if self._tpd_future is None:
+                self._tpd_future = self.submit(self._flush_tpd)
+            return self._tpd_future
+
+    def _flush_tpd(self) -> Dict[PropTpdParams, int]:
+        with self._lock:
+            params, self._pending_tpd = self._pending_tpd, {}
+            self._tpd_future = None
+        return self.cam.set_tpd_params(params)
+
+    def get_prop_tpd_params(self, tpd_param: PropTpdParams) -> Future:
+        return self.submit(self.cam.get_prop_tpd_params, tpd_param)
+
+    def get_device_info(self, dev_info: DeviceInfoType, refresh: bool = False) -> Future:
+        if not refresh and dev_info in self.cam._device_info:
+            # cached, no need to wait for the queue
+            future = Future()
+            future.set_result(self.cam._device_info[dev_info])
+            return future
+        return self.submit(self.cam.get_device_info, dev_info, refresh)
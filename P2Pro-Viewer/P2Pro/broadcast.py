@@ -0,0 +1,119 @@
+import threading
+from typing import Any, Optional, Tuple
+
+_EMPTY = (-1, None)
+
+
+class Subscription:
+    """
+    One consumer of a FrameBroadcast. Always hands out the newest item; anything published
+    in between two reads is skipped and counted in `dropped`.
+    """
+
+    def __init__(self, broadcast: 'FrameBroadcast', name: str):
+        self.broadcast = broadcast
+        self.name = name
+        self.seq = -1       # sequence number of the last item returned
+        self.received = 0
+        self.dropped = 0
+        self.closed = False
+        self._event = threading.Event()
+
+    def _take(self, seq: int, item: Any) -> Any:
+        if self.seq >= 0:
+            self.dropped += seq - self.seq - 1
+        self.seq = seq
+        self.received += 1
+        return item
+
+    def latest(self) -> Optional[Any]:
+        """Newest item if there is one we have not seen yet, else None (never blocks)"""
+        seq, item = self.broadcast.current
+        if self.closed or seq <= self.seq:
+            return None
+        return self._take(seq, item)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Wait for an item newer than the last one (None on timeout or once closed)"""
+        while True:
+            if self.closed:
+                return None
+            # clear before checking, so a publish in between still wakes us up
+            self._event.clear()
+            seq, item = self.broadcast.current
+            if seq > self.seq:
+                return self._take(seq, item)
+            if self.broadcast.closed or not self._event.wait(timeout):
+                return None
+
+    def stats(self) -> dict:
+        return {"received": self.received, "dropped": self.dropped, "seq": self.seq}
+
+    def close(self):
+        """Unsubscribe; a consumer blocked in get() wakes up and gets None"""
+        self.closed = True
+        self.broadcast.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FrameBroadcast:
+    """
+    Single producer, any number of consumers, latest value wins.
+
+    The producer swaps one (seq, item) tuple reference and sets each subscriber's event.
+    Event.set() takes that event's internal lock only for an instant, and a consumer never holds
+    it while processing, so a stalled consumer cannot slow down the capture loop. Consumers
+    subscribe and unsubscribe at any time; the subscriber list is copy-on-write, so publish()
+    iterates it without taking the subscribe lock.
+    """
+
+    def __init__(self):
+        self.current: Tuple[int, Any] = _EMPTY
+        self.closed = False
+        self._seq = -1
+        self._subscribers: Tuple[Subscription, ...] = ()
+        self._lock = threading.Lock()  # subscribe/unsubscribe only
+
+    def subscribe(self, name: Optional[str] = None) -> Subscription:
+        """
+        :param name: Label for stats(), e.g. 'gui', 'recorder', 'detector'
+        """
+        with self._lock:
+            sub = Subscription(self, name or f"consumer{len(self._subscribers)}")
+            # start at the current item, so the first get() returns the next one
+            # and nothing published before subscribing counts as dropped
+            sub.seq = self.current[0]
+            self._subscribers = self._subscribers + (sub,)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not sub)
+        sub._event.set()
+
+    def publish(self, item: Any) -> int:
+        """Make `item` the latest one and wake all waiting consumers, returns its sequence number"""
+        self._seq += 1
+        self.current = (self._seq, item)
+        for sub in self._subscribers:
+            sub._event.set()
+        return self._seq
+
+    def close(self):
+        """Wake all consumers; get() returns None once they have seen the last item"""
+        self.closed = True
+        for sub in self._subscribers:
+            sub._event.set()
+
+    @property
+    def subscribers(self) -> Tuple[Subscription, ...]:
+        return self._subscribers
+
+    def stats(self) -> dict:
+        """Per consumer received/dropped counters"""
+        return {sub.name: sub.stats() for sub in self._subscribers}
@@ -0,0 +1,188 @@
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Union
+
+from P2Pro.video import Video
+from P2Pro.broadcast import Subscription
+
+log = logging.getLogger(__name__)
+
+
+CapId = Union[int, str, object, Callable[[], object]]
+
+
+class CaptureDevice:
+    """One camera of the manager: its own Video (ring buffer, broadcast, stats) and capture thread"""
+
+    def __init__(self, name: str, cap_id: CapId, info: Optional[dict] = None, ring_slots: int = 8):
+        self.name = name
+        self.cap_id = cap_id
+        self.info = info or {}
+        self.video = Video(ring_slots)
+        self.thread: Optional[threading.Thread] = None
+        self.open_errors = 0
+        self.last_error: Optional[str] = None
+
+    def target(self) -> Union[int, str, object]:
+        """
+        What to open (again): a fresh capture object from a factory, or the current device node of the
+        module's USB port ('path' = ID_PATH), which may have changed if the module re-enumerated
+        """
+        if callable(self.cap_id):
+            return self.cap_id()
+        path = self.info.get('path')
+        if path:
+            for info in Video.list_P2Pro_devices():
+                if info['path'] == path:
+                    self.info.update(info)
+                    return info['cap_id']
+            raise ConnectionError(f"No P2 Pro module on USB port {path}")
+        return self.cap_id
+
+    def stats(self) -> dict:
+        stats = self.video.stats()
+        cap_id = self.info.get('cap_id', self.cap_id)
+        stats['cap_id'] = cap_id if isinstance(cap_id, (int, str)) else type(cap_id).__name__
+        stats['open_errors'] = self.open_errors
+        stats['last_error'] = self.last_error
+        return stats
+
+
+class CaptureManager:
+    """
+    Runs one capture thread per P2 Pro module, each with isolated frame buffers.
+    By default all modules found via udev (Linux) or resolution/FPS probing (Windows) are used.
+
+        manager = CaptureManager()
+        manager.start()
+        frames = manager.subscribe('p2pro0', 'detector')
+        frame = frames.get(1.0)
+        print(manager.stats())
+    """
+
+    def __init__(self, cap_ids: Optional[List[CapId]] = None, ring_slots: int = 8,
+                 retry_delay: float = 2.0):
+        """
+        :param cap_ids: Capture ids / device paths / capture-like objects, or factories returning a new
+                        capture-like object for every (re)open (default: all connected P2 Pros, reopened
+                        by USB port)
+        :param ring_slots: Frame slots per camera (see FrameRing)
+        :param retry_delay: Seconds between attempts to (re)open a camera that failed to open or stopped
+                            delivering frames
+        """
+        self.ring_slots = ring_slots
+        self.retry_delay = retry_delay
+        self.devices: Dict[str, CaptureDevice] = {}
+        self.running = False
+
+        if cap_ids is None:
+            for info in Video.list_P2Pro_devices():
+                self.add(info['cap_id'], info=info)
+        else:
+            for cap_id in cap_ids:
+                self.add(cap_id)
+
+    def add(self, cap_id: CapId, name: Optional[str] = None, info: Optional[dict] = None) -> CaptureDevice:
+        """Register another camera (started right away if the manager is running)"""
+        name = name or f"p2pro{len(self.devices)}"
+        if name in self.devices:
+            raise KeyError(f"Capture device {name} already exists")
+        device = CaptureDevice(name, cap_id, info, self.ring_slots)
+        self.devices[name] = device
+        if self.running:
+            self._start_device(device)
+        return device
+
+    def _start_device(self, device: CaptureDevice):
+        device.thread = threading.Thread(target=self._run, args=(device,), name=f"capture-{device.name}", daemon=True)
+        device.thread.start()
+
+    def _run(self, device: CaptureDevice):
+        failures = 0  # in a row, for logging
+        while self.running:
+            frames = device.video.frame_count
+            try:
+                device.video.open(device.target())
+                return  # stopped
+            except (ConnectionError, IndexError) as e:
+                # failed to open, or lost the camera mid-flight (see Video.max_read_failures)
+                device.open_errors += 1
+                device.last_error = str(e)
+                failures = 1 if device.video.frame_count > frames else failures + 1
+                if failures == 1:
+                    log.warning(f"{device.name}: {e} - retrying every {self.retry_delay:g} s")
+            except Exception as e:
+                device.last_error = repr(e)
+                log.exception(f"{device.name}: capture failed")
+                return
+            time.sleep(self.retry_delay)
+
+    def start(self):
+        if not self.devices:
+            log.warning("No P2 Pro modules found")
+        self.running = True
+        for device in self.devices.values():
+            log.info(f"Starting {device.name} ({device.info.get('path') or device.cap_id})")
+            self._start_device(device)
+
+    def stop(self, timeout: float = 2.0):
+        self.running = False
+        for device in self.devices.values():
+            device.video.stop()
+        for device in self.devices.values():
+            if device.thread is not None:
+                device.thread.join(timeout)
+
+    def wait_running(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every camera delivers frames"""
+        deadline = None if timeout is None else time.time() + timeout
+        while not all(d.video.video_running for d in self.devices.values()):
+            if deadline is not None and time.time() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def __getitem__(self, name: str) -> Video:
+        return self.devices[name].video
+
+    def subscribe(self, device: str, consumer: Optional[str] = None) -> Subscription:
+        """Frame subscription for one camera (see FrameBroadcast)"""
+        return self.devices[device].video.frames.subscribe(consumer)
+
+    def stats(self) -> dict:
+        """Per camera FPS, latency, read/open errors and received/dropped frames of every consumer"""
+        return {name: device.stats() for name, device in self.devices.items()}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Capture from all connected P2 Pro modules and print their stats")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N synthetic cameras instead of real ones")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between stats reports")
+    args = parser.parse_args()
+
+    logging.basicConfig()
+    log.setLevel(logging.INFO)
+
+    if args.synthetic:
+        from functools import partial
+        from P2Pro.synthetic import Scene, SyntheticCapture
+        # factories, so a released capture is replaced by a new one on the same scene
+        manager = CaptureManager([partial(SyntheticCapture, Scene(seed=i)) for i in range(args.synthetic)])
+    else:
+        for info in Video.list_P2Pro_devices():
+            log.info(f"Found P2 Pro: {info}")
+        manager = CaptureManager()
+
+    manager.start()
+    try:
+        while True:
+            time.sleep(args.interval)
+            for name, stats in manager.stats().items():
+                log.info(f"{name}: {stats['fps']} FPS, {stats['frames']} frames, {stats['latency_ms']} ms latency, "
+                         f"{stats['read_errors']} read errors, {stats['open_errors']} open errors")
+    except KeyboardInterrupt:
+        pass
+    manager.stop()
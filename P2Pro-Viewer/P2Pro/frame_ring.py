@@ -0,0 +1,93 @@
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+class FrameSlot(dict):
+    """
+    One preallocated frame. Behaves like the frame dict consumers already use
+    ('frame_num', 'timestamp', 'rgb_data', 'yuv_data', 'thermal_data'), but every array is a view into
+    (or a buffer owned by) the slot and is overwritten when the ring wraps around.
+    Check `FrameRing.is_current(slot, frame_num)` or copy the data if you keep it for longer.
+    """
+
+    def __init__(self, index: int, resolution):
+        super().__init__()
+        self.index = index
+        self.resolution = resolution  # (width, height) of the whole wire frame
+        self.raw: Optional[np.ndarray] = None   # wire buffer as delivered by the capture
+        self._rgb: Optional[np.ndarray] = None
+        self._celsius: Optional[np.ndarray] = None
+        self["frame_num"] = -1
+        self["timestamp"] = 0.0  # time.time() when the capture returned the frame
+
+    def bind(self, raw_shape, raw_dtype):
+        """(Re)allocate the wire buffer and point the plane views into it"""
+        self.raw = np.empty(raw_shape, dtype=raw_dtype)
+        flat = self.raw.reshape(-1)  # contiguous, so this is a view
+        half = flat.size // 2
+        h, w = self.resolution[1] // 2, self.resolution[0]
+        self["yuv_data"] = flat[:half].reshape(h, w, 2)
+        self["thermal_data"] = flat[half:].view(np.uint16).reshape(h, w)
+        if self._rgb is None:
+            self._rgb = np.empty((h, w, 3), dtype=np.uint8)
+        self["rgb_data"] = self._rgb
+
+    def parse(self):
+        """YUY2 -> RGB straight into the slot's RGB buffer"""
+        cv2.cvtColor(self["yuv_data"], cv2.COLOR_YUV2RGB_YUY2, dst=self._rgb)
+
+    def convert_temperature(self, lut: np.ndarray):
+        """'temperature_c': float32 °C of every pixel, gathered from a raw -> °C LUT into the slot's buffer"""
+        thermal = self["thermal_data"]
+        if self._celsius is None or self._celsius.shape != thermal.shape:
+            self._celsius = np.empty(thermal.shape, dtype=np.float32)
+        np.take(lut, thermal, out=self._celsius, mode='wrap')
+        self["temperature_c"] = self._celsius
+
+
+class FrameRing:
+    """
+    Ring of N preallocated FrameSlots for the capture thread.
+    Capture: slot = ring.acquire(); read into slot.raw; ring.fill(slot, frame); slot.parse(); ring.commit(slot)
+    Consumers get slot references; `frame_num` is the sequence number of the data in it, or -1 while
+    the capture thread is writing it (seqlock style: read the number, use the data, check is_current()).
+    """
+
+    def __init__(self, resolution, slots: int = 8):
+        """
+        :param resolution: (width, height) of the wire frame, e.g. P2Pro_resolution (256, 384)
+        :param slots: Number of slots. A consumer may hold a slot for about slots - 2 frame times
+                      (40 ms each at 25 FPS) before the capture thread overwrites it
+        """
+        self.slots = [FrameSlot(i, resolution) for i in range(max(2, slots))]
+        self.seq = 0  # frame number of the next commit, keeps counting across capture reopens
+        self._next = 0
+
+    def acquire(self) -> FrameSlot:
+        """Next slot to fill (its raw buffer is None until the first fill), invalidated until commit()"""
+        slot = self.slots[self._next]
+        self._next = (self._next + 1) % len(self.slots)
+        # before anything is written into it, so consumers still holding the slot notice
+        slot["frame_num"] = -1
+        return slot
+
+    def commit(self, slot: FrameSlot) -> int:
+        """Mark the completely written slot as the next frame, returns its frame number"""
+        frame_num = self.seq
+        self.seq += 1
+        slot["frame_num"] = frame_num
+        return frame_num
+
+    def fill(self, slot: FrameSlot, frame: np.ndarray):
+        """Make sure the captured data is in slot.raw (no-op if the capture read in place)"""
+        if slot.raw is None or slot.raw.shape != frame.shape or slot.raw.dtype != frame.dtype:
+            slot.bind(frame.shape, frame.dtype)
+        if frame is not slot.raw:
+            np.copyto(slot.raw, frame)
+
+    @staticmethod
+    def is_current(slot: FrameSlot, frame_num: int) -> bool:
+        """True while the slot still holds frame `frame_num` (i.e. is not being or has not been overwritten)"""
+        return frame_num >= 0 and slot["frame_num"] == frame_num
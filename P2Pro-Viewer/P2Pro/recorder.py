@@ -1,6 +1,4 @@
 import threading
-import queue
-import time
 import pyaudio
 import wave
 import os
@@ -11,6 +9,7 @@ import numpy as np
 import ffmpeg
 
 import P2Pro.util as util
+from P2Pro.broadcast import FrameBroadcast, Subscription
 
 log = logging.getLogger(__name__)
 
@@ -56,11 +55,12 @@ class AudioRecorder:
 
 
 class VideoRecorder:
-    def __init__(self, input_queue: queue.Queue, path: str, radiometry: bool = True, audio: bool = True):
+    def __init__(self, frames: FrameBroadcast, path: str, radiometry: bool = True, audio: bool = True):
         self.rec_running = False
         self.thread: threading.Thread = None
 
-        self.input_queue = input_queue
+        self.frames = frames
+        self.subscription: Subscription = None
         self.path = path
         self.with_radiometry = radiometry
         self.with_audio = audio
@@ -70,13 +70,15 @@ class VideoRecorder:
         pass
 
     def rec_thread(self):
-        while self.input_queue.empty():
-            time.sleep(0.01)
-            pass
+        frame = None
+        while frame is None and self.rec_running:
+            frame = self.subscription.get(0.1)
+        if frame is None:
+            self.subscription.close()
+            return
 
         # TODO: metadata
 
-        frame = self.input_queue.queue[0]  # peek first element in queue
         rgb_resolution = frame['rgb_data'].shape
         therm_resolution = frame['thermal_data'].shape
 
@@ -106,14 +108,16 @@ class VideoRecorder:
             proc_audio.start()
 
         while self.rec_running:
-            try:
-                frame = self.input_queue.get(True, 0.1)
-            except queue.Empty:
-                continue
+            if frame is not None:
+                proc_rgb.stdin.write(frame['rgb_data'].astype(np.uint8).tobytes())
+                if self.with_radiometry:
+                    proc_therm.stdin.write(frame['thermal_data'].astype(np.uint16).tobytes())
+            frame = self.subscription.get(0.1)
 
-            proc_rgb.stdin.write(frame['rgb_data'].astype(np.uint8).tobytes())
-            if self.with_radiometry:
-                proc_therm.stdin.write(frame['thermal_data'].astype(np.uint16).tobytes())
+        self.subscription.close()
+        if self.subscription.dropped:
+            log.info(f"Recorder skipped {self.subscription.dropped} of "
+                     f"{self.subscription.received + self.subscription.dropped} frames")
 
         if self.with_audio:
             proc_audio.stop()
@@ -157,6 +161,7 @@ class VideoRecorder:
     def start(self):
         log.info(f"Starting video recording to file {self.path + '.mkv'} ...")
         self.rec_running = True
+        self.subscription = self.frames.subscribe('recorder')
         self.rec_thread = threading.Thread(target=self.rec_thread)
         self.rec_thread.start()
 
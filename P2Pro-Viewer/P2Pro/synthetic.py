@@ -0,0 +1,267 @@
+import time
+import logging
+import platform
+import threading
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from P2Pro.video import P2Pro_resolution, P2Pro_fps
+from P2Pro.temperature import KELVIN_OFFSET, RAW_PER_KELVIN
+
+log = logging.getLogger(__name__)
+
+
+class Scene:
+    """
+    Synthetic thermal scene: smooth terrain around ambient temperature plus moving,
+    flickering Gaussian fire blobs and per-frame sensor noise. Temperatures are in °C.
+    """
+
+    def __init__(self, width: int = P2Pro_resolution[0], height: int = P2Pro_resolution[1] // 2,
+                 ambient_c: float = 20.0, terrain_c: float = 6.0, fires: int = 2,
+                 fire_c: Tuple[float, float] = (350.0, 750.0), fire_radius: Tuple[float, float] = (2.0, 8.0),
+                 speed: float = 0.5, flicker: float = 0.1, noise_c: float = 0.08,
+                 pan: Tuple[float, float] = (0.0, 0.0), seed: Optional[int] = None):
+        """
+        :param width, height: Thermal image size (P2 Pro: 256x192)
+        :param ambient_c: Mean terrain temperature
+        :param terrain_c: Terrain variation (std. dev. of the smooth noise)
+        :param fires: Number of fire blobs
+        :param fire_c: Range of blob peak temperatures
+        :param fire_radius: Range of blob radii (Gaussian sigma) in pixels
+        :param speed: Blob speed in pixels per frame
+        :param flicker: Relative frame-to-frame variation of the blob peaks
+        :param noise_c: Sensor noise (NETD-like std. dev.)
+        :param pan: Terrain movement in pixels per frame (x, y), e.g. a flying drone
+        :param seed: Random seed for a reproducible scene
+        """
+        self.width = width
+        self.height = height
+        self.flicker = flicker
+        self.noise_c = noise_c
+        self.pan = np.asarray(pan, dtype=np.float64)
+        self.rng = np.random.default_rng(seed)
+
+        # smooth terrain: coarse noise, upsampled (twice the size, so it can pan)
+        coarse = self.rng.standard_normal((height // 8 + 1, width // 8 + 1)).astype(np.float32)
+        self.terrain = ambient_c + terrain_c * cv2.resize(coarse, (2 * width, 2 * height), interpolation=cv2.INTER_CUBIC)
+        self._offset = np.zeros(2)
+
+        self.positions = self.rng.uniform((0, 0), (width, height), (fires, 2))
+        angle = self.rng.uniform(0, 2 * np.pi, fires)
+        self.velocities = speed * np.stack([np.cos(angle), np.sin(angle)], axis=1)
+        self.radii = self.rng.uniform(*fire_radius, fires)
+        self.peaks = self.rng.uniform(*fire_c, fires)
+
+        self.frame_num = 0
+        self.temperature = None  # °C of the last frame
+
+    def step(self) -> np.ndarray:
+        """Advance one frame and return it as raw uint16 counts (1/64 K)"""
+        w, h = self.width, self.height
+
+        self._offset = (self._offset + self.pan) % (w, h)
+        ox, oy = self._offset.astype(int)
+        temp = self.terrain[oy:oy + h, ox:ox + w].copy()
+
+        # fires move and bounce off the edges
+        self.positions += self.velocities
+        for axis, size in enumerate((w, h)):
+            out = (self.positions[:, axis] < 0) | (self.positions[:, axis] >= size)
+            self.velocities[out, axis] *= -1
+            self.positions[:, axis] = np.clip(self.positions[:, axis], 0, size - 1)
+
+        peaks = self.peaks * (1 + self.flicker * self.rng.standard_normal(len(self.peaks)))
+        for (x, y), sigma, peak in zip(self.positions, self.radii, peaks):
+            # render each blob only within 3 sigma
+            r = int(3 * sigma) + 1
+            x0, x1, y0, y1 = max(int(x) - r, 0), min(int(x) + r + 1, w), max(int(y) - r, 0), min(int(y) + r + 1, h)
+            dx = np.arange(x0, x1, dtype=np.float32) - x
+            dy = np.arange(y0, y1, dtype=np.float32) - y
+            g = np.exp(-(dy[:, None] ** 2 + dx[None, :] ** 2) / (2 * sigma ** 2))
+            patch = temp[y0:y1, x0:x1]
+            np.maximum(patch, patch + (peak - patch) * g, out=patch)
+
+        if self.noise_c:
+            temp += self.noise_c * self.rng.standard_normal((h, w), dtype=np.float32)
+
+        self.temperature = temp
+        self.frame_num += 1
+        return np.clip((temp + KELVIN_OFFSET) * RAW_PER_KELVIN, 0, 65535).astype(np.uint16)
+
+    def truth(self) -> dict:
+        """Ground truth of the last frame: blob centres, radii and (nominal) peak temperatures"""
+        return {"centres": self.positions.copy(), "radii": self.radii.copy(), "peak_c": self.peaks.copy()}
+
+
+class SyntheticCapture:
+    """
+    cv2.VideoCapture look-alike that emits frames in the exact P2 Pro wire layout
+    (CAP_PROP_CONVERT_RGB off): top half YUY2 pseudo colour, bottom half uint16 temperatures.
+    Pass it to Video.open() instead of a camera id.
+    """
+
+    def __init__(self, scene: Optional[Scene] = None, fps: float = P2Pro_fps, realtime: bool = True,
+                 colormap: Optional[int] = None, layout: Optional[str] = None):
+        """
+        :param scene: Scene to render (default: Scene())
+        :param fps: Reported and (if realtime) paced frame rate
+        :param realtime: Sleep to deliver frames at `fps`, otherwise as fast as possible
+        :param colormap: cv2 colormap for the pseudo colour half (None = white hot)
+        :param layout: 'linux' -> (384, 256, 2) uint8, 'windows' -> (1, N) uint8 (default: this platform)
+        """
+        self.scene = scene or Scene()
+        self.fps = fps
+        self.realtime = realtime
+        self.layout = layout or ('windows' if platform.system() == 'Windows' else 'linux')
+        self.props = {}
+        self.opened = True
+        self._next_time = 0.0
+
+        # gray level -> (Y, U, V), so the pseudo colour half costs a few table lookups
+        levels = np.arange(256, dtype=np.uint8).reshape(256, 1)
+        bgr = cv2.cvtColor(levels, cv2.COLOR_GRAY2BGR) if colormap is None else cv2.applyColorMap(levels, colormap)
+        self.yuv_lut = cv2.cvtColor(bgr, cv2.COLOR_BGR2YUV).reshape(256, 3)
+
+    def isOpened(self) -> bool:
+        return self.opened
+
+    def get(self, prop: int) -> float:
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(P2Pro_resolution[0])
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(P2Pro_resolution[1])
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        return float(self.props.get(prop, 0))
+
+    def set(self, prop: int, value) -> bool:
+        self.props[prop] = value
+        return True
+
+    def getBackendName(self) -> str:
+        return "SYNTHETIC"
+
+    def release(self):
+        self.opened = False
+
+    def encode(self, raw: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Wire frame for raw uint16 temperatures (pseudo colour from a min/max AGC like the camera)
+        :param out: Buffer in the wire layout to write into (like cv2.VideoCapture.read(image))
+        """
+        h, w = raw.shape
+        lo, hi = int(raw.min()), int(raw.max())
+        gray = ((raw.astype(np.float32) - lo) * (255.0 / max(hi - lo, 1))).astype(np.uint8)
+
+        shape = (1, 2 * h * w * 2) if self.layout == 'windows' else (2 * h, w, 2)
+        if out is None or out.shape != shape or out.dtype != np.uint8:
+            out = np.empty(shape, dtype=np.uint8)
+        frame = out.reshape(2 * h, w, 2)
+        yuy2 = frame[:h]
+        yuy2[..., 0] = self.yuv_lut[gray, 0]
+        yuy2[:, 0::2, 1] = self.yuv_lut[gray[:, 0::2], 1]  # U of each pixel pair
+        yuy2[:, 1::2, 1] = self.yuv_lut[gray[:, 1::2], 2]  # V
+        frame[h:] = raw.view(np.uint8).reshape(h, w, 2)
+        return out
+
+    def read(self, image: Optional[np.ndarray] = None):
+        if not self.opened:
+            return False, None
+        if self.realtime:
+            delay = self._next_time - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_time = max(self._next_time + 1.0 / self.fps, time.time())
+        return True, self.encode(self.scene.step(), image)
+
+
+def benchmark(cameras: int = 4, seconds: float = 10.0, realtime: bool = True, hotspot: bool = False,
+              record_dir: Optional[str] = None) -> dict:
+    """
+    Run N virtual cameras through the real Video parsing (and optionally hotspot detection / recording)
+    :return: per camera dict with received frames, FPS and frames the consumer skipped
+    """
+    import P2Pro.video
+
+    hotspot_cls = None
+    if hotspot:
+        from P2Pro.hotspot import HotspotDetector
+        hotspot_cls = HotspotDetector
+
+    videos, recorders, stats = [], [], []
+    consumers = []
+    running = True
+
+    def consume(video, stat):
+        detector = hotspot_cls() if hotspot_cls else None
+        frames = stat['subscription']
+        while running:
+            frame = frames.get(0.5)
+            if frame is None:
+                continue
+            stat['frames'] += 1
+            if detector is not None:
+                stat['hot'] += detector.detect(frame['thermal_data'])['hot']
+
+    for i in range(cameras):
+        video = P2Pro.video.Video()
+        cap = SyntheticCapture(Scene(seed=i), realtime=realtime)
+        threading.Thread(target=video.open, args=(cap,), name=f"synthetic-{i}", daemon=True).start()
+        stat = {'frames': 0, 'hot': 0, 'subscription': video.frames.subscribe('benchmark')}
+        consumer = threading.Thread(target=consume, args=(video, stat), daemon=True)
+        videos.append(video)
+        stats.append(stat)
+        consumers.append(consumer)
+        if record_dir:
+            import P2Pro.recorder
+            rec = P2Pro.recorder.VideoRecorder(video.frames, f"{record_dir}/synthetic_{i}", audio=False)
+            recorders.append(rec)
+
+    while not all(v.video_running for v in videos):
+        time.sleep(0.01)
+    for consumer in consumers:
+        consumer.start()
+    for rec in recorders:
+        rec.start()
+
+    start = time.time()
+    time.sleep(seconds)
+    running = False
+    elapsed = time.time() - start
+    for rec in recorders:
+        rec.stop()
+    for video in videos:
+        video.stop()
+
+    results = {}
+    for i, stat in enumerate(stats):
+        results[i] = {
+            'frames': stat['frames'],
+            'fps': round(stat['frames'] / elapsed, 1),
+            'lost': stat['subscription'].dropped,
+            'hot_frames': stat['hot'],
+        }
+        log.info(f"camera {i}: {results[i]['fps']} FPS, {results[i]['frames']} frames, "
+                 f"{results[i]['lost']} lost" + (f", {stat['hot']} hot" if hotspot else ""))
+    total = sum(r['frames'] for r in results.values()) / elapsed
+    log.info(f"{cameras} cameras: {total:.1f} frames/s total")
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark N virtual P2 Pro cameras through the real parsing code")
+    parser.add_argument("--cameras", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--unpaced", action="store_true", help="Deliver frames as fast as possible instead of 25 FPS")
+    parser.add_argument("--hotspot", action="store_true", help="Run the hotspot detector on every frame")
+    parser.add_argument("--record", type=str, default=None, help="Also record every camera into this folder")
+    args = parser.parse_args()
+
+    logging.basicConfig()
+    log.setLevel(logging.INFO)
+    benchmark(args.cameras, args.seconds, not args.unpaced, args.hotspot, args.record)
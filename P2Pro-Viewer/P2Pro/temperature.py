@@ -0,0 +1,130 @@
+import logging
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# Raw P2 Pro temperature counts are 1/64 Kelvin
+RAW_PER_KELVIN = 64
+KELVIN_OFFSET = 273.15
+
+# PropTpdParams values (not imported from P2Pro_cmd, which needs pyusb)
+TPD_DISTANCE, TPD_TU, TPD_TA, TPD_EMS, TPD_TAU = 0, 1, 2, 3, 4
+
+
+def default_lut() -> np.ndarray:
+    """
+    Lookup table raw uint16 count -> °C for all 65536 possible values (raw / 64 - 273.15).
+    Indexing it with a uint16 frame converts the whole frame without any per-pixel arithmetic.
+    """
+    return np.arange(65536, dtype=np.float32) / RAW_PER_KELVIN - np.float32(KELVIN_OFFSET)
+
+
+RAW_TO_CELSIUS = default_lut()
+
+
+def to_celsius(raw: np.ndarray, lut: np.ndarray = RAW_TO_CELSIUS, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Convert a raw uint16 thermal frame to °C (float32) through the LUT"""
+    # uint16 indices always fit the 65536 entries; 'wrap' is the cheapest of np.take's index modes
+    return np.take(lut, raw, out=out, mode='wrap')
+
+
+def compensated_lut(emissivity: float = 1.0, reflected_c: float = 25.0, atmosphere_c: float = 25.0,
+                    transmittance: float = 1.0) -> np.ndarray:
+    """
+    raw -> °C table that corrects the camera's apparent (blackbody) temperature for the object's
+    emissivity, reflected radiation and the atmosphere. Uses the broadband radiometric equation
+
+        T_app^4 = tau * eps * T_obj^4 + tau * (1 - eps) * T_refl^4 + (1 - tau) * T_atm^4
+
+    solved for T_obj (all in Kelvin). Monotonic, so thresholds can be looked up with searchsorted.
+    """
+    if emissivity == 1.0 and transmittance == 1.0:
+        return default_lut()
+    if not (0 < emissivity <= 1 and 0 < transmittance <= 1):
+        raise ValueError(f"Emissivity and transmittance must be in (0, 1], got {emissivity}, {transmittance}")
+
+    apparent = np.arange(65536, dtype=np.float64) / RAW_PER_KELVIN
+    reflected = (1 - emissivity) * transmittance * (reflected_c + KELVIN_OFFSET) ** 4
+    atmosphere = (1 - transmittance) * (atmosphere_c + KELVIN_OFFSET) ** 4
+    obj = (apparent ** 4 - reflected - atmosphere) / (emissivity * transmittance)
+    return (np.sqrt(np.sqrt(np.maximum(obj, 0))) - KELVIN_OFFSET).astype(np.float32)
+
+
+class TemperatureConverter:
+    """
+    Holds the raw -> °C LUT for the current TPD parameters (emissivity, reflected and atmospheric
+    temperature, transmittance) and converts whole frames with one gather. The table is only
+    rebuilt when a parameter actually changes; `version` counts the rebuilds, so consumers can
+    cheaply check whether they need to pick up the new table.
+
+        temperature = TemperatureConverter()
+        cam.tpd_listeners.append(temperature.update_tpd)   # follow the camera settings
+        celsius = temperature.convert(frame['thermal_data'])
+    """
+
+    def __init__(self, emissivity: float = 1.0, reflected_c: float = 25.0, atmosphere_c: float = 25.0,
+                 transmittance: float = 1.0, distance_m: float = 0.25):
+        """
+        :param emissivity: Emissivity of the object (1.0 = no correction, what the raw data assumes)
+        :param reflected_c: Temperature of the surroundings reflected by the object
+        :param atmosphere_c: Temperature of the air between camera and object
+        :param transmittance: Atmospheric transmittance of the path (1.0 = none)
+        :param distance_m: Object distance; kept for reference only, it affects the result through transmittance
+        """
+        self.params = {
+            'emissivity': emissivity,
+            'reflected_c': reflected_c,
+            'atmosphere_c': atmosphere_c,
+            'transmittance': transmittance,
+            'distance_m': distance_m,
+        }
+        self.version = 0
+        self._lock = threading.Lock()
+        self.lut = self._build()
+
+    def _build(self) -> np.ndarray:
+        p = self.params
+        return compensated_lut(p['emissivity'], p['reflected_c'], p['atmosphere_c'], p['transmittance'])
+
+    def update(self, **params) -> bool:
+        """
+        Change parameters (same names as the constructor)
+        :return: True if the LUT was rebuilt
+        """
+        unknown = set(params) - set(self.params)
+        if unknown:
+            raise KeyError(f"Unknown temperature parameters: {', '.join(sorted(unknown))}")
+        with self._lock:
+            changed = {k: v for k, v in params.items() if self.params[k] != v}
+            if not changed:
+                return False
+            self.params.update(changed)
+            if set(changed) == {'distance_m'}:
+                return False
+            # build first, then swap the reference, so readers always see a complete table
+            self.lut = self._build()
+            self.version += 1
+        log.info(f"Temperature LUT rebuilt for {self.params}")
+        return True
+
+    def update_tpd(self, tpd_params: Dict[int, int]) -> bool:
+        """Take the parameters in camera units, e.g. P2Pro.P2Pro_cmd's dict of PropTpdParams -> value"""
+        params = {}
+        if TPD_EMS in tpd_params:
+            params['emissivity'] = max(tpd_params[TPD_EMS], 1) / 127
+        if TPD_TAU in tpd_params:
+            params['transmittance'] = max(tpd_params[TPD_TAU], 1) / 127
+        if TPD_TU in tpd_params:
+            params['reflected_c'] = tpd_params[TPD_TU] - KELVIN_OFFSET
+        if TPD_TA in tpd_params:
+            params['atmosphere_c'] = tpd_params[TPD_TA] - KELVIN_OFFSET
+        if TPD_DISTANCE in tpd_params:
+            params['distance_m'] = tpd_params[TPD_DISTANCE] / 163.835
+        return self.update(**params)
+
+    def convert(self, raw: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Raw uint16 frame -> °C (float32)"""
+        return to_celsius(raw, self.lut, out)
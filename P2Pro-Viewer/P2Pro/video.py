@@ -1,11 +1,13 @@
 import platform
 import time
-import queue
 import logging
-from typing import Union
+from typing import List, Optional, Union
 
 import cv2
-import numpy as np
+
+from P2Pro.frame_ring import FrameRing
+from P2Pro.broadcast import FrameBroadcast
+from P2Pro.temperature import TemperatureConverter
 
 if platform.system() == 'Linux':
     import pyudev
@@ -17,9 +19,29 @@ P2Pro_usb_id = (0x0bda, 0x5830)  # VID, PID
 log = logging.getLogger(__name__)
 
 class Video:
-    # queue 0 is for GUI, 1 is for recorder
-    frame_queue = [queue.Queue(1) for _ in range(2)]
-    video_running = False
+    def __init__(self, ring_slots: int = 8, temperature: Optional[TemperatureConverter] = None,
+                 max_read_failures: int = 50):
+        """
+        :param ring_slots: Number of preallocated frame slots (see FrameRing)
+        :param temperature: If given, every frame also gets 'temperature_c' (float32 °C) through its LUT
+        :param max_read_failures: Consecutive failed reads after which open() gives up with a
+                                  ConnectionError (e.g. the module was unplugged)
+        """
+        # frames are parsed into preallocated slots and broadcast as slot references;
+        # GUI, recorder, detectors etc. each take their own subscription: vid.frames.subscribe('gui')
+        self.ring = FrameRing(P2Pro_resolution, ring_slots)
+        self.frames = FrameBroadcast()
+        self.temperature = temperature
+        self.max_read_failures = max_read_failures
+        self.video_running = False
+        self._stop_requested = False
+
+        # capture stats
+        self.frame_count = 0
+        self.read_errors = 0
+        self.interval = 0.0     # smoothed seconds between frames
+        self.latency_ms = 0.0   # smoothed read -> publish time (fill + parse)
+        self.last_frame_time = 0.0
 
     @staticmethod
     def list_cap_ids():
@@ -54,32 +76,59 @@ class Video:
             dev_port += 1
         return working_ids, available_ids, non_working_ids
 
-    # Sadly, Windows APIs / OpenCV is very limited, and the only way to detect the camera is by its characteristic resolution and framerate
-    # On Linux, just use the VID/PID via udev
-    def get_P2Pro_cap_id(self):
+    @staticmethod
+    def list_P2Pro_devices() -> List[dict]:
+        """
+        All connected P2 Pro modules as dicts with 'cap_id' and, on Linux, the USB 'path'
+        (stable per port, e.g. to tell the left and right camera of an airframe apart) and 'serial'.
+        """
         if platform.system() == 'Linux':
+            devices = []
             for device in pyudev.Context().list_devices(subsystem='video4linux'):
-                if (int(device.get('ID_USB_VENDOR_ID'), 16), int(device.get('ID_USB_MODEL_ID'), 16)) == P2Pro_usb_id and \
-                        'capture' in device.get('ID_V4L_CAPABILITIES'):
-                    return device.get('DEVNAME')
-            return None
-
-        # Fallback that uses the resolution and framerate to identify the device
-        working_ids, _, _ = self.list_cap_ids()
-        for id in working_ids:
-            if id[1] == P2Pro_resolution and id[2] == P2Pro_fps:
-                return id[0]
-        return None
-
-    def open(self, camera_id: Union[int, str] = -1):
-        if camera_id == -1:
-            log.info("No camera ID specified, scanning... (This could take a few seconds)")
-            camera_id = self.get_P2Pro_cap_id()
-            if camera_id == None:
-                raise ConnectionError(f"Could not find camera module")
-
-        # check if video capture can be opened
-        cap = cv2.VideoCapture(camera_id)
+                vid, pid = device.get('ID_USB_VENDOR_ID'), device.get('ID_USB_MODEL_ID')
+                if vid is None or pid is None:
+                    continue
+                if (int(vid, 16), int(pid, 16)) == P2Pro_usb_id and 'capture' in device.get('ID_V4L_CAPABILITIES', ''):
+                    devices.append({
+                        'cap_id': device.get('DEVNAME'),
+                        'path': device.get('ID_PATH'),
+                        'serial': device.get('ID_SERIAL_SHORT'),
+                    })
+            return sorted(devices, key=lambda d: d['path'] or d['cap_id'])
+
+        # Sadly, Windows APIs / OpenCV is very limited, and the only way to detect the camera
+        # is by its characteristic resolution and framerate
+        working_ids, _, _ = Video.list_cap_ids()
+        return [{'cap_id': id[0], 'path': None, 'serial': None}
+                for id in working_ids if id[1] == P2Pro_resolution and id[2] == P2Pro_fps]
+
+    @staticmethod
+    def list_P2Pro_cap_ids() -> list:
+        """Capture ids (device paths on Linux, indices on Windows) of all connected P2 Pro modules"""
+        return [device['cap_id'] for device in Video.list_P2Pro_devices()]
+
+    def get_P2Pro_cap_id(self):
+        """First connected P2 Pro (see list_P2Pro_cap_ids / P2Pro.capture_manager for several)"""
+        cap_ids = self.list_P2Pro_cap_ids()
+        return cap_ids[0] if cap_ids else None
+
+    def open(self, camera_id: Union[int, str, object] = -1):
+        """
+        Capture loop, runs until stop() is called.
+        camera_id can also be an already opened capture-like object (read/get/set/isOpened/release),
+        e.g. P2Pro.synthetic.SyntheticCapture for testing without hardware.
+        """
+        if hasattr(camera_id, 'read'):
+            cap = camera_id
+        else:
+            if camera_id == -1:
+                log.info("No camera ID specified, scanning... (This could take a few seconds)")
+                camera_id = self.get_P2Pro_cap_id()
+                if camera_id == None:
+                    raise ConnectionError(f"Could not find camera module")
+
+            # check if video capture can be opened
+            cap = cv2.VideoCapture(camera_id)
         if (not cap.isOpened()):
             raise ConnectionError(f"Could not open video capture device with index {camera_id}, is the module connected?")
 
@@ -93,46 +142,76 @@ class Video:
         # disable automatic YUY2->RGB conversion of OpenCV
         cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
 
-        frame_counter = 0
+        failures = 0
 
-        while True:
-            success, frame = cap.read()
+        while not self._stop_requested:
+            # read straight into the next ring slot (OpenCV reuses the buffer if it fits)
+            slot = self.ring.acquire()
+            success, frame = cap.read(slot.raw) if slot.raw is not None else cap.read()
 
             if (not success):
+                self.read_errors += 1
+                failures += 1
+                if failures >= self.max_read_failures:
+                    cap.release()
+                    self.video_running = False
+                    raise ConnectionError(f"Camera {camera_id} stopped delivering frames ({failures} failed reads)")
+                time.sleep(0.01)
                 continue
+            failures = 0
 
+            read_time = time.time()
             self.video_running = True
-            
-            # On Windows, with RGB conversion turned off, OpenCV returns the image as a 2D array with size [1][<imageLen>]. Turn into 1D array. 
-            if platform.system() == 'Windows':
-                frame = frame[0]
-
-            # split video frame (top is pseudo color, bottom is temperature data)
-            frame_mid_pos = int(len(frame) / 2)
-            picture_data = frame[0:frame_mid_pos]
-            thermal_data = frame[frame_mid_pos:]
-
-            # convert buffers to numpy arrays
-            yuv_picture = np.frombuffer(picture_data, dtype=np.uint8).reshape((P2Pro_resolution[1] // 2, P2Pro_resolution[0], 2))
-            rgb_picture = cv2.cvtColor(yuv_picture, cv2.COLOR_YUV2RGB_YUY2)
-            thermal_picture_16 = np.frombuffer(thermal_data, dtype=np.uint16).reshape((P2Pro_resolution[1] // 2, P2Pro_resolution[0]))
-
-            # pack parsed frame data into object
-            frame_obj = {
-                "frame_num": frame_counter,
-                "rgb_data": rgb_picture,
-                "yuv_data": yuv_picture,
-                "thermal_data": thermal_picture_16
-            }
-
-            # populate all queues with new frame
-            for queue in self.frame_queue:
-                # if queue is full, discard oldest frame (e.g. if frames not read fast enough or at all)
-                if queue.full():
-                    queue.get(False)
-                queue.put(frame_obj)
-
-            frame_counter += 1
+
+            # With RGB conversion turned off, OpenCV returns the image as [384][256][2] (Linux)
+            # or as a 2D array with size [1][<imageLen>] (Windows). Either way the first half of
+            # the bytes is the pseudo color YUY2 picture and the second half the uint16 temperatures,
+            # which the slot exposes as views ('yuv_data', 'thermal_data').
+            self.ring.fill(slot, frame)
+            slot.parse()
+            slot["timestamp"] = read_time
+            if self.temperature is not None:
+                slot.convert_temperature(self.temperature.lut)
+            self.ring.commit(slot)
+
+            # consumers that are not fast enough just skip frames (counted per subscriber)
+            self.frames.publish(slot)
+
+            self._update_stats(read_time)
+
+        cap.release()
+        self.video_running = False
+        self.frames.close()
+
+    def stop(self):
+        """Ends the capture loop of open() (from another thread)"""
+        self._stop_requested = True
+
+    def _update_stats(self, read_time: float, alpha: float = 0.1):
+        latency_ms = 1000 * (time.time() - read_time)
+        if self.frame_count:
+            interval = read_time - self.last_frame_time
+            self.interval = interval if self.frame_count == 1 else (1 - alpha) * self.interval + alpha * interval
+            self.latency_ms = (1 - alpha) * self.latency_ms + alpha * latency_ms
+        else:
+            self.latency_ms = latency_ms
+        self.last_frame_time = read_time
+        self.frame_count += 1
+
+    @property
+    def fps(self) -> float:
+        return 1.0 / self.interval if self.interval > 0 else 0.0
+
+    def stats(self) -> dict:
+        """Capture stats plus received/dropped frames of every subscriber"""
+        return {
+            'running': self.video_running,
+            'frames': self.frame_count,
+            'fps': round(self.fps, 1),
+            'latency_ms': round(self.latency_ms, 2),
+            'read_errors': self.read_errors,
+            'consumers': self.frames.stats(),
+        }
 
 
 if __name__ == "__main__":
@@ -19,26 +19,27 @@ try:
     while not vid.video_running:
         time.sleep(0.01)
 
-    rec = P2Pro.recorder.VideoRecorder(vid.frame_queue[1], "test")
+    rec = P2Pro.recorder.VideoRecorder(vid.frames, "test")
     rec.start()
 
     cam_cmd = P2Pro_CMD.P2Pro()
+    cmd = P2Pro_CMD.CommandWorker(cam_cmd)  # all commands on one thread, calls return futures
 
     # print (cam_cmd._dev)
     # cam_cmd._standard_cmd_write(P2Pro_CMD.CmdCode.sys_reset_to_rom)
     # print(cam_cmd._standard_cmd_read(P2Pro_CMD.CmdCode.cur_vtemp, 0, 2))
     # print(cam_cmd._standard_cmd_read(P2Pro_CMD.CmdCode.shutter_vtemp, 0, 2))
-    cam_cmd.pseudo_color_set(0, P2Pro_CMD.PseudoColorTypes.PSEUDO_IRON_RED)
-    print(cam_cmd.pseudo_color_get())
-    # cam_cmd.set_prop_tpd_params(P2Pro_CMD.PropTpdParams.TPD_PROP_GAIN_SEL, 0)
-    print(cam_cmd.get_prop_tpd_params(P2Pro_CMD.PropTpdParams.TPD_PROP_GAIN_SEL))
-    print(cam_cmd.get_device_info(P2Pro_CMD.DeviceInfoType.DEV_INFO_GET_PN))
+    cmd.pseudo_color_set(0, P2Pro_CMD.PseudoColorTypes.PSEUDO_IRON_RED)
+    print(cmd.pseudo_color_get().result())
+    # cmd.set_tpd_params({P2Pro_CMD.PropTpdParams.TPD_PROP_GAIN_SEL: 0, P2Pro_CMD.PropTpdParams.TPD_PROP_EMS: 120})
+    print(cmd.get_prop_tpd_params(P2Pro_CMD.PropTpdParams.TPD_PROP_GAIN_SEL).result())
+    print(cmd.get_device_info(P2Pro_CMD.DeviceInfoType.DEV_INFO_GET_PN).result())
 
     time.sleep(5)
     rec.stop()
 
     while True:
-        # print(vid.frame_queue[0].get(True, 2)) # test
+        # print(gui_frames.get(2)) # test, with gui_frames = vid.frames.subscribe('gui')
         time.sleep(0.1)
 
 except KeyboardInterrupt:
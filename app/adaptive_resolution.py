@@ -0,0 +1,118 @@
+"""
+Latency-Budget Adaptive Input Resolution
+Picks the model input size online so each frame fits a latency budget.
+
+A moving (EWMA) latency estimate is kept per input size. When the current
+size runs over budget the controller steps DOWN; when the next larger size
+is expected to fit with headroom to spare it steps back UP. Estimates of
+sizes not in use drift towards the current size's latency scaled by pixel
+count, so a reading taken under a load spike does not block stepping back
+up forever. Every change is printed and the recent ones are kept in
+`decisions`, so one config runs well on both the laptop and the Pi.
+
+Usage:
+    ctrl = ResolutionController(budget_ms=150)
+    start = time.time()
+    detections = backend.predict([frame], imgsz=ctrl.size)
+    ctrl.update((time.time() - start) * 1000)
+"""
+import time
+from collections import deque
+
+DEFAULT_SIZES = (320, 416, 512, 640)
+
+
+class ResolutionController:
+    """Steps the model input size down/up to stay inside a per-frame latency budget"""
+
+    def __init__(self, budget_ms=150, sizes=DEFAULT_SIZES, alpha=0.2, headroom=0.8,
+                 cooldown=10, start_size=None, decay=0.02, max_decisions=100, verbose=True):
+        """
+        Args:
+            budget_ms: Per-frame latency budget in milliseconds
+            sizes: Allowed input sizes (multiples of 32)
+            alpha: EWMA smoothing factor for latency estimates
+            headroom: Step up only if the larger size is predicted below budget * headroom
+            cooldown: Minimum frames between two changes
+            start_size: Initial size (default: largest)
+            decay: Per-frame weight pulling the estimates of sizes not in use towards
+                   the current size's estimate scaled by pixel count
+            max_decisions: Number of recent decisions kept in `decisions`
+            verbose: Print every decision
+        """
+        self.budget_ms = budget_ms
+        self.sizes = sorted(sizes)
+        self.alpha = alpha
+        self.headroom = headroom
+        self.cooldown = cooldown
+        self.decay = decay
+        self.verbose = verbose
+
+        self.index = self.sizes.index(start_size) if start_size in self.sizes else len(self.sizes) - 1
+        self.estimates = {s: None for s in self.sizes}
+        self.frames_since_change = 0
+        self.changes = 0
+        self.decisions = deque(maxlen=max_decisions)
+
+    @property
+    def size(self):
+        """Input size to use for the next frame"""
+        return self.sizes[self.index]
+
+    def _scaled(self, size):
+        """Current size's latency estimate extrapolated to another size by pixel count"""
+        return self.estimates[self.size] * (size / self.size) ** 2
+
+    def _predict(self, index):
+        """Latency estimate for a size, extrapolated by pixel count if never measured"""
+        size = self.sizes[index]
+        if self.estimates[size] is not None:
+            return self.estimates[size]
+        return self._scaled(size)
+
+    def update(self, latency_ms):
+        """
+        Feed the measured latency of the frame that just ran at self.size
+
+        Returns:
+            The size to use for the next frame
+        """
+        size = self.size
+        prev = self.estimates[size]
+        self.estimates[size] = latency_ms if prev is None else (1 - self.alpha) * prev + self.alpha * latency_ms
+        self.frames_since_change += 1
+
+        # Age out what was measured at other sizes (e.g. while the CPU was busy)
+        for other, estimate in self.estimates.items():
+            if other != size and estimate is not None:
+                self.estimates[other] = (1 - self.decay) * estimate + self.decay * self._scaled(other)
+
+        if self.frames_since_change < self.cooldown:
+            return self.size
+
+        estimate = self.estimates[size]
+        if estimate > self.budget_ms and self.index > 0:
+            self._change(self.index - 1, estimate, "over budget")
+        elif self.index < len(self.sizes) - 1:
+            predicted = self._predict(self.index + 1)
+            if predicted < self.budget_ms * self.headroom:
+                self._change(self.index + 1, predicted, "headroom")
+        return self.size
+
+    def _change(self, new_index, estimate_ms, reason):
+        old = self.size
+        self.index = new_index
+        self.frames_since_change = 0
+        self.changes += 1
+        decision = {
+            'time': time.time(),
+            'from': old,
+            'to': self.size,
+            'estimate_ms': round(estimate_ms, 1),
+            'budget_ms': self.budget_ms,
+            'reason': reason,
+        }
+        self.decisions.append(decision)
+        if self.verbose:
+            arrow = "⬇️" if self.size < old else "⬆️"
+            print(f"{arrow} imgsz {old} → {self.size} ({reason}: ~{estimate_ms:.0f}ms vs budget {self.budget_ms:.0f}ms)")
@@ -0,0 +1,100 @@
+"""
+Lazy, Single-Pass Annotation
+An annotated frame is a product nobody may ask for: headless drones only
+send telemetry. LazyAnnotation records what to draw (boxes + HUD text) and
+renders it the first time a consumer reads `.image` - once, in one pass,
+into a reusable buffer. Later reads return the same image.
+
+Usage:
+    annotator = Annotator()
+    ann = annotator.annotate(frame, detections)
+    ann.text("FIRE DETECTED", (10, 30), color=(0, 0, 255), scale=0.8, thickness=2)
+    ...
+    cv2.imshow("view", ann.image)        # drawn here, only if needed
+    cv2.imwrite("live.jpg", ann.image)   # no second draw
+"""
+import threading
+
+import cv2
+import numpy as np
+
+HUD_FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+class LazyAnnotation:
+    """Frame + detections + HUD lines, rendered on first access"""
+
+    def __init__(self, frame, detections=None, buffer=None):
+        """
+        Args:
+            frame: BGR image (not modified)
+            detections: Detections to draw (None = HUD only)
+            buffer: Preallocated array to render into (same shape/dtype as frame)
+        """
+        self.frame = frame
+        self.detections = detections
+        self.hud = []
+        self._buffer = buffer
+        self._image = None
+        self._lock = threading.Lock()
+
+    def text(self, text, org, color=(255, 255, 255), scale=0.5, thickness=1):
+        """Queue a HUD text line (drawn together with the boxes)"""
+        self.hud.append((text, org, color, scale, thickness))
+        return self
+
+    @property
+    def rendered(self):
+        return self._image is not None
+
+    @property
+    def image(self):
+        """The annotated frame, rendered on the first call"""
+        if self._image is None:
+            with self._lock:
+                if self._image is None:
+                    self._image = self._render()
+        return self._image
+
+    def _render(self):
+        buffer = self._buffer
+        if buffer is None or buffer.shape != self.frame.shape or buffer.dtype != self.frame.dtype:
+            buffer = np.empty_like(self.frame)
+        np.copyto(buffer, self.frame)
+        if self.detections is not None:
+            self.detections.plot(buffer, copy=False)
+        for text, org, color, scale, thickness in self.hud:
+            cv2.putText(buffer, text, org, HUD_FONT, scale, color, thickness)
+        return buffer
+
+
+class Annotator:
+    """Hands out LazyAnnotations backed by a small ring of reusable buffers"""
+
+    def __init__(self, buffers=3):
+        """
+        Args:
+            buffers: Ring size. A buffer is reused `buffers` annotations later,
+                     so consumers (e.g. a display thread) may hold on to an
+                     image for that many frames.
+        """
+        self.size = max(1, buffers)
+        self._ring = [None] * self.size
+        self._next = 0
+
+        # Stats
+        self.created = 0
+
+    def annotate(self, frame, detections=None):
+        """
+        Returns:
+            LazyAnnotation that renders into the next ring buffer
+        """
+        i = self._next
+        self._next = (i + 1) % self.size
+        buffer = self._ring[i]
+        if buffer is None or buffer.shape != frame.shape or buffer.dtype != frame.dtype:
+            buffer = np.empty_like(frame)
+            self._ring[i] = buffer
+        self.created += 1
+        return LazyAnnotation(frame, detections, buffer)
@@ -0,0 +1,269 @@
+"""
+Two-Stage Cascade Detector
+Stage 1: cheap heat / fire-colour prefilter proposes candidate regions
+         (ThermalSimulator.detect_heat_regions + detect_fire_by_brightness
+         on a half-resolution copy, a few milliseconds per 720p frame)
+Stage 2: YOLO runs ONLY on padded crops around those regions, all crops
+         of all frames batched into one call
+
+Frames with no candidates skip the model entirely, so patrolling over
+empty terrain costs almost nothing.
+
+Usage:
+    python cascade.py --source path/to/images_or_video --model fire.pt
+    (prints cascade vs full-frame agreement and per-frame cost)
+"""
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from detections import Detections, box_iou, nms
+from thermal_simulation import ThermalSimulator
+from live_camera_fire_test import detect_fire_by_brightness
+
+
+class CascadeDetector:
+    """Prefilter-gated, crop-based detection on top of an inference backend"""
+
+    def __init__(self, backend, heat_threshold=200, min_area=100, use_heat=True,
+                 use_color=True, pad=0.5, min_crop=96, crop_size=320, max_rois=8,
+                 prefilter_scale=0.5):
+        """
+        Args:
+            backend: InferenceBackend used for the crops
+            heat_threshold: Brightness threshold for heat regions (0-255)
+            min_area: Minimum candidate area in pixels
+            use_heat: Use ThermalSimulator.detect_heat_regions as a proposer
+            use_color: Use detect_fire_by_brightness as a proposer
+            pad: Padding around each candidate as a fraction of its size
+            min_crop: Minimum crop edge in pixels
+            crop_size: Model input size for crops
+            max_rois: Keep at most this many (largest) crops per frame
+            prefilter_scale: Run the prefilter on a frame downscaled by this factor
+        """
+        self.backend = backend
+        self.heat_threshold = heat_threshold
+        self.min_area = min_area
+        self.use_heat = use_heat
+        self.use_color = use_color
+        self.pad = pad
+        self.min_crop = min_crop
+        self.crop_size = crop_size
+        self.max_rois = max_rois
+        self.prefilter_scale = prefilter_scale
+        self.thermal_sim = ThermalSimulator()
+
+        # Stats
+        self.frames = 0
+        self.frames_with_rois = 0
+        self.crops = 0
+        self.prefilter_time = 0.0
+        self.model_time = 0.0
+
+    def propose(self, frame):
+        """
+        Stage 1: candidate regions
+
+        Returns:
+            (N, 4) int array of padded, merged crop boxes (x1, y1, x2, y2)
+        """
+        h, w = frame.shape[:2]
+        scale = self.prefilter_scale
+        small = frame
+        if scale != 1.0:
+            small = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        min_area = self.min_area * scale * scale
+
+        boxes = []
+        if self.use_heat:
+            _, contours = self.thermal_sim.detect_heat_regions(small, self.heat_threshold)
+            for cnt in contours:
+                if cv2.contourArea(cnt) > min_area:
+                    x, y, bw, bh = cv2.boundingRect(cnt)
+                    boxes.append((x, y, x + bw, y + bh))
+        if self.use_color:
+            boxes.extend(r['box'] for r in detect_fire_by_brightness(small, min_area))
+        if not boxes:
+            return np.zeros((0, 4), np.int32)
+
+        # Back to full resolution, pad every candidate (at least min_crop wide) and clip
+        b = np.asarray(boxes, np.float32) / scale
+        size = np.maximum(b[:, 2:] - b[:, :2], 1)
+        half = np.maximum(size * (1 + 2 * self.pad), self.min_crop) / 2
+        center = (b[:, :2] + b[:, 2:]) / 2
+        padded = np.concatenate([center - half, center + half], axis=1)
+        padded = np.clip(padded, 0, [w, h, w, h]).astype(np.int32)
+
+        # Merge overlapping crops: paint them on a mask, take outer contours
+        mask = np.zeros((h, w), np.uint8)
+        for x1, y1, x2, y2 in padded:
+            mask[y1:y2, x1:x2] = 255
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        rois = np.array([cv2.boundingRect(c) for c in contours], np.int32).reshape(-1, 4)
+        rois[:, 2:] += rois[:, :2]
+
+        # Largest regions first
+        areas = (rois[:, 2] - rois[:, 0]) * (rois[:, 3] - rois[:, 1])
+        return rois[np.argsort(-areas)[:self.max_rois]]
+
+    def detect_batch(self, frames, conf=0.25, iou=0.7):
+        """
+        Run the cascade on several frames; all crops go through one model call
+
+        Returns:
+            list of Detections in full-frame coordinates
+        """
+        start = time.time()
+        frame_rois = [self.propose(f) for f in frames]
+        self.prefilter_time += time.time() - start
+
+        crops = [f[y1:y2, x1:x2] for f, rois in zip(frames, frame_rois) for x1, y1, x2, y2 in rois]
+        self.frames += len(frames)
+        self.frames_with_rois += sum(1 for r in frame_rois if len(r))
+        self.crops += len(crops)
+
+        names = self.backend.names
+        if not crops:
+            return [Detections(names=names) for _ in frames]
+
+        start = time.time()
+        predictions = self.backend.predict(crops, conf=conf, iou=iou, imgsz=self.crop_size)
+        self.model_time += time.time() - start
+
+        results = []
+        k = 0
+        for rois in frame_rois:
+            dets = predictions[k:k + len(rois)]
+            k += len(rois)
+            if not rois.size or not sum(len(d) for d in dets):
+                results.append(Detections(names=names))
+                continue
+            shift = np.repeat(np.tile(rois[:, :2], (1, 2)), [len(d) for d in dets], axis=0)
+            xyxy = np.concatenate([d.xyxy for d in dets]) + shift
+            scores = np.concatenate([d.conf for d in dets])
+            cls = np.concatenate([d.cls for d in dets])
+            # Crops may overlap after clipping, dedupe across them (unless raw)
+            keep = nms(xyxy, scores, iou, cls=cls) if iou is not None else np.argsort(-scores)
+            results.append(Detections(xyxy[keep], scores[keep], cls[keep], names))
+        return results
+
+    def detect(self, frame, conf=0.25, iou=0.7):
+        return self.detect_batch([frame], conf, iou)[0]
+
+    def stats(self):
+        frames = max(1, self.frames)
+        return {
+            'frames': self.frames,
+            'model_skipped_pct': round(100 * (self.frames - self.frames_with_rois) / frames, 1),
+            'avg_crops': round(self.crops / frames, 2),
+            'avg_prefilter_ms': round(1000 * self.prefilter_time / frames, 2),
+            'avg_model_ms': round(1000 * self.model_time / frames, 2),
+        }
+
+
+def compare_with_full_frame(cascade, frames, conf=0.25, match_iou=0.5):
+    """
+    Run cascade and full-frame inference on the same frames
+
+    Full-frame detections are treated as the reference: recall is the
+    fraction of them the cascade also found (IoU >= match_iou), precision
+    the fraction of cascade boxes that match a full-frame box.
+
+    Returns:
+        dict report
+    """
+    matched_ref = total_ref = matched_cascade = total_cascade = 0
+    full_time = cascade_time = 0.0
+    empty_full_time = empty_cascade_time = 0.0
+    empty_frames = 0
+
+    for frame in frames:
+        start = time.time()
+        full = cascade.backend.predict([frame], conf=conf)[0]
+        t_full = time.time() - start
+
+        start = time.time()
+        cas = cascade.detect(frame, conf=conf)
+        t_cascade = time.time() - start
+
+        full_time += t_full
+        cascade_time += t_cascade
+        if len(full) == 0:
+            empty_frames += 1
+            empty_full_time += t_full
+            empty_cascade_time += t_cascade
+
+        total_ref += len(full)
+        total_cascade += len(cas)
+        if len(full) and len(cas):
+            iou = box_iou(full.xyxy, cas.xyxy)
+            matched_ref += int((iou.max(1) >= match_iou).sum())
+            matched_cascade += int((iou.max(0) >= match_iou).sum())
+
+    n = max(1, len(frames))
+    return {
+        'frames': len(frames),
+        'recall_vs_full': round(matched_ref / total_ref, 3) if total_ref else None,
+        'precision_vs_full': round(matched_cascade / total_cascade, 3) if total_cascade else None,
+        'avg_full_ms': round(1000 * full_time / n, 2),
+        'avg_cascade_ms': round(1000 * cascade_time / n, 2),
+        'empty_frames': empty_frames,
+        'avg_full_ms_empty': round(1000 * empty_full_time / max(1, empty_frames), 2),
+        'avg_cascade_ms_empty': round(1000 * empty_cascade_time / max(1, empty_frames), 2),
+        'cascade': cascade.stats(),
+    }
+
+
+def _load_frames(source, limit):
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, "*.jpg")) + glob.glob(os.path.join(source, "*.png")))
+        return [f for f in (cv2.imread(p) for p in paths[:limit]) if f is not None]
+    cap = cv2.VideoCapture(source)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def main():
+    from inference_backends import load_backend, BACKENDS
+
+    parser = argparse.ArgumentParser(description="Cascade vs full-frame fire detection report")
+    parser.add_argument("--source", type=str, required=True, help="Image folder or video file")
+    parser.add_argument("--model", type=str, required=True, help="Model path (.pt or .onnx)")
+    parser.add_argument("--backend", choices=BACKENDS, default='auto', help="Inference runtime")
+    parser.add_argument("--confidence", type=float, default=0.25, help="Detection confidence threshold")
+    parser.add_argument("--limit", type=int, default=200, help="Max frames to evaluate")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🔥 CASCADE vs FULL-FRAME REPORT")
+    print("=" * 60)
+
+    frames = _load_frames(args.source, args.limit)
+    if not frames:
+        print(f"❌ No frames found in {args.source}")
+        return
+
+    cascade = CascadeDetector(load_backend(args.model, args.backend))
+    report = compare_with_full_frame(cascade, frames, conf=args.confidence)
+
+    print(f"\n📊 Frames: {report['frames']} ({report['empty_frames']} without full-frame detections)")
+    print(f"   Recall vs full-frame:    {report['recall_vs_full']}")
+    print(f"   Precision vs full-frame: {report['precision_vs_full']}")
+    print(f"   Avg cost full-frame: {report['avg_full_ms']} ms | cascade: {report['avg_cascade_ms']} ms")
+    print(f"   On empty frames:     {report['avg_full_ms_empty']} ms | cascade: {report['avg_cascade_ms_empty']} ms")
+    print(f"   Model skipped on {report['cascade']['model_skipped_pct']}% of frames, "
+          f"{report['cascade']['avg_crops']} crops/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Change Gate - skip inference on near-identical frames
+Compares a tiny grayscale thumbnail of each frame against the last frame
+that was actually run through the model. If (almost) nothing changed the
+previous detections are reused and the model is skipped.
+
+Cost: one resize to ~64x36 + one absdiff, well under a millisecond.
+
+Usage:
+    gate = ChangeGate(change_ratio=0.01)
+    if gate.should_infer(frame):
+        detections = model.predict([frame])[0]
+    else:
+        detections = last_detections
+"""
+import cv2
+import numpy as np
+
+
+class ChangeGate:
+    """Decides per frame whether to re-run the model or reuse the last result"""
+
+    def __init__(self, size=(64, 36), pixel_delta=15, change_ratio=0.01, max_skip=30):
+        """
+        Args:
+            size: (width, height) of the comparison thumbnail
+            pixel_delta: Gray-level difference for a thumbnail pixel to count as changed
+            change_ratio: Fraction of changed pixels that triggers inference
+            max_skip: Force inference after this many consecutive skips (0 = never)
+        """
+        self.size = size
+        self.pixel_delta = pixel_delta
+        self.change_ratio = change_ratio
+        self.max_skip = max_skip
+
+        # Preallocated thumbnails (width x height -> rows = height)
+        self._gray = None
+        self._small = np.empty((size[1], size[0]), np.uint8)
+        self._reference = np.empty_like(self._small)
+        self._diff = np.empty_like(self._small)
+        self._has_reference = False
+        self._skip_run = 0
+
+        # Stats
+        self.inferred = 0
+        self.skipped = 0
+        self.last_change = 1.0
+
+    def should_infer(self, frame):
+        """
+        Check a frame against the reference
+
+        When this returns True the frame becomes the new reference, so call
+        it exactly once per frame and run the model whenever it says so.
+
+        Args:
+            frame: BGR (or grayscale) image
+
+        Returns:
+            True if the model should run on this frame
+        """
+        if frame.ndim == 3:
+            if self._gray is None or self._gray.shape != frame.shape[:2]:
+                self._gray = np.empty(frame.shape[:2], np.uint8)
+            cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray)
+            gray = self._gray
+        else:
+            gray = frame
+        cv2.resize(gray, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+
+        if not self._has_reference:
+            infer = True
+            self.last_change = 1.0
+        else:
+            cv2.absdiff(self._small, self._reference, dst=self._diff)
+            self.last_change = np.count_nonzero(self._diff > self.pixel_delta) / self._diff.size
+            infer = bool(self.last_change >= self.change_ratio)
+            if self.max_skip and self._skip_run >= self.max_skip:
+                infer = True
+
+        if infer:
+            self._reference[...] = self._small
+            self._has_reference = True
+            self._skip_run = 0
+            self.inferred += 1
+        else:
+            self._skip_run += 1
+            self.skipped += 1
+        return infer
+
+    def reset(self):
+        """Force inference on the next frame (e.g. after a mode change)"""
+        self._has_reference = False
+
+    def stats(self):
+        total = self.inferred + self.skipped
+        return {
+            'inferred': self.inferred,
+            'skipped': self.skipped,
+            'skip_pct': round(100 * self.skipped / total, 1) if total else 0.0,
+        }
@@ -0,0 +1,232 @@
+"""
+Deadline Scheduler with Graceful Degradation
+Gives every frame a deadline (capture → telemetry sent). When too many
+frames miss it, the drone sheds work one step at a time instead of just
+getting slower:
+
+    NORMAL          everything on
+    NO_ANNOTATION   no annotated dashboard / display frames
+    LOW_RES         + model runs at a small input size
+    PREFILTER_ONLY  + no model, brightness / heat prefilter only
+    REDUCED_FPS     + only every Nth frame is processed
+
+Each level keeps the savings of the levels above it. Telemetry (and so
+fire alerts) is sent in every mode. When frames comfortably meet the
+deadline again the scheduler steps back up; if a recovery immediately
+misses again, the next recovery waits twice as long, so an overloaded Pi
+does not flip-flop between modes.
+
+Usage:
+    scheduler = DeadlineScheduler(deadline_ms=250)
+    if scheduler.admit():
+        ...                                      # run the frame
+        scheduler.update((time.time() - t_capture) * 1000)
+    telemetry["mode"] = scheduler.mode_name
+"""
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from detections import Detections, nms
+from live_camera_fire_test import detect_fire_by_brightness
+from thermal_simulation import ThermalSimulator
+
+NORMAL = 0
+NO_ANNOTATION = 1
+LOW_RES = 2
+PREFILTER_ONLY = 3
+REDUCED_FPS = 4
+
+MODE_NAMES = ['NORMAL', 'NO_ANNOTATION', 'LOW_RES', 'PREFILTER_ONLY', 'REDUCED_FPS']
+
+
+class DeadlineScheduler:
+    """Steps through the degradation ladder based on per-frame deadline misses"""
+
+    def __init__(self, deadline_ms=250, window=20, miss_ratio=0.25, headroom=0.6,
+                 recover_after=50, max_recover_after=800, fps_divisor=2, verbose=True):
+        """
+        Args:
+            deadline_ms: Per-frame deadline in milliseconds
+            window: Frames judged before a decision (misses are counted over these)
+            miss_ratio: Degrade when at least this fraction of the window missed
+            headroom: Recover only if the smoothed latency is below deadline * headroom
+            recover_after: Frames without misses before stepping back up
+            max_recover_after: Upper bound for the doubled recovery wait
+            fps_divisor: In REDUCED_FPS process 1 of every N frames
+            verbose: Print every mode change
+        """
+        self.deadline_ms = deadline_ms
+        self.window = window
+        self.miss_ratio = miss_ratio
+        self.headroom = headroom
+        self.base_recover_after = recover_after
+        self.recover_after = recover_after
+        self.max_recover_after = max_recover_after
+        self.fps_divisor = max(1, fps_divisor)
+        self.verbose = verbose
+
+        self.mode = NORMAL
+        self.latency_ms = None
+        self.frames_in_mode = 0
+        self.decisions = []
+        self._misses = deque(maxlen=window)
+        self._admit_count = 0
+        self._last_step_up = False
+        self._mode_since = time.time()
+        self._time_in_mode = [0.0] * len(MODE_NAMES)
+
+        # Stats
+        self.frames = 0
+        self.missed = 0
+        self.shed = 0
+
+    @property
+    def mode_name(self):
+        return MODE_NAMES[self.mode]
+
+    @property
+    def annotate(self):
+        """Render annotated frames"""
+        return self.mode < NO_ANNOTATION
+
+    @property
+    def low_res(self):
+        """Run the model at a small input size"""
+        return self.mode >= LOW_RES
+
+    @property
+    def prefilter_only(self):
+        """Skip the model, use the cheap prefilter"""
+        return self.mode >= PREFILTER_ONLY
+
+    def admit(self):
+        """
+        Whether the next frame should be processed at all
+
+        Only REDUCED_FPS turns frames away (1 of every fps_divisor is kept).
+        """
+        self._admit_count += 1
+        if self.mode >= REDUCED_FPS and self._admit_count % self.fps_divisor:
+            self.shed += 1
+            return False
+        return True
+
+    def update(self, latency_ms):
+        """
+        Feed the end-to-end latency of a processed frame
+
+        Returns:
+            The mode for the next frame
+        """
+        missed = latency_ms > self.deadline_ms
+        self.frames += 1
+        self.missed += missed
+        self._misses.append(missed)
+        self.frames_in_mode += 1
+        self.latency_ms = latency_ms if self.latency_ms is None else 0.8 * self.latency_ms + 0.2 * latency_ms
+
+        if len(self._misses) < self.window:
+            return self.mode
+
+        misses = sum(self._misses)
+        if misses >= self.miss_ratio * self.window and self.mode < REDUCED_FPS:
+            # Missing again right after a recovery: wait longer before the next one
+            if self._last_step_up and self.frames_in_mode < self.recover_after + self.window:
+                self.recover_after = min(2 * self.recover_after, self.max_recover_after)
+            self._change(self.mode + 1, f"{misses}/{self.window} frames over deadline")
+        elif (self.mode > NORMAL and misses == 0 and self.frames_in_mode >= self.recover_after
+              and self.latency_ms < self.deadline_ms * self.headroom):
+            self._change(self.mode - 1, "deadline met with headroom")
+        elif self._last_step_up and self.frames_in_mode >= self.recover_after + self.window:
+            # The last recovery held: forget the backoff
+            self.recover_after = self.base_recover_after
+            self._last_step_up = False
+        return self.mode
+
+    def _change(self, mode, reason):
+        now = time.time()
+        self._time_in_mode[self.mode] += now - self._mode_since
+        self._mode_since = now
+        old = self.mode
+        self.mode = mode
+        self._last_step_up = mode < old
+        self.frames_in_mode = 0
+        self._misses.clear()
+        decision = {
+            'time': now,
+            'from': MODE_NAMES[old],
+            'to': MODE_NAMES[mode],
+            'latency_ms': round(self.latency_ms, 1),
+            'deadline_ms': self.deadline_ms,
+            'reason': reason,
+        }
+        self.decisions.append(decision)
+        if self.verbose:
+            arrow = "⬇️" if mode > old else "⬆️"
+            print(f"{arrow} mode {MODE_NAMES[old]} → {MODE_NAMES[mode]} "
+                  f"({reason}, ~{self.latency_ms:.0f}ms vs deadline {self.deadline_ms:.0f}ms)")
+
+    def stats(self):
+        time_in_mode = list(self._time_in_mode)
+        time_in_mode[self.mode] += time.time() - self._mode_since
+        return {
+            'mode': self.mode_name,
+            'frames': self.frames,
+            'missed': self.missed,
+            'miss_pct': round(100 * self.missed / self.frames, 1) if self.frames else 0.0,
+            'shed': self.shed,
+            'changes': len(self.decisions),
+            'time_in_mode': {name: round(t, 1) for name, t in zip(MODE_NAMES, time_in_mode) if t > 0},
+        }
+
+
+_thermal_sim = None
+
+
+def prefilter_detections(frame, names=None, thermal=False, scale=0.5, min_area=100, heat_threshold=200):
+    """
+    Model-free fire candidates for PREFILTER_ONLY mode
+
+    Fire-coloured bright regions (detect_fire_by_brightness) on a downscaled
+    copy, plus hot regions (ThermalSimulator.detect_heat_regions) when the
+    frame is thermal imagery. Confidence is the heuristic's own score;
+    regions found by both are merged by NMS.
+
+    Args:
+        frame: BGR image
+        names: Class names for the returned Detections (class 0 is used)
+        thermal: Frame is (simulated) thermal imagery
+        scale: Downscale factor for the prefilter
+        min_area: Minimum region area in full-resolution pixels
+        heat_threshold: Brightness threshold for heat regions (0-255)
+
+    Returns:
+        Detections in full-frame coordinates
+    """
+    global _thermal_sim
+    h, w = frame.shape[:2]
+    small = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+    min_area = min_area * scale * scale
+
+    boxes, conf = [], []
+    for region in detect_fire_by_brightness(small, min_area):
+        boxes.append(region['box'])
+        conf.append(region['confidence'])
+    if thermal:
+        if _thermal_sim is None:
+            _thermal_sim = ThermalSimulator()
+        _, contours = _thermal_sim.detect_heat_regions(small, heat_threshold)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        for cnt in contours:
+            if cv2.contourArea(cnt) > min_area:
+                x, y, bw, bh = cv2.boundingRect(cnt)
+                boxes.append((x, y, x + bw, y + bh))
+                conf.append(float(gray[y:y + bh, x:x + bw].mean()) / 255)
+
+    xyxy = np.asarray(boxes, np.float32).reshape(-1, 4) / scale
+    conf = np.asarray(conf, np.float32)
+    keep = nms(xyxy, conf, 0.5)
+    return Detections(xyxy[keep], conf[keep], np.zeros(len(keep), np.int32), names or {0: 'fire'})
@@ -0,0 +1,167 @@
+"""
+Backend-independent detection results
+
+A small NumPy container with the same fields as ultralytics `Boxes`
+(xyxy, conf, cls) so results can be pickled between processes, cached,
+filtered and drawn without depending on which model runtime produced them.
+"""
+import cv2
+import numpy as np
+
+# Colors (BGR format)
+BOX_COLOR = (0, 0, 255)
+TEXT_COLOR = (255, 255, 255)
+
+# Raw predictions: keep (almost) everything the model outputs, before NMS,
+# so any threshold / class filter / NMS IoU can be applied afterwards
+RAW_CONF = 0.001
+RAW_MAX_DET = 1000
+
+
+class Detections:
+    """Detection boxes for one frame"""
+
+    def __init__(self, xyxy=None, conf=None, cls=None, names=None, ids=None):
+        """
+        Args:
+            xyxy: (N, 4) boxes in pixel coordinates
+            conf: (N,) confidence scores
+            cls: (N,) class ids
+            names: dict of class id -> class name
+            ids: (N,) track ids (None if not tracked)
+        """
+        self.xyxy = np.zeros((0, 4), np.float32) if xyxy is None else np.asarray(xyxy, np.float32).reshape(-1, 4)
+        self.conf = np.zeros(len(self.xyxy), np.float32) if conf is None else np.asarray(conf, np.float32).reshape(-1)
+        self.cls = np.zeros(len(self.xyxy), np.int32) if cls is None else np.asarray(cls, np.int32).reshape(-1)
+        self.names = names or {}
+        self.ids = None if ids is None else np.asarray(ids, np.int64).reshape(-1)
+
+    @classmethod
+    def from_ultralytics(cls, result):
+        """Convert one ultralytics `Results` object"""
+        boxes = result.boxes
+        return cls(
+            xyxy=boxes.xyxy.cpu().numpy(),
+            conf=boxes.conf.cpu().numpy(),
+            cls=boxes.cls.cpu().numpy(),
+            names=dict(result.names),
+        )
+
+    def __len__(self):
+        return len(self.xyxy)
+
+    def __getitem__(self, index):
+        """Select a subset (boolean mask, index array or slice)"""
+        ids = None if self.ids is None else self.ids[index]
+        return Detections(self.xyxy[index], self.conf[index], self.cls[index], self.names, ids)
+
+    def __repr__(self):
+        return f"Detections(n={len(self)}, max_conf={self.max_conf():.2f})"
+
+    def filter(self, conf=0.25, iou=None, classes=None, max_det=300):
+        """
+        Apply thresholds to raw predictions (see RAW_CONF) without re-running the model
+
+        Args:
+            conf: Minimum confidence
+            iou: NMS IoU threshold (None = no NMS)
+            classes: Keep only these class ids (None = all)
+            max_det: Maximum boxes to keep
+
+        Returns:
+            Detections, highest confidence first
+        """
+        mask = self.conf >= conf
+        if classes is not None:
+            mask &= np.isin(self.cls, classes)
+        out = self[mask]
+        if iou is not None:
+            keep = nms(out.xyxy, out.conf, iou, cls=out.cls, max_det=max_det)
+        else:
+            keep = np.argsort(-out.conf, kind='stable')[:max_det]
+        return out[keep]
+
+    def max_conf(self):
+        return float(self.conf.max()) if len(self) else 0.0
+
+    def plot(self, frame, copy=True):
+        """
+        Draw boxes with class labels
+
+        Args:
+            frame: BGR image
+            copy: Draw on a copy (True) or in place (False)
+
+        Returns:
+            Annotated frame
+        """
+        out = frame.copy() if copy else frame
+        ids = self.ids if self.ids is not None else [None] * len(self)
+        for (x1, y1, x2, y2), conf, cls_id, track_id in zip(self.xyxy.astype(int), self.conf, self.cls, ids):
+            label = f"{self.names.get(int(cls_id), int(cls_id))} {conf:.2f}"
+            if track_id is not None:
+                label = f"#{track_id} {label}"
+            cv2.rectangle(out, (x1, y1), (x2, y2), BOX_COLOR, 2)
+            (text_w, text_h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+            cv2.rectangle(out, (x1, y1 - text_h - 6), (x1 + text_w + 4, y1), BOX_COLOR, -1)
+            cv2.putText(out, label, (x1 + 2, y1 - 4), cv2.FONT_HERSHEY_SIMPLEX, 0.5, TEXT_COLOR, 1)
+        return out
+
+
+def box_iou(a, b):
+    """
+    Pairwise IoU between two sets of xyxy boxes
+
+    Args:
+        a: (N, 4) boxes
+        b: (M, 4) boxes
+
+    Returns:
+        (N, M) IoU matrix
+    """
+    a = np.asarray(a, np.float32).reshape(-1, 4)
+    b = np.asarray(b, np.float32).reshape(-1, 4)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    wh = np.clip(rb - lt, 0, None)
+    inter = wh[..., 0] * wh[..., 1]
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def nms(xyxy, scores, iou_thres=0.7, cls=None, max_det=300):
+    """
+    Non-maximum suppression (class-aware if cls is given)
+
+    Each step suppresses all remaining overlaps of the best box in one
+    vectorized IoU computation.
+
+    Returns:
+        Indices of kept boxes, highest score first
+    """
+    xyxy = np.asarray(xyxy, np.float32).reshape(-1, 4)
+    if len(xyxy) == 0:
+        return np.zeros(0, np.int64)
+
+    if cls is not None:
+        # Shift each class into its own coordinate range so boxes of
+        # different classes never overlap
+        xyxy = xyxy + (np.asarray(cls, np.float32) * 7680.0)[:, None]
+
+    x1, y1, x2, y2 = xyxy.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = np.argsort(-np.asarray(scores))
+
+    keep = []
+    while order.size and len(keep) < max_det:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+        order = rest[iou <= iou_thres]
+    return np.asarray(keep, np.int64)
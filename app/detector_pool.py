@@ -0,0 +1,514 @@
+"""
+Multi-Camera Detector Pool
+Serves several frame sources (webcams, video files, P2Pro thermal
+cameras) from ONE process instead of one detector script per camera.
+
+    source threads ──► per-source LatestQueue ──► scheduler ──► N model workers
+                       (latest frame wins)        round_robin     (one UnifiedFireDetector
+                                                  or priority      each, batched calls)
+
+Each worker takes up to `max_batch` ready frames (one per source) and runs
+them through UnifiedFireDetector.detect_batch in a single model call.
+Sources are spread over the workers (source i -> worker i % N) so that
+per-source detector state (tracks, tile buffers) always lives in one place;
+every source is its own detector stream.
+
+Scheduling:
+    round_robin - least recently served source first
+    priority    - highest priority first, round robin among equals
+                  (with max_batch >= number of sources nobody starves)
+
+Usage:
+    python detector_pool.py --source webcam:0 --source video:patrol.mp4 --source p2pro
+    python detector_pool.py --source front=webcam:0 --source rear=webcam:1 \\
+        --priority front=2 --schedule priority --workers 2 --mode dual
+    python detector_pool.py --source p2pro --hotspot_gate   # model only on radiometric hot spots
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from pipeline import LatestQueue
+
+P2PRO_VIEWER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "P2Pro-Viewer")
+
+SCHEDULES = ['round_robin', 'priority']
+
+
+class FrameSource:
+    """A named stream of BGR frames, read on its own thread by the pool"""
+
+    def __init__(self, name):
+        self.name = name
+        self.finished = False
+
+    def open(self):
+        pass
+
+    def read(self):
+        """Next BGR frame, or None if none is available right now"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class CaptureSource(FrameSource):
+    """Webcam index, video file or stream URL through cv2.VideoCapture"""
+
+    def __init__(self, name, target, loop=True, realtime=True, reopen_after=10):
+        """
+        Args:
+            target: Camera index or file path / URL
+            loop: Restart video files at the end
+            realtime: Pace video files at their native FPS
+            reopen_after: Consecutive failed reads before a camera / stream is reopened
+        """
+        super().__init__(name)
+        self.target = target
+        self.is_file = isinstance(target, str) and os.path.isfile(target)
+        self.loop = loop
+        self.realtime = realtime
+        self.reopen_after = reopen_after
+        self.cap = None
+        self.failures = 0      # consecutive failed reads
+        self.reopens = 0
+        self._interval = 0.0
+        self._next_time = 0.0
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.target)
+        if not self.cap.isOpened():
+            raise ConnectionError(f"Could not open {self.target}")
+        if self.is_file and self.realtime:
+            fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+            self._interval = 1.0 / fps
+
+    def read(self):
+        if self._interval:
+            delay = self._next_time - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_time = max(self._next_time + self._interval, time.time())
+
+        ret, frame = self.cap.read()
+        if ret:
+            self.failures = 0
+            return frame
+
+        self.failures += 1
+        if self.is_file:
+            if self.loop:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            else:
+                self.finished = True
+        elif self.failures % self.reopen_after == 0:
+            # Unplugged webcam / dropped stream: start over instead of reading a dead handle
+            print(f"⚠️ Source '{self.name}' stopped delivering frames, reopening")
+            self.cap.release()
+            self.cap = cv2.VideoCapture(self.target)
+            self.reopens += 1
+        if self.failures > 1:
+            # Back off instead of spinning on a source that keeps failing (10ms .. 1s)
+            time.sleep(min(0.01 * 2 ** (self.failures - 2), 1.0))
+        return None
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+
+
+class P2ProSource(FrameSource):
+    """InfiRay P2 Pro thermal camera (pseudo-colour image) via P2Pro-Viewer"""
+
+    def __init__(self, name, camera_id=-1, hotspot_gate=False):
+        """
+        Args:
+            camera_id: Capture index / device path (-1 = auto-detect)
+            hotspot_gate: Only pass frames on to the model when the radiometric
+                          hot spot detector finds something
+        """
+        super().__init__(name)
+        self.camera_id = camera_id
+        self.hotspot_gate = hotspot_gate
+        self.video = None
+        self.frames = None
+        self.hotspot = None
+        self.hotspots = None
+        self.gated = 0
+        self.overwritten = 0
+        self._is_current = None
+
+    def open(self):
+        if P2PRO_VIEWER_DIR not in sys.path:
+            sys.path.insert(0, P2PRO_VIEWER_DIR)
+        import P2Pro.video
+        from P2Pro.frame_ring import FrameRing
+
+        self._is_current = FrameRing.is_current
+        if self.hotspot_gate:
+            from P2Pro.hotspot import HotspotDetector
+            self.hotspot = HotspotDetector()
+        self.video = P2Pro.video.Video()
+        self.frames = self.video.frames.subscribe(self.name)
+        threading.Thread(target=self.video.open, args=(self.camera_id,),
+                         name=f"p2pro-{self.name}", daemon=True).start()
+
+    def read(self):
+        frame = self.frames.get(1.0)
+        if frame is None:
+            return None
+        # The frame is a ring slot the capture thread reuses; whatever we read from it
+        # only counts if the slot still holds the same frame afterwards (frame_num is -1
+        # from the moment the capture thread starts rewriting it)
+        frame_num = frame['frame_num']
+        if not self._is_current(frame, frame_num):
+            self.overwritten += 1
+            return None
+        if self.hotspot is not None:
+            # Radiometric gate on the raw temperatures, well under 1ms per frame
+            hotspots = self.hotspot.detect(frame['thermal_data'])
+            if not self._is_current(frame, frame_num):
+                self.overwritten += 1
+                return None
+            self.hotspots = hotspots
+            if not hotspots['hot']:
+                self.gated += 1
+                return None
+        bgr = cv2.cvtColor(frame['rgb_data'], cv2.COLOR_RGB2BGR)
+        if not self._is_current(frame, frame_num):
+            self.overwritten += 1
+            return None
+        return bgr
+
+    def close(self):
+        if self.frames is not None:
+            self.frames.close()
+        if self.video is not None:
+            self.video.stop()
+
+
+def parse_source(spec):
+    """
+    Build a source from '[name=]kind[:arg]'
+
+        webcam:0, 0               -> CaptureSource(0)
+        video:path.mp4, path.mp4  -> CaptureSource(path, loop=True)
+        p2pro, p2pro:/dev/video2  -> P2ProSource
+    """
+    name = spec
+    if '=' in spec and not any(c in spec.split('=', 1)[0] for c in ':/\\'):
+        name, spec = spec.split('=', 1)
+    kind, _, arg = spec.partition(':')
+    if kind == 'webcam':
+        return CaptureSource(name, int(arg or 0))
+    if kind == 'video':
+        return CaptureSource(name, arg)
+    if kind == 'p2pro':
+        camera_id = int(arg) if arg.isdigit() else (arg or -1)
+        return P2ProSource(name, camera_id)
+    if spec.isdigit():
+        return CaptureSource(name, int(spec))
+    return CaptureSource(name, spec)
+
+
+class SourceState:
+    """Queue, scheduling and stats of one source inside the pool"""
+
+    def __init__(self, source, priority=0, worker=0, maxsize=1):
+        self.source = source
+        self.name = source.name
+        self.priority = priority
+        self.worker = worker
+        self.queue = LatestQueue(maxsize)
+        self.thread = None
+        self.last_served = -1
+
+        # Stats
+        self.captured = 0
+        self.processed = 0
+        self.errors = 0
+        self.interval = 0.0    # smoothed seconds between results
+        self.latency_ms = 0.0
+        self.detections = 0
+        self._last_output = None
+
+        # Latest (packet, results, display image or None) for display
+        self.latest = None
+
+    def record(self, packet, results, now, display=None):
+        """Update stats with a finished frame"""
+        self.processed += 1
+        latency = (now - packet['t_capture']) * 1000
+        self.latency_ms = latency if self.latency_ms == 0 else 0.9 * self.latency_ms + 0.1 * latency
+        if self._last_output is not None:
+            dt = now - self._last_output
+            self.interval = dt if self.interval == 0 else 0.9 * self.interval + 0.1 * dt
+        self._last_output = now
+        self.detections = sum(r['count'] for r in results.values() if isinstance(r, dict) and 'count' in r)
+        self.latest = (packet, results, display)
+
+    @property
+    def fps(self):
+        return 1.0 / self.interval if self.interval > 0 else 0.0
+
+    def stats(self):
+        return {
+            'captured': self.captured,
+            'processed': self.processed,
+            'dropped': self.queue.dropped,
+            'errors': self.errors,
+            'fps': round(self.fps, 1),
+            'latency_ms': round(self.latency_ms, 1),
+            'detections': self.detections,
+            'priority': self.priority,
+            'worker': self.worker,
+            'gated': getattr(self.source, 'gated', 0),
+            'overwritten': getattr(self.source, 'overwritten', 0),
+        }
+
+
+class DetectorPool:
+    """Several frame sources, one process, N UnifiedFireDetector workers"""
+
+    def __init__(self, detector_factory, workers=1, schedule='round_robin', max_batch=None,
+                 on_result=None, render=False):
+        """
+        Args:
+            detector_factory: Callable returning a UnifiedFireDetector (called once per worker)
+            workers: Number of model workers (each loads its own model)
+            schedule: 'round_robin' or 'priority'
+            max_batch: Max frames per model call (default: number of sources)
+            on_result: Optional callback(source_name, packet, results) run on the worker thread
+            render: Draw each result's display image on its worker thread (the detector's
+                    annotation buffers are not shared across threads), see SourceState.latest
+        """
+        if schedule not in SCHEDULES:
+            raise ValueError(f"Unknown schedule '{schedule}' (choose from {SCHEDULES})")
+        self.detector_factory = detector_factory
+        self.num_workers = max(1, workers)
+        self.schedule = schedule
+        self.max_batch = max_batch
+        self.on_result = on_result
+        self.render = render
+
+        self.sources = {}
+        self.detectors = []
+        self._threads = []
+        self._ready = threading.Condition()
+        self._served = 0
+        self._stop_event = threading.Event()
+
+        # Worker stats
+        self.batches = 0
+        self.batched_frames = 0
+
+    def add_source(self, source, priority=0):
+        """Register a FrameSource (before start())"""
+        if source.name in self.sources:
+            raise ValueError(f"Duplicate source name '{source.name}'")
+        worker = len(self.sources) % self.num_workers
+        self.sources[source.name] = SourceState(source, priority, worker)
+        return self.sources[source.name]
+
+    def start(self):
+        # Load all models before any frame flows
+        self.detectors = [self.detector_factory() for _ in range(self.num_workers)]
+
+        for state in self.sources.values():
+            state.source.open()
+            state.thread = threading.Thread(target=self._capture, args=(state,),
+                                            name=f"source-{state.name}", daemon=True)
+            self._threads.append(state.thread)
+        for i, detector in enumerate(self.detectors):
+            self._threads.append(threading.Thread(target=self._work, args=(i, detector),
+                                                  name=f"worker-{i}", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        with self._ready:
+            self._ready.notify_all()
+        for state in self.sources.values():
+            state.queue.close()
+        for thread in self._threads:
+            thread.join(timeout)
+        for state in self.sources.values():
+            state.source.close()
+
+    def _capture(self, state):
+        while not self._stop_event.is_set() and not state.source.finished:
+            try:
+                frame = state.source.read()
+            except Exception as e:
+                state.errors += 1
+                print(f"⚠️ Source '{state.name}' failed: {e}")
+                time.sleep(0.5)
+                continue
+            if frame is None:
+                continue
+            state.captured += 1
+            state.queue.put({'frame': frame, 'frame_idx': state.captured, 't_capture': time.time()})
+            with self._ready:
+                self._ready.notify_all()
+
+    def _next_batch(self, worker):
+        """Pick up to max_batch of this worker's ready sources according to the schedule"""
+        with self._ready:
+            ready = [s for s in self.sources.values() if s.worker == worker and len(s.queue)]
+            if not ready:
+                self._ready.wait(0.1)
+                ready = [s for s in self.sources.values() if s.worker == worker and len(s.queue)]
+
+            if self.schedule == 'priority':
+                ready.sort(key=lambda s: (-s.priority, s.last_served))
+            else:
+                ready.sort(key=lambda s: s.last_served)
+
+            batch = []
+            for state in ready[:self.max_batch or len(ready)]:
+                packet = state.queue.get(timeout=0)
+                if packet is None:
+                    continue
+                state.last_served = self._served
+                self._served += 1
+                batch.append((state, packet))
+            return batch
+
+    def _work(self, worker, detector):
+        while not self._stop_event.is_set():
+            batch = self._next_batch(worker)
+            if not batch:
+                continue
+            try:
+                results = detector.detect_batch([p['frame'] for _, p in batch],
+                                                streams=[s.name for s, _ in batch])
+            except Exception as e:
+                for state, _ in batch:
+                    state.errors += 1
+                print(f"⚠️ Detection failed: {e}")
+                continue
+
+            now = time.time()
+            self.batches += 1
+            self.batched_frames += len(batch)
+            for (state, packet), result in zip(batch, results):
+                if detector.mode == 'dual':
+                    result = detector.fuse_results(result)
+                # copied, the detector reuses its annotation buffers a few frames later
+                display = detector.create_display(result, packet['frame']).copy() if self.render else None
+                state.record(packet, result, now, display)
+                if self.on_result is not None:
+                    self.on_result(state.name, packet, result)
+
+    def stats(self):
+        """Per-source stats keyed by source name"""
+        return {name: state.stats() for name, state in self.sources.items()}
+
+    def print_stats(self):
+        print("📊 Detector pool stats:")
+        for name, s in self.stats().items():
+            gated = f" gated={s['gated']}" if s['gated'] else ""
+            gated += f" overwritten={s['overwritten']}" if s['overwritten'] else ""
+            print(f"   {name:<12} fps={s['fps']:<5} latency={s['latency_ms']:<7}ms "
+                  f"processed={s['processed']:<6} dropped={s['dropped']:<5} detections={s['detections']}{gated}")
+        if self.batches:
+            print(f"   avg batch: {self.batched_frames / self.batches:.2f} frames/model call")
+
+
+def _grid(images, height=360, columns=3):
+    """Tile display frames into one image (all scaled to the same height)"""
+    resized = [cv2.resize(img, (int(img.shape[1] * height / img.shape[0]), height)) for img in images]
+    width = max(img.shape[1] for img in resized)
+    columns = min(columns, len(resized))
+    cells = [np.pad(img, ((0, 0), (0, width - img.shape[1]), (0, 0))) for img in resized]
+    cells += [np.zeros((height, width, 3), np.uint8)] * (-len(cells) % columns)
+    rows = [np.hstack(cells[i:i + columns]) for i in range(0, len(cells), columns)]
+    return np.vstack(rows)
+
+
+def main():
+    from fire_detector_unified import UnifiedFireDetector
+    from inference_backends import BACKENDS
+
+    parser = argparse.ArgumentParser(description="Fire detection on several cameras from one process")
+    parser.add_argument("--source", action="append", required=True,
+                        help="[name=]webcam:N | video:path | p2pro[:id] (repeat for more sources)")
+    parser.add_argument("--priority", action="append", default=[],
+                        help="name=N, higher is served first with --schedule priority")
+    parser.add_argument("--schedule", choices=SCHEDULES, default='round_robin', help="Source scheduling")
+    parser.add_argument("--workers", type=int, default=1, help="Model workers (each loads the model once)")
+    parser.add_argument("--max_batch", type=int, default=None, help="Max frames per model call")
+    parser.add_argument("--mode", choices=['rgb', 'thermal', 'dual'], default='rgb', help="Detection mode")
+    parser.add_argument("--model", type=str, default=None, help="Path to YOLO model (.pt or .onnx)")
+    parser.add_argument("--backend", choices=BACKENDS, default='auto', help="Inference runtime")
+    parser.add_argument("--threads", type=int, default=0, help="ONNX Runtime intra-op threads (0 = default)")
+    parser.add_argument("--confidence", type=float, default=0.25, help="Detection confidence threshold")
+    parser.add_argument("--hotspot_gate", action="store_true",
+                        help="P2Pro sources: run the model only on frames with radiometric hot spots")
+    parser.add_argument("--headless", action="store_true", help="No window, print stats only")
+    parser.add_argument("--stats_interval", type=float, default=5.0, help="Seconds between stats prints")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("🎥 MULTI-CAMERA DETECTOR POOL")
+    print("=" * 70)
+
+    priorities = {}
+    for item in args.priority:
+        name, _, value = item.partition('=')
+        priorities[name] = int(value)
+
+    pool = DetectorPool(
+        lambda: UnifiedFireDetector(model_path=args.model, mode=args.mode, confidence=args.confidence,
+                                    backend=args.backend, threads=args.threads),
+        workers=args.workers, schedule=args.schedule, max_batch=args.max_batch, render=not args.headless)
+    for spec in args.source:
+        source = parse_source(spec)
+        if isinstance(source, P2ProSource):
+            source.hotspot_gate = args.hotspot_gate
+        pool.add_source(source, priorities.get(source.name, 0))
+        print(f"📷 {source.name} ({type(source).__name__}, priority {priorities.get(source.name, 0)})")
+
+    pool.start()
+    print(f"✅ {len(pool.sources)} sources, {args.workers} worker(s), {args.schedule} scheduling. "
+          f"{'Ctrl+C' if args.headless else 'Q'} to quit.")
+
+    shown = {}
+    last_stats = time.time()
+    try:
+        while True:
+            if args.headless:
+                time.sleep(0.1)
+            else:
+                # Each source's newest result, rendered by the worker that produced it
+                for name, state in pool.sources.items():
+                    latest = state.latest
+                    if latest is not None and shown.get(name, (None,))[0] is not latest:
+                        shown[name] = (latest, latest[2])
+                if shown:
+                    cv2.imshow("Detector Pool - Press Q to quit", _grid([img for _, img in shown.values()]))
+                if cv2.waitKey(10) & 0xFF == ord('q'):
+                    break
+
+            if time.time() - last_stats >= args.stats_interval:
+                pool.print_stats()
+                last_stats = time.time()
+    except KeyboardInterrupt:
+        pass
+
+    print("🧹 Stopping...")
+    pool.stop()
+    if not args.headless:
+        cv2.destroyAllWindows()
+    pool.print_stats()
+
+
+if __name__ == "__main__":
+    main()
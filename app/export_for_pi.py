@@ -79,14 +79,13 @@ On Raspberry Pi 4:
    # OR
    pip install tflite-runtime  # for TFLite
 
-3. Run inference:
-   from ultralytics import YOLO
-   model = YOLO('fire_model.onnx')
-   results = model(frame)
-
-Expected Performance:
-- YOLOv8n ONNX @ 320px: 5-8 FPS
-- YOLOv8n TFLite INT8 @ 320px: 8-12 FPS
+3. Run inference (ONNX Runtime backend, no PyTorch needed):
+   python fire_detector_unified.py --model fire_model.onnx --threads 4
+   python simulation.py --model fire_model.onnx --threads 4
+
+Measured Performance (INT8 artefacts, mAP and CPU latency vs FP32):
+   python quantize_model.py --model <model.pt> --imgsz 320 --threads 4
+   → writes a JSON report and names the fastest model within the accuracy budget
 
 This is PLENTY for fire detection! 🔥
 (Fire doesn't move that fast, 5 FPS is fine)
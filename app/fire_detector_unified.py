@@ -14,31 +14,80 @@ import argparse
 import warnings
 import os
 import sys
+import time
 from pathlib import Path
 
 warnings.filterwarnings('ignore')
 
 # Import our thermal simulator
 from thermal_simulation import ThermalSimulator
+from inference_backends import load_backend, BACKENDS
+from tiling import Tiler
+from cascade import CascadeDetector
+from adaptive_resolution import ResolutionController
+from tracking import BoxTracker
+from annotation import Annotator, LazyAnnotation
+from detections import RAW_CONF, RAW_MAX_DET
+from fusion import fuse
+from registration import Registration
 
 class UnifiedFireDetector:
     """
     Unified fire detection supporting RGB, Thermal, and Dual modes
     """
     
-    def __init__(self, model_path=None, mode='rgb', confidence=0.25):
+    def __init__(self, model_path=None, mode='rgb', confidence=0.25,
+                 backend='auto', threads=0,
+                 tile_size=None, tile_overlap=0.2, tile_min_altitude=None,
+                 cascade=False, latency_budget_ms=None, track_every=None, keep_raw=False,
+                 registration=None):
         """
         Initialize detector
         
         Args:
-            model_path: Path to YOLO model (.pt file)
+            model_path: Path to YOLO model (.pt or .onnx file)
             mode: Detection mode ('rgb', 'thermal', 'dual')
             confidence: Detection confidence threshold
+            backend: Inference runtime ('auto', 'ultralytics', 'onnx')
+            threads: CPU threads for the ONNX Runtime backend (0 = default)
+            tile_size: Tile edge in pixels for tiled detection (None = off)
+            tile_overlap: Fractional overlap between neighbouring tiles
+            tile_min_altitude: Only tile when altitude (m) is at least this (None = always)
+            cascade: Run YOLO only on crops around heat/colour candidates
+            latency_budget_ms: Pick the input size online to fit this per-frame budget (None = off)
+            track_every: Run the model every N frames and track boxes in between (None = off)
+            keep_raw: Keep raw low-threshold predictions so confidence / IoU / class
+                      changes can be re-applied to the current frame (see refilter)
+            registration: Registration (or path to its JSON) mapping thermal pixels
+                          to RGB pixels in dual mode (None = frames already aligned)
         """
         self.mode = mode
         self.confidence = confidence
+        self.iou = 0.7
+        self.classes = None   # class ids to keep (None = all)
+        self.keep_raw = keep_raw
+        self.backend_name = backend
+        self.threads = threads
         self.thermal_sim = ThermalSimulator(mode='inferno')
         
+        # RGB <-> thermal registration (dual mode fusion and display)
+        if isinstance(registration, (str, Path)):
+            registration = Registration.load(registration)
+        self.registration = registration
+        
+        # Tiled detection for small, distant fires
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.tile_min_altitude = tile_min_altitude
+        self._tilers = {}   # (stream, modality) -> Tiler with its own tile buffers
+        
+        # Detect-every-N with a box tracker in between
+        self.track_every = track_every if track_every and track_every > 1 else None
+        self._trackers = {}   # (stream, modality) -> BoxTracker
+        
+        # Annotated frames are rendered lazily, into per-stream reusable buffers
+        self._annotators = {}   # (stream, modality) -> Annotator
+        
         # Find best available model
         if model_path and os.path.exists(model_path):
             self.model_path = model_path
@@ -48,6 +97,17 @@ class UnifiedFireDetector:
         # Load model
         self._load_model()
         
+        # Two-stage cascade: cheap prefilter, then YOLO on crops only
+        self.cascade = CascadeDetector(self.backend) if cascade else None
+        
+        # Adaptive input resolution (full-frame path only)
+        self.resolution = None
+        if latency_budget_ms:
+            if self.backend.dynamic_input:
+                self.resolution = ResolutionController(budget_ms=latency_budget_ms)
+            else:
+                print("⚠️ Model has a fixed input size, latency budget ignored")
+        
     def _find_best_model(self):
         """Find the best available fire detection model"""
         from config import DATA_DIR, MODELS_DIR
@@ -69,12 +129,11 @@ class UnifiedFireDetector:
         return "yolov8n.pt"
         
     def _load_model(self):
-        """Load the YOLO model"""
+        """Load the YOLO model through the selected inference backend"""
         try:
-            from ultralytics import YOLO
-            self.model = YOLO(self.model_path)
-            print(f"✅ Model loaded: {self.model_path}")
-            print(f"   Classes: {self.model.names}")
+            self.backend = load_backend(self.model_path, self.backend_name, threads=self.threads)
+            print(f"✅ Model loaded: {self.model_path} ({type(self.backend).__name__})")
+            print(f"   Classes: {self.backend.names}")
         except Exception as e:
             print(f"❌ Failed to load model: {e}")
             sys.exit(1)
@@ -99,100 +158,245 @@ class UnifiedFireDetector:
             
         return {'rgb': frame}
         
-    def detect(self, frame):
+    def tiling_active(self, altitude=None):
+        """Tiling is on if configured and (when gated by altitude) we're high enough"""
+        if not self.tile_size:
+            return False
+        if self.tile_min_altitude is None:
+            return True
+        return altitude is not None and altitude >= self.tile_min_altitude
+        
+    def detect(self, frame, altitude=None, stream=0):
         """
         Run fire detection on frame
         
+        All modalities (e.g. RGB + simulated thermal in dual mode) go
+        through the model in ONE batched call.
+        
+        Args:
+            frame: BGR image
+            altitude: Current altitude in meters (used for altitude-gated tiling)
+            stream: Source id, keeps per-source state (tracks, buffers) apart
+        
         Returns:
-            dict with detection results and annotated frames
+            dict with detection results and lazy annotations (rendered on .image)
+        """
+        return self.detect_batch([frame], altitude=altitude, streams=[stream])[0]
+        
+    def detect_batch(self, frames, altitude=None, streams=None):
         """
-        frames = self.preprocess(frame)
-        results = {}
+        Run fire detection on a list of frames (e.g. one per camera)
         
-        for name, img in frames.items():
-            # Run YOLO detection
-            detections = self.model(img, conf=self.confidence, verbose=False)
+        Every modality of every frame is stacked into a single model call.
+        In tiled mode every tile of every image joins that same call.
+        With tracking on, only images whose tracker is due go to the model;
+        the others get constant-velocity predicted boxes.
+        
+        Args:
+            frames: list of BGR images
+            altitude: Current altitude in meters (used for altitude-gated tiling)
+            streams: Source id per frame (default: position in the list)
             
-            # Get annotated frame
-            annotated = detections[0].plot()
+        Returns:
+            list with one results dict per input frame (same shape as detect())
+        """
+        if streams is None:
+            streams = range(len(frames))
+        keys = []
+        positions = []
+        images = []
+        for i, (stream, frame) in enumerate(zip(streams, frames)):
+            for name, img in self.preprocess(frame).items():
+                keys.append((stream, name))
+                positions.append(i)
+                images.append(img)
+                
+        results = [{} for _ in frames]
+        if not images:
+            return results
             
-            # Extract boxes
-            boxes = detections[0].boxes
+        # Detect-every-N: which images actually need the model this frame
+        trackers = [self._tracker(key) for key in keys]
+        due = [t is None or t.needs_detection() for t in trackers]
+        run = [k for k, d in enumerate(due) if d]
+        detected = self._predict([keys[k] for k in run], [images[k] for k in run], altitude)
+        detections = dict(zip(run, detected))
+        # Tiled raw predictions are filtered at the tiler's IoU, like the non-raw tiled path merges
+        tiled = self.cascade is None and self.tiling_active(altitude)
+        
+        for k, (key, i, img, tracker) in enumerate(zip(keys, positions, images, trackers)):
+            name = key[1]
+            boxes = detections.get(k)
+            raw = None
+            raw_iou = self._tilers[key].iou if tiled and key in self._tilers else None
+            if self.keep_raw and boxes is not None:
+                raw, boxes = boxes, boxes.filter(self.confidence, raw_iou or self.iou, self.classes)
+            if tracker is not None:
+                boxes = tracker.update(boxes) if due[k] else tracker.predict()
+                
+            results[i][name] = self._entry(key, img, boxes)
+            if self.keep_raw:
+                results[i][name]['raw'] = raw
+                results[i][name]['raw_iou'] = raw_iou
             
-            results[name] = {
-                'frame': annotated,
-                'boxes': boxes,
-                'count': len(boxes),
-                'raw': detections[0]
-            }
+        return results
+        
+    def _entry(self, key, img, boxes):
+        """Results dict for one image; the annotated frame is drawn only when someone reads .image"""
+        annotator = self._annotators.get(key)
+        if annotator is None:
+            annotator = Annotator()
+            self._annotators[key] = annotator
+        return {
+            'annotation': annotator.annotate(img, boxes),
+            'boxes': boxes,
+            'count': len(boxes)
+        }
+        
+    def refilter(self, results, stream=0):
+        """
+        Re-apply the current confidence / IoU / class filter to one frame's
+        results without running the model (needs keep_raw=True)
+        
+        Args:
+            results: Results dict of one frame (as returned by detect())
+            stream: Source id of that frame (as passed to detect / detect_batch)
             
+        Returns:
+            results, updated in place
+        """
+        for name, entry in list(results.items()):
+            if not isinstance(entry, dict) or entry.get('raw') is None:
+                continue
+            boxes = entry['raw'].filter(self.confidence, entry.get('raw_iou') or self.iou, self.classes)
+            entry.update(self._entry((stream, name), entry['annotation'].frame, boxes))
         return results
         
+    def _tracker(self, key):
+        """BoxTracker for a (stream, modality) key, None if tracking is off"""
+        if not self.track_every:
+            return None
+        tracker = self._trackers.get(key)
+        if tracker is None:
+            tracker = BoxTracker(every=self.track_every)
+            self._trackers[key] = tracker
+        return tracker
+        
+    def _predict(self, keys, images, altitude=None):
+        """
+        Run the model on a list of images in one batched call
+        
+        Returns:
+            list of Detections, one per image
+        """
+        if not images:
+            return []
+            
+        # Raw mode: everything above RAW_CONF, no NMS, filtered afterwards
+        if self.keep_raw:
+            conf, iou, max_det = RAW_CONF, None, RAW_MAX_DET
+        else:
+            conf, iou, max_det = self.confidence, self.iou, 300
+            
+        if self.cascade is not None:
+            return self.cascade.detect_batch(images, conf=conf, iou=iou)
+            
+        if self.tiling_active(altitude):
+            # Flatten (image, tile) into one batch
+            batch = []
+            spans = []     # (start, length) of each image's tiles in batch
+            for key, img in zip(keys, images):
+                tiler = self._tilers.get(key)
+                if tiler is None:
+                    tiler = Tiler(self.tile_size, self.tile_overlap)
+                    self._tilers[key] = tiler
+                tiles = tiler.split(img)
+                spans.append((len(batch), len(tiles)))
+                batch.extend(tiles)
+            predictions = self.backend.predict(batch, conf=conf, iou=iou, imgsz=self.tile_size, max_det=max_det)
+            # Raw mode keeps the overlap duplicates too, so refilter() can apply any IoU
+            return [
+                self._tilers[key].merge(predictions[start:start + n], max_det=max_det,
+                                        iou=None if iou is None else self._tilers[key].iou)
+                for key, (start, n) in zip(keys, spans)
+            ]
+            
+        if self.resolution is not None:
+            start = time.time()
+            detections = self.backend.predict(images, conf=conf, iou=iou, imgsz=self.resolution.size, max_det=max_det)
+            self.resolution.update((time.time() - start) * 1000)
+            return detections
+            
+        return self.backend.predict(images, conf=conf, iou=iou, max_det=max_det)
+        
     def fuse_results(self, results):
         """
         Fuse results from dual-mode detection
         
-        If both RGB and Thermal detect fire in same region,
-        increase confidence.
+        RGB and thermal boxes are paired by IoU / centre distance; a fire
+        seen by both cameras in the same place gets a combined (noisy-OR)
+        score and HIGH confidence, boxes seen by only one camera MEDIUM.
         """
         if 'rgb' not in results or 'thermal' not in results:
             return results
             
-        rgb_count = results['rgb']['count']
-        thermal_count = results['thermal']['count']
-        
-        # Simple fusion: if both detect, high confidence
-        if rgb_count > 0 and thermal_count > 0:
-            fusion_confidence = "HIGH"
-        elif rgb_count > 0 or thermal_count > 0:
-            fusion_confidence = "MEDIUM"
-        else:
-            fusion_confidence = "NONE"
+        transform = None
+        if self.registration is not None:
+            rgb_h, rgb_w = results['rgb']['annotation'].frame.shape[:2]
+            thermal_h, thermal_w = results['thermal']['annotation'].frame.shape[:2]
+            transform = self.registration.for_sizes((rgb_w, rgb_h), (thermal_w, thermal_h)).thermal_to_rgb
             
+        fused = fuse(results['rgb']['boxes'], results['thermal']['boxes'], transform=transform)
+        
         results['fusion'] = {
-            'confidence': fusion_confidence,
-            'rgb_detections': rgb_count,
-            'thermal_detections': thermal_count
+            'confidence': fused['confidence'],
+            'rgb_detections': results['rgb']['count'],
+            'thermal_detections': results['thermal']['count'],
+            'matched': fused['matched'],
+            'score': fused['score'],
+            'boxes': fused['boxes'],
+            'source': fused['source']
         }
         
         return results
         
     def create_display(self, results, original_frame):
-        """Create display frame based on mode"""
-        
+        """Create display frame based on mode (renders the lazy annotations)"""
         if self.mode == 'rgb':
-            display = results['rgb']['frame']
+            annotation = results['rgb']['annotation']
             info = f"RGB Mode | Detections: {results['rgb']['count']} | Conf: {self.confidence}"
             
         elif self.mode == 'thermal':
-            display = results['thermal']['frame']
+            annotation = results['thermal']['annotation']
             info = f"THERMAL Mode ({self.thermal_sim.mode}) | Detections: {results['thermal']['count']}"
             
         elif self.mode == 'dual':
             # Side by side display
-            rgb_frame = results['rgb']['frame']
-            thermal_frame = results['thermal']['frame']
-            
-            # Resize to same height
-            h = min(rgb_frame.shape[0], thermal_frame.shape[0])
-            rgb_resized = cv2.resize(rgb_frame, (int(rgb_frame.shape[1] * h / rgb_frame.shape[0]), h))
-            thermal_resized = cv2.resize(thermal_frame, (int(thermal_frame.shape[1] * h / thermal_frame.shape[0]), h))
+            rgb_frame = results['rgb']['annotation'].image
+            thermal_frame = results['thermal']['annotation'].image
             
-            display = np.hstack([rgb_resized, thermal_resized])
+            if self.registration is not None:
+                # Thermal warped into RGB pixel space (cached remap tables), so both halves line up
+                thermal_aligned = self.registration.warp_thermal(thermal_frame, (rgb_frame.shape[1], rgb_frame.shape[0]))
+                annotation = LazyAnnotation(np.hstack([rgb_frame, thermal_aligned]))
+            else:
+                # Resize to same height
+                h = min(rgb_frame.shape[0], thermal_frame.shape[0])
+                rgb_resized = cv2.resize(rgb_frame, (int(rgb_frame.shape[1] * h / rgb_frame.shape[0]), h))
+                thermal_resized = cv2.resize(thermal_frame, (int(thermal_frame.shape[1] * h / thermal_frame.shape[0]), h))
+                annotation = LazyAnnotation(np.hstack([rgb_resized, thermal_resized]))
             
             fusion = results.get('fusion', {})
-            info = f"DUAL Mode | RGB: {results['rgb']['count']} | Thermal: {results['thermal']['count']} | Fusion: {fusion.get('confidence', 'N/A')}"
+            info = f"DUAL Mode | RGB: {results['rgb']['count']} | Thermal: {results['thermal']['count']} | Fusion: {fusion.get('confidence', 'N/A')} ({fusion.get('score', 0):.2f})"
         else:
-            display = original_frame
+            annotation = LazyAnnotation(original_frame)
             info = "Unknown mode"
             
-        # Add info bar
-        cv2.putText(display, info, (10, 30), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        cv2.putText(display, "Q=Quit M=Mode T=Thermal C=Confidence", (10, 60),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        # Info bar, drawn in the same pass as the boxes
+        annotation.text(info, (10, 30), (0, 255, 0), 0.7, 2)
+        annotation.text("Q=Quit M=Mode T=Thermal C=Confidence", (10, 60), (255, 255, 255), 0.5, 1)
                    
-        return display
+        return annotation.image
 
 
 def main():
@@ -200,11 +404,33 @@ def main():
     parser.add_argument("--mode", choices=['rgb', 'thermal', 'dual'], default='thermal',
                        help="Detection mode")
     parser.add_argument("--model", type=str, default=None,
-                       help="Path to YOLO model")
+                       help="Path to YOLO model (.pt or .onnx)")
+    parser.add_argument("--backend", choices=BACKENDS, default='auto',
+                       help="Inference runtime (auto picks onnx for .onnx files)")
+    parser.add_argument("--threads", type=int, default=0,
+                       help="ONNX Runtime intra-op threads (0 = default)")
     parser.add_argument("--confidence", type=float, default=0.25,
                        help="Detection confidence threshold")
     parser.add_argument("--camera", type=int, default=0,
                        help="Camera index")
+    parser.add_argument("--cascade", action="store_true",
+                       help="Run YOLO only on crops around heat/colour candidates")
+    parser.add_argument("--latency_budget", type=float, default=None,
+                       help="Per-frame latency budget in ms (adapts input size 320-640)")
+    parser.add_argument("--keep_raw", action="store_true",
+                       help="Keep raw predictions so C re-filters the current frame instantly")
+    parser.add_argument("--detect_every", type=int, default=1,
+                       help="Run the model every N frames, track boxes in between")
+    parser.add_argument("--registration", type=str, default=None,
+                       help="RGB <-> thermal calibration JSON (see registration.py) for dual mode")
+    parser.add_argument("--tile", action="store_true",
+                       help="Tiled detection for small, distant fires")
+    parser.add_argument("--tile_size", type=int, default=640,
+                       help="Tile edge in pixels")
+    parser.add_argument("--tile_overlap", type=float, default=0.2,
+                       help="Fractional overlap between tiles")
+    parser.add_argument("--tile_min_altitude", type=float, default=None,
+                       help="Only tile above this altitude in meters")
     args = parser.parse_args()
     
     print("=" * 70)
@@ -226,7 +452,17 @@ Controls:
     detector = UnifiedFireDetector(
         model_path=args.model,
         mode=args.mode,
-        confidence=args.confidence
+        confidence=args.confidence,
+        backend=args.backend,
+        threads=args.threads,
+        tile_size=args.tile_size if args.tile else None,
+        tile_overlap=args.tile_overlap,
+        tile_min_altitude=args.tile_min_altitude,
+        cascade=args.cascade,
+        latency_budget_ms=args.latency_budget,
+        track_every=args.detect_every,
+        keep_raw=args.keep_raw,
+        registration=args.registration
     )
     
     # Open webcam
@@ -292,6 +528,13 @@ Controls:
             conf_idx = (conf_idx + 1) % len(confidences)
             detector.confidence = confidences[conf_idx]
             print(f"🎚️ Confidence: {detector.confidence}")
+            if detector.keep_raw:
+                # Re-filter the frame on screen, no re-inference needed
+                results = detector.refilter(results)
+                if detector.mode == 'dual':
+                    results = detector.fuse_results(results)
+                display = detector.create_display(results, frame)
+                cv2.imshow("Unified Fire Detection - Press Q to quit", display)
             
         elif key == ord('s'):
             filename = f"fire_detection_{frame_count}.jpg"
@@ -306,6 +549,14 @@ Controls:
     print(f"   Frames processed: {frame_count}")
     print(f"   Frames with detections: {detection_frames}")
     print(f"   Detection rate: {100*detection_frames/max(1,frame_count):.1f}%")
+    if detector.cascade is not None:
+        stats = detector.cascade.stats()
+        print(f"   Cascade: model skipped on {stats['model_skipped_pct']}% of frames, "
+              f"{stats['avg_crops']} crops/frame, prefilter {stats['avg_prefilter_ms']}ms")
+    for (_, name), tracker in detector._trackers.items():
+        stats = tracker.stats()
+        print(f"   Tracker ({name}): model ran on {stats['detector_runs']} frames, "
+              f"{stats['predicted_frames']} tracked ({stats['speedup']}x fewer model calls)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,162 @@
+"""
+RGB + Thermal Detection Fusion
+Pairs RGB and thermal boxes that look at the same spot and scores them
+together. A fire seen by both cameras in the same place is far more
+believable than two boxes in different corners.
+
+Everything is one (N, M) NumPy matrix - IoU plus normalized centre
+distance - followed by a vectorized mutual-best match, so fusing a
+frame costs microseconds.
+
+    matched pair   -> one box (confidence-weighted average), score = noisy-OR
+                      1 - (1 - p_rgb) * (1 - p_thermal)
+    single source  -> kept, score * single_weight (needs confirmation)
+
+Usage:
+    fused = fuse(rgb_detections, thermal_detections)
+    fused['confidence']    # "HIGH" / "MEDIUM" / "NONE"
+    fused['boxes']         # Detections in the RGB frame
+"""
+import numpy as np
+
+from detections import Detections, box_iou
+
+# fused['source'] values
+SOURCE_RGB = 1
+SOURCE_THERMAL = 2
+SOURCE_BOTH = SOURCE_RGB | SOURCE_THERMAL
+
+
+def transform_boxes(xyxy, matrix):
+    """
+    Map xyxy boxes through a 3x3 homography / affine matrix
+
+    All four corners are projected and the axis-aligned hull is returned.
+    """
+    xyxy = np.asarray(xyxy, np.float32).reshape(-1, 4)
+    if len(xyxy) == 0:
+        return xyxy
+    x1, y1, x2, y2 = xyxy.T
+    corners = np.stack([
+        np.stack([x1, y1], 1), np.stack([x2, y1], 1),
+        np.stack([x2, y2], 1), np.stack([x1, y2], 1),
+    ], axis=1)                                                  # (N, 4, 2)
+    homogeneous = np.concatenate([corners, np.ones(corners.shape[:2] + (1,), np.float32)], axis=2)
+    projected = homogeneous @ np.asarray(matrix, np.float32).T  # (N, 4, 3)
+    projected = projected[..., :2] / projected[..., 2:3]
+    return np.concatenate([projected.min(1), projected.max(1)], axis=1).astype(np.float32)
+
+
+def centre_distance(a, b):
+    """
+    Pairwise centre distance, normalized by the mean box diagonal of each pair
+
+    Returns:
+        (N, M) matrix, 0 = same centre, 1 = one (average) diagonal apart
+    """
+    a = np.asarray(a, np.float32).reshape(-1, 4)
+    b = np.asarray(b, np.float32).reshape(-1, 4)
+    ca = (a[:, :2] + a[:, 2:]) / 2
+    cb = (b[:, :2] + b[:, 2:]) / 2
+    da = np.hypot(*(a[:, 2:] - a[:, :2]).T)
+    db = np.hypot(*(b[:, 2:] - b[:, :2]).T)
+    dist = np.hypot(*(ca[:, None, :] - cb[None, :, :]).transpose(2, 0, 1))
+    return dist / np.maximum((da[:, None] + db[None, :]) / 2, 1e-9)
+
+
+def match(rgb_xyxy, thermal_xyxy, iou_threshold=0.2, distance_threshold=0.5,
+          rgb_cls=None, thermal_cls=None):
+    """
+    Mutual-best matching between two box sets
+
+    A pair qualifies if IoU >= iou_threshold OR normalized centre distance
+    <= distance_threshold (tolerates small registration errors between the
+    cameras). Among qualifying pairs, i and j match if each is the other's
+    best partner.
+
+    Returns:
+        (rgb indices, thermal indices) of matched pairs, affinity matrix
+    """
+    iou = box_iou(rgb_xyxy, thermal_xyxy)
+    closeness = 1 - centre_distance(rgb_xyxy, thermal_xyxy)
+    affinity = np.maximum(iou, closeness)
+    ok = (iou >= iou_threshold) | (closeness >= 1 - distance_threshold)
+    if rgb_cls is not None and thermal_cls is not None:
+        ok &= np.asarray(rgb_cls)[:, None] == np.asarray(thermal_cls)[None, :]
+    affinity = np.where(ok, affinity, 0)
+
+    if affinity.size == 0:
+        empty = np.zeros(0, np.int64)
+        return empty, empty, affinity
+    best_t = affinity.argmax(1)                   # best thermal for each rgb
+    best_r = affinity.argmax(0)                   # best rgb for each thermal
+    r_idx = np.arange(len(best_t))
+    mutual = (best_r[best_t] == r_idx) & (affinity[r_idx, best_t] > 0)
+    return r_idx[mutual], best_t[mutual], affinity
+
+
+def fuse(rgb, thermal, transform=None, iou_threshold=0.2, distance_threshold=0.5,
+         single_weight=0.5, class_aware=False):
+    """
+    Fuse RGB and thermal detections of the same moment
+
+    Args:
+        rgb: Detections in the RGB frame
+        thermal: Detections in the thermal frame
+        transform: Maps thermal boxes into the RGB frame - a 3x3 matrix or a
+                   callable xyxy -> xyxy (None = frames already aligned)
+        iou_threshold: Minimum IoU for a pair
+        distance_threshold: Maximum normalized centre distance for a pair
+        single_weight: Score multiplier for boxes seen by one camera only
+        class_aware: Only pair boxes of the same class
+
+    Returns:
+        dict with fused 'boxes' (Detections, RGB frame), 'source' per box,
+        'matched' pair count, 'score' (best fused score) and 'confidence'
+        ("HIGH" if any pair matched, "MEDIUM" if only single-source boxes,
+        "NONE")
+    """
+    thermal_xyxy = thermal.xyxy
+    if transform is not None and len(thermal_xyxy):
+        thermal_xyxy = transform(thermal_xyxy) if callable(transform) else transform_boxes(thermal_xyxy, transform)
+
+    r_idx, t_idx, _ = match(
+        rgb.xyxy, thermal_xyxy, iou_threshold, distance_threshold,
+        rgb.cls if class_aware else None, thermal.cls if class_aware else None)
+
+    # Matched pairs: confidence-weighted box, noisy-OR score
+    p, q = rgb.conf[r_idx], thermal.conf[t_idx]
+    w = (p / np.maximum(p + q, 1e-9))[:, None]
+    pair_xyxy = w * rgb.xyxy[r_idx] + (1 - w) * thermal_xyxy[t_idx]
+    pair_conf = 1 - (1 - p) * (1 - q)
+
+    # Unmatched: single-source, down-weighted
+    rgb_only = np.ones(len(rgb), bool)
+    rgb_only[r_idx] = False
+    thermal_only = np.ones(len(thermal), bool)
+    thermal_only[t_idx] = False
+
+    xyxy = np.concatenate([pair_xyxy, rgb.xyxy[rgb_only], thermal_xyxy[thermal_only]])
+    conf = np.concatenate([pair_conf, rgb.conf[rgb_only] * single_weight,
+                           thermal.conf[thermal_only] * single_weight])
+    cls = np.concatenate([rgb.cls[r_idx], rgb.cls[rgb_only], thermal.cls[thermal_only]])
+    source = np.concatenate([
+        np.full(len(r_idx), SOURCE_BOTH), np.full(rgb_only.sum(), SOURCE_RGB),
+        np.full(thermal_only.sum(), SOURCE_THERMAL)]).astype(np.int8)
+
+    order = np.argsort(-conf, kind='stable')
+    boxes = Detections(xyxy[order], conf[order], cls[order], rgb.names or thermal.names)
+
+    if len(r_idx):
+        level = "HIGH"
+    elif len(boxes):
+        level = "MEDIUM"
+    else:
+        level = "NONE"
+    return {
+        'boxes': boxes,
+        'source': source[order],
+        'matched': int(len(r_idx)),
+        'score': boxes.max_conf(),
+        'confidence': level,
+    }
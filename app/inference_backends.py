@@ -0,0 +1,243 @@
+"""
+Pluggable Inference Backends
+Lets the detector run the same model through different runtimes.
+
+Backends:
+    ultralytics - PyTorch .pt (or any format ultralytics can load)
+    onnx        - ONNX Runtime on CPU, no torch needed (Pi-friendly)
+
+Every backend takes a list of BGR frames and returns one `Detections`
+per frame, so callers don't care which runtime is underneath.
+
+Usage:
+    backend = load_backend("models/fire.onnx", threads=4)
+    detections = backend.predict([frame], conf=0.25)[0]
+
+Export an ONNX model first with export_for_pi.py.
+"""
+import ast
+import os
+
+import cv2
+import numpy as np
+
+from detections import Detections, nms
+
+BACKENDS = ['auto', 'ultralytics', 'onnx']
+
+
+def letterbox(img, new_shape=(640, 640), color=114, out=None):
+    """
+    Resize keeping aspect ratio, pad the rest (same as YOLO training)
+
+    Args:
+        img: BGR image
+        new_shape: (height, width) of the output
+        color: Padding value
+        out: Optional preallocated (height, width, 3) uint8 buffer
+
+    Returns:
+        padded image, scale ratio, (pad_left, pad_top)
+    """
+    h, w = img.shape[:2]
+    new_h, new_w = new_shape
+    r = min(new_h / h, new_w / w)
+    resized_w, resized_h = int(round(w * r)), int(round(h * r))
+    left = (new_w - resized_w) // 2
+    top = (new_h - resized_h) // 2
+
+    if out is None:
+        out = np.empty((new_h, new_w, 3), np.uint8)
+    out[...] = color
+    if (resized_w, resized_h) != (w, h):
+        img = cv2.resize(img, (resized_w, resized_h), interpolation=cv2.INTER_LINEAR)
+    out[top:top + resized_h, left:left + resized_w] = img
+    return out, r, (left, top)
+
+
+class InferenceBackend:
+    """Base class: predict(frames) -> list of Detections"""
+
+    names = {}
+    # Runtime name; outputs of different runtimes for the same weights differ slightly
+    runtime = None
+    # False if the model can only run at its exported input size
+    dynamic_input = True
+
+    def predict(self, frames, conf=0.25, iou=0.7, imgsz=None, max_det=300):
+        """
+        Run detection on a batch of frames
+
+        Args:
+            frames: list of BGR images
+            conf: Confidence threshold
+            iou: NMS IoU threshold (None = no NMS, for raw predictions)
+            imgsz: Model input size (None = model default)
+            max_det: Maximum detections per frame
+
+        Returns:
+            list of Detections, one per frame
+        """
+        raise NotImplementedError
+
+
+class UltralyticsBackend(InferenceBackend):
+    """PyTorch / ultralytics runtime"""
+
+    runtime = 'ultralytics'
+
+    def __init__(self, model_path):
+        from ultralytics import YOLO
+        self.model = YOLO(model_path)
+        self.names = dict(self.model.names)
+
+    def predict(self, frames, conf=0.25, iou=0.7, imgsz=None, max_det=300):
+        # ultralytics always runs NMS; IoU 1.0 suppresses nothing
+        kwargs = {'conf': conf, 'iou': 1.0 if iou is None else iou, 'max_det': max_det, 'verbose': False}
+        if imgsz:
+            kwargs['imgsz'] = imgsz
+        results = self.model(list(frames), **kwargs)
+        return [Detections.from_ultralytics(r) for r in results]
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """
+    ONNX Runtime CPU runtime with its own letterbox pre- and NMS postprocessing
+
+    Handles both YOLOv8-style raw outputs (1, 4+nc, anchors) and
+    end-to-end YOLOv10-style outputs (1, max_det, 6).
+    """
+
+    runtime = 'onnx'
+
+    def __init__(self, model_path, intra_op_threads=0, inter_op_threads=0):
+        """
+        Args:
+            model_path: Path to .onnx file
+            intra_op_threads: Threads used inside one operator (0 = ORT default)
+            inter_op_threads: Threads used across operators (0 = ORT default)
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        if inter_op_threads > 1:
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+
+        # Fixed dims are ints, dynamic dims are strings / None
+        batch, _, h, w = model_input.shape
+        self.fixed_batch = batch if isinstance(batch, int) else None
+        self.fixed_size = (h, w) if isinstance(h, int) and isinstance(w, int) else None
+        self.dynamic_input = self.fixed_size is None
+
+        meta = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(meta['names']) if 'names' in meta else {}
+        self.default_size = self.fixed_size or self._meta_imgsz(meta) or (640, 640)
+
+        # Reused between calls with the same batch size / input size
+        self._blob = None
+        self._padded = None
+
+    @staticmethod
+    def _meta_imgsz(meta):
+        if 'imgsz' not in meta:
+            return None
+        size = ast.literal_eval(meta['imgsz'])
+        return tuple(size) if isinstance(size, (list, tuple)) else (size, size)
+
+    def _input_size(self, imgsz):
+        # A static ONNX graph can only run at its exported size
+        if self.fixed_size or not imgsz:
+            return self.default_size
+        return (imgsz, imgsz) if isinstance(imgsz, int) else tuple(imgsz)
+
+    def _preprocess(self, frames, size):
+        n = len(frames)
+        h, w = size
+        if self._blob is None or self._blob.shape != (n, 3, h, w):
+            self._blob = np.empty((n, 3, h, w), np.float32)
+        if self._padded is None or self._padded.shape != (h, w, 3):
+            self._padded = np.empty((h, w, 3), np.uint8)
+
+        meta = []
+        for i, frame in enumerate(frames):
+            padded, r, pad = letterbox(frame, size, out=self._padded)
+            # BGR HWC uint8 -> RGB CHW float 0..1, written straight into the blob
+            np.multiply(padded[..., ::-1].transpose(2, 0, 1), 1 / 255.0, out=self._blob[i])
+            meta.append((r, pad, frame.shape[:2]))
+        return self._blob, meta
+
+    def _postprocess(self, pred, r, pad, shape, conf, iou, max_det):
+        if pred.ndim == 2 and pred.shape[1] == 6 and pred.shape[0] > pred.shape[1]:
+            # End-to-end output: x1, y1, x2, y2, score, class (already NMS-free)
+            xyxy, scores, cls = pred[:, :4], pred[:, 4], pred[:, 5].astype(np.int32)
+            mask = scores >= conf
+            xyxy, scores, cls = xyxy[mask], scores[mask], cls[mask]
+        else:
+            # Raw output: (4 + nc, anchors) with cx, cy, w, h + class scores
+            pred = pred.T if pred.shape[0] < pred.shape[1] else pred
+            class_scores = pred[:, 4:]
+            cls = class_scores.argmax(1).astype(np.int32)
+            scores = class_scores[np.arange(len(pred)), cls]
+            mask = scores >= conf
+            boxes, scores, cls = pred[mask, :4], scores[mask], cls[mask]
+
+            xyxy = np.empty_like(boxes)
+            xyxy[:, :2] = boxes[:, :2] - boxes[:, 2:] / 2
+            xyxy[:, 2:] = boxes[:, :2] + boxes[:, 2:] / 2
+
+            if iou is not None:
+                keep = nms(xyxy, scores, iou, cls=cls, max_det=max_det)
+            else:
+                keep = np.argsort(-scores, kind='stable')[:max_det]
+            xyxy, scores, cls = xyxy[keep], scores[keep], cls[keep]
+
+        # Undo letterbox
+        xyxy = (xyxy - np.array([pad[0], pad[1], pad[0], pad[1]], np.float32)) / r
+        h, w = shape
+        xyxy[:, [0, 2]] = np.clip(xyxy[:, [0, 2]], 0, w)
+        xyxy[:, [1, 3]] = np.clip(xyxy[:, [1, 3]], 0, h)
+        return Detections(xyxy[:max_det], scores[:max_det], cls[:max_det], self.names)
+
+    def predict(self, frames, conf=0.25, iou=0.7, imgsz=None, max_det=300):
+        if not frames:
+            return []
+        size = self._input_size(imgsz)
+
+        # Static batch-1 graphs have to be run one frame at a time
+        if self.fixed_batch == 1 and len(frames) > 1:
+            return [d for f in frames for d in self.predict([f], conf, iou, imgsz, max_det)]
+
+        blob, meta = self._preprocess(frames, size)
+        output = self.session.run(None, {self.input_name: blob})[0]
+        return [
+            self._postprocess(pred, r, pad, shape, conf, iou, max_det)
+            for pred, (r, pad, shape) in zip(output, meta)
+        ]
+
+
+def load_backend(model_path, backend='auto', threads=0, inter_op_threads=0):
+    """
+    Create an inference backend for a model file
+
+    Args:
+        model_path: Path to the model
+        backend: 'auto' (pick by file extension), 'ultralytics' or 'onnx'
+        threads: Intra-op threads for ONNX Runtime (0 = default)
+        inter_op_threads: Inter-op threads for ONNX Runtime (0 = default)
+    """
+    if backend == 'auto':
+        backend = 'onnx' if os.path.splitext(str(model_path))[1].lower() == '.onnx' else 'ultralytics'
+
+    if backend == 'onnx':
+        return OnnxRuntimeBackend(str(model_path), intra_op_threads=threads, inter_op_threads=inter_op_threads)
+    if backend == 'ultralytics':
+        return UltralyticsBackend(str(model_path))
+    raise ValueError(f"Unknown backend '{backend}' (choose from {BACKENDS})")
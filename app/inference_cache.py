@@ -0,0 +1,175 @@
+"""
+Content-Addressed Inference Cache
+The simulator replays the same dataset images lap after lap, drone after
+drone. Detections depend only on (pixels, model, inference params), so
+they are cached under a hash of exactly that:
+
+    key = sha1(frame bytes + shape) | model file hash | params
+
+Hits come from an in-memory LRU first, then (optionally) from .npz files
+on disk, which are shared by every drone process pointing at the same
+cache_dir and survive restarts. Misses run the model and fill both.
+
+Usage:
+    cache = InferenceCache(model_path, cache_dir="inference_cache")
+    detections = cache.lookup(frame, lambda f: backend.predict([f])[0], imgsz=640)
+    print(cache.stats())
+"""
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from detections import Detections
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """blake2b of a file's contents"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def frame_hash(frame):
+    """
+    sha1 of an image's pixels (shape and dtype included)
+
+    Not a security boundary, sha1 is simply the fastest hashlib digest on
+    most CPUs (~2.5ms for a 720p frame vs ~5ms for blake2b).
+    """
+    frame = np.ascontiguousarray(frame)
+    h = hashlib.sha1()
+    h.update(f"{frame.shape}{frame.dtype}".encode())
+    h.update(memoryview(frame).cast('B'))
+    return h.hexdigest()
+
+
+class InferenceCache:
+    """LRU (+ optional on-disk) cache of Detections keyed by frame content, model and params"""
+
+    def __init__(self, model, names=None, capacity=4096, cache_dir=None):
+        """
+        Args:
+            model: Model file path (hashed by content) or any identifying string
+            names: Class names for Detections loaded from disk
+            capacity: Max entries in the in-memory LRU
+            cache_dir: Folder for .npz entries (None = memory only)
+        """
+        if model is not None and os.path.isfile(str(model)):
+            self.model_id = file_hash(model)
+        else:
+            self.model_id = hashlib.blake2b(str(model).encode(), digest_size=16).hexdigest()
+        self.names = names or {}
+        self.capacity = capacity
+        self.cache_dir = None
+        if cache_dir:
+            # One sub-folder per model, so stale entries never mix with a new model
+            self.cache_dir = Path(cache_dir) / self.model_id
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lru = OrderedDict()
+
+        # Stats
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, frame, **params):
+        """Cache key for a frame under the given inference params"""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(frame_hash(frame).encode())
+        h.update(json.dumps(params, sort_keys=True, default=str).encode())
+        return h.hexdigest()
+
+    def get(self, key):
+        """Detections for a key, or None"""
+        detections = self._lru.get(key)
+        if detections is not None:
+            self._lru.move_to_end(key)
+            self.memory_hits += 1
+            return detections
+
+        detections = self._load(key)
+        if detections is not None:
+            self._remember(key, detections)
+            self.disk_hits += 1
+            return detections
+        return None
+
+    def put(self, key, detections):
+        self.names = self.names or detections.names
+        self._remember(key, detections)
+        self._save(key, detections)
+
+    def lookup(self, frame, detect_fn, **params):
+        """
+        Cached detections for a frame, running detect_fn(frame) on a miss
+
+        Args:
+            frame: Image as passed to the model
+            detect_fn: frame -> Detections
+            **params: Everything besides the pixels that changes the result
+                      (conf, iou, imgsz, ...)
+        """
+        key = self.key(frame, **params)
+        detections = self.get(key)
+        if detections is None:
+            self.misses += 1
+            detections = detect_fn(frame)
+            self.put(key, detections)
+        return detections
+
+    def _remember(self, key, detections):
+        self._lru[key] = detections
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.capacity:
+            self._lru.popitem(last=False)
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.npz"
+
+    def _load(self, key):
+        if self.cache_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                if not self.names and 'names' in data:
+                    self.names = {int(k): v for k, v in json.loads(str(data['names'])).items()}
+                return Detections(data['xyxy'], data['conf'], data['cls'], self.names)
+        except (FileNotFoundError, OSError, KeyError, ValueError):
+            return None
+
+    def _save(self, key, detections):
+        if self.cache_dir is None:
+            return
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        # Write + rename so other drones never read a half-written file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, xyxy=detections.xyxy, conf=detections.conf, cls=detections.cls,
+                         names=json.dumps(self.names))
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def stats(self):
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            'hits': hits,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': round(hits / total, 3) if total else 0.0,
+            'entries': len(self._lru),
+        }
@@ -0,0 +1,460 @@
+"""
+Shared Inference Server for the Simulated Fleet
+Loads the YOLO model ONCE and serves every drone process on the machine.
+
+Drones write frames into their own shared-memory slot and send a tiny
+request over a local socket. The server collects requests from all drones
+into dynamic batches (up to --max_batch, waiting at most --max_wait_ms for
+stragglers), taking at most one frame per drone per batch in round-robin
+order so a fast drone can't starve the others.
+
+Usage:
+    python inference_server.py                       # default model + port
+    python inference_server.py --max_batch 8 --max_wait_ms 15
+
+    # in simulation.py
+    python simulation.py --id A1 --inference_server 127.0.0.1:6000
+"""
+import argparse
+import os
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import Listener, Client
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+
+from detections import Detections
+from inference_cache import file_hash
+from inference_backends import load_backend, BACKENDS
+
+DEFAULT_ADDRESS = ('127.0.0.1', 6000)
+AUTHKEY = b'fire-swarm'
+
+# Shared memory slot per drone (fits a 1080p BGR frame)
+DEFAULT_SLOT_BYTES = 1920 * 1080 * 3
+
+
+def parse_address(text):
+    """'host:port' -> (host, port)"""
+    host, _, port = text.rpartition(':')
+    return (host or DEFAULT_ADDRESS[0], int(port))
+
+
+def _close_shm(shm):
+    try:
+        shm.close()
+    except BufferError:
+        # A numpy view on it is still alive somewhere; the mapping goes away with it
+        print(f"⚠️ Shared memory {shm.name} still in use, not closed")
+
+
+def _attach_shm(name):
+    """Attach to a client's shared memory without taking ownership of it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        # Older Pythons register attached segments too and unlink them on exit
+        try:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+        return shm
+
+
+class _DroneConnection:
+    """Server-side state for one connected drone"""
+
+    def __init__(self, drone_id, conn, shm):
+        self.drone_id = drone_id
+        self.conn = conn
+        self.shm = shm
+        self.send_lock = threading.Lock()
+        # Requests taken into a batch whose frames are still being copied out of the shm
+        self.in_flight = 0
+        self.retired = []   # old / disconnected segments, closed once in_flight drops to 0
+
+        # Stats
+        self.requests = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def send(self, msg):
+        with self.send_lock:
+            self.conn.send(msg)
+
+    def retire(self, shm):
+        """Close a segment now, or once the batch using it is done (call under the server lock)"""
+        self.retired.append(shm)
+        self.release()
+
+    def release(self):
+        if self.in_flight == 0:
+            for shm in self.retired:
+                _close_shm(shm)
+            self.retired.clear()
+
+
+class InferenceServer:
+    """
+    Dynamic-batching inference service shared by all drones
+    """
+
+    def __init__(self, model_path, address=DEFAULT_ADDRESS, conf=0.25,
+                 max_batch=8, max_wait_ms=10, stats_interval=10,
+                 backend='auto', threads=0):
+        """
+        Args:
+            model_path: Path to YOLO model (.pt or .onnx file)
+            address: (host, port) to listen on
+            conf: Confidence threshold used for every request
+            max_batch: Maximum frames per model call
+            max_wait_ms: How long the first request in a batch may wait for others
+            stats_interval: Seconds between stats printouts (0 = off)
+            backend: Inference runtime ('auto', 'ultralytics', 'onnx')
+            threads: CPU threads for the ONNX Runtime backend (0 = default)
+        """
+        self.model_path = model_path
+        self.backend = backend
+        self.threads = threads
+        self.address = address
+        self.conf = conf
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.stats_interval = stats_interval
+
+        self.drones = {}            # drone_id -> _DroneConnection
+        self.pending = {}           # drone_id -> deque of requests
+        self._rr_order = deque()    # round-robin order of drone ids
+        self._cond = threading.Condition()
+        self.running = False
+
+        # Batch stats
+        self.batches = 0
+        self.batched_frames = 0
+        self.max_queue_depth = 0
+
+    def _load_model(self):
+        print(f"📥 Loading Model: {self.model_path}")
+        self.model = load_backend(self.model_path, self.backend, threads=self.threads)
+        self.model_hash = file_hash(self.model_path) if os.path.isfile(self.model_path) else str(self.model_path)
+        print("✅ Model loaded successfully")
+
+    def info(self):
+        """What determines the results: sent to every drone in the handshake (e.g. for cache keys)"""
+        return {
+            'model': os.path.basename(str(self.model_path)),
+            'model_hash': self.model_hash,
+            'backend': self.model.runtime,
+            'conf': self.conf,
+            'names': self.model.names,
+        }
+
+    def serve_forever(self):
+        # Listen before loading the model: drones that start early connect right away and
+        # their handshake simply waits until the model is loaded and we start accepting
+        listener = Listener(self.address, backlog=64, authkey=AUTHKEY)
+        try:
+            self._load_model()
+        except BaseException:
+            listener.close()
+            raise
+        self.running = True
+        threading.Thread(target=self._batch_loop, name="batcher", daemon=True).start()
+        if self.stats_interval:
+            threading.Thread(target=self._stats_loop, name="stats", daemon=True).start()
+
+        print(f"🧠 INFERENCE SERVER listening on {self.address[0]}:{self.address[1]}")
+        try:
+            while self.running:
+                conn = listener.accept()
+                threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+        finally:
+            self.running = False
+            listener.close()
+
+    # --- CONNECTIONS ---
+    def _serve_client(self, conn):
+        try:
+            _, drone_id, shm_name = conn.recv()   # ('hello', drone_id, shm_name)
+            drone = _DroneConnection(drone_id, conn, _attach_shm(shm_name))
+            drone.send(('ready', self.info()))
+        except (EOFError, OSError, ValueError) as e:
+            print(f"⚠️ Rejected client: {e}")
+            conn.close()
+            return
+
+        with self._cond:
+            # A reconnecting drone replaces its old connection; requests still queued
+            # by that one point at its (soon retired) shared memory and are dropped
+            self.drones[drone_id] = drone
+            self.pending[drone_id] = deque()
+            if drone_id not in self._rr_order:
+                self._rr_order.append(drone_id)
+        print(f"   [+] Drone {drone_id} connected")
+
+        try:
+            while True:
+                msg = conn.recv()
+                kind = msg[0]
+                if kind == 'infer':
+                    _, seq, shape, dtype = msg
+                    with self._cond:
+                        self.pending[drone_id].append((drone, seq, shape, dtype, time.time()))
+                        self._cond.notify()
+                elif kind == 'attach':
+                    # Client grew its shared memory slot. The batch thread may still hold
+                    # views on the old one, so it is closed once that batch is done
+                    shm = _attach_shm(msg[1])
+                    with self._cond:
+                        old, drone.shm = drone.shm, shm
+                        drone.retire(old)
+                    drone.send(('attached',))
+                elif kind == 'stats':
+                    drone.send(('stats', self.stats()))
+        except (EOFError, OSError):
+            pass
+        finally:
+            with self._cond:
+                # Leave the id alone if the drone has already reconnected
+                if self.drones.get(drone_id) is drone:
+                    del self.drones[drone_id]
+                    self.pending.pop(drone_id, None)
+                    if drone_id in self._rr_order:
+                        self._rr_order.remove(drone_id)
+                drone.retire(drone.shm)
+            conn.close()
+            print(f"   [-] Drone {drone_id} disconnected")
+
+    # --- BATCHING ---
+    def _queue_depth(self):
+        return sum(len(q) for q in self.pending.values())
+
+    def _take_batch(self):
+        """One request per drone per pass, starting after the last served drone"""
+        batch = []
+        while len(batch) < self.max_batch and self._queue_depth() > 0:
+            for _ in range(len(self._rr_order)):
+                drone_id = self._rr_order[0]
+                self._rr_order.rotate(-1)
+                queue = self.pending.get(drone_id)
+                if queue:
+                    request = queue.popleft()
+                    request[0].in_flight += 1
+                    batch.append(request)
+                    if len(batch) >= self.max_batch:
+                        break
+        return batch
+
+    def _batch_loop(self):
+        while self.running:
+            with self._cond:
+                while self._queue_depth() == 0:
+                    self._cond.wait(0.1)
+                    if not self.running:
+                        return
+
+                # Give other drones a moment to join this batch
+                deadline = time.time() + self.max_wait
+                while self._queue_depth() < min(self.max_batch, len(self.drones)):
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                self.max_queue_depth = max(self.max_queue_depth, self._queue_depth())
+                batch = self._take_batch()
+
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        # Copied out of the drones' shared memory (each drone waits for its reply
+        # before writing the next frame). The model may keep references to its inputs
+        # (the ultralytics predictor does, until the next call), so it never gets
+        # views that would stop a segment from being closed
+        frames = [
+            np.array(np.ndarray(shape, dtype=np.dtype(dtype), buffer=drone.shm.buf))
+            for drone, _, shape, dtype, _ in batch
+        ]
+        with self._cond:
+            for drone, *_ in batch:
+                drone.in_flight -= 1
+                drone.release()
+
+        try:
+            detections = self.model.predict(frames, conf=self.conf)
+        except Exception as e:
+            print(f"⚠️ Batch inference failed: {e}")
+            detections = [Detections(names=self.model.names) for _ in batch]
+
+        self.batches += 1
+        self.batched_frames += len(batch)
+
+        done = time.time()
+        for (drone, seq, _, _, submitted), det in zip(batch, detections):
+            latency = done - submitted
+            drone.requests += 1
+            drone.total_latency += latency
+            drone.max_latency = max(drone.max_latency, latency)
+            try:
+                drone.send(('result', seq, det, latency * 1000))
+            except (OSError, ValueError):
+                pass
+
+    # --- STATS ---
+    def stats(self):
+        """Per-drone request counts / latency plus batching efficiency"""
+        with self._cond:
+            per_drone = {
+                d.drone_id: {
+                    'requests': d.requests,
+                    'avg_latency_ms': round(1000 * d.total_latency / max(1, d.requests), 1),
+                    'max_latency_ms': round(1000 * d.max_latency, 1),
+                    'queued': len(self.pending.get(d.drone_id, ())),
+                }
+                for d in self.drones.values()
+            }
+            return {
+                'drones': per_drone,
+                'batches': self.batches,
+                'avg_batch_size': round(self.batched_frames / max(1, self.batches), 2),
+                'queue_depth': self._queue_depth(),
+                'max_queue_depth': self.max_queue_depth,
+            }
+
+    def _stats_loop(self):
+        while self.running:
+            time.sleep(self.stats_interval)
+            s = self.stats()
+            print(f"📊 batches={s['batches']} avg_batch={s['avg_batch_size']} "
+                  f"queue={s['queue_depth']} (max {s['max_queue_depth']})")
+            for drone_id, d in sorted(s['drones'].items()):
+                print(f"   {drone_id}: {d['requests']} req | avg {d['avg_latency_ms']}ms "
+                      f"| max {d['max_latency_ms']}ms | queued {d['queued']}")
+
+
+class InferenceClient:
+    """
+    Drone-side handle to the shared inference server
+
+    Call it like a model: detections = client(frame)
+    """
+
+    def __init__(self, drone_id, address=DEFAULT_ADDRESS, slot_bytes=DEFAULT_SLOT_BYTES,
+                 connect_timeout=60):
+        """
+        Args:
+            drone_id: Name used for fairness and stats on the server
+            address: (host, port) of the server
+            slot_bytes: Initial shared memory size (grows if a frame is bigger)
+            connect_timeout: Seconds to keep retrying while the server is not up yet
+        """
+        self.drone_id = drone_id
+        self.conn = self._connect(address, connect_timeout)
+        self.shm = shared_memory.SharedMemory(create=True, size=slot_bytes)
+        self.conn.send(('hello', drone_id, self.shm.name))
+        # Server model identity and params ({} from servers that don't send them)
+        ready = self._wait_for('ready')
+        self.server_info = ready[1] if len(ready) > 1 else {}
+        self.seq = 0
+        self.last_latency_ms = 0.0
+
+    @staticmethod
+    def _connect(address, timeout):
+        deadline = time.time() + timeout
+        delay = 0.1
+        while True:
+            try:
+                return Client(address, authkey=AUTHKEY)
+            except (ConnectionRefusedError, FileNotFoundError):
+                if time.time() + delay > deadline:
+                    raise
+                time.sleep(delay)
+                delay = min(delay * 2, 2.0)
+
+    def _wait_for(self, kind):
+        while True:
+            msg = self.conn.recv()
+            if msg[0] == kind:
+                return msg
+
+    def _grow(self, nbytes):
+        old = self.shm
+        self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self.conn.send(('attach', self.shm.name))
+        # Only drop the old segment once the server has switched over
+        self._wait_for('attached')
+        old.close()
+        old.unlink()
+
+    def __call__(self, frame):
+        """
+        Run detection on a frame via the server
+
+        Returns:
+            Detections
+        """
+        frame = np.ascontiguousarray(frame)
+        if frame.nbytes > self.shm.size:
+            self._grow(frame.nbytes)
+
+        np.ndarray(frame.shape, dtype=frame.dtype, buffer=self.shm.buf)[...] = frame
+        self.seq += 1
+        self.conn.send(('infer', self.seq, frame.shape, frame.dtype.str))
+
+        while True:
+            msg = self.conn.recv()
+            if msg[0] == 'result' and msg[1] == self.seq:
+                self.last_latency_ms = msg[3]
+                return msg[2]
+
+    def stats(self):
+        """Fetch server stats"""
+        self.conn.send(('stats',))
+        return self._wait_for('stats')[1]
+
+    def close(self):
+        try:
+            self.conn.close()
+        finally:
+            self.shm.close()
+            self.shm.unlink()
+
+
+def main():
+    from config import MODELS_DIR
+
+    parser = argparse.ArgumentParser(description="Shared inference server for simulated drones")
+    parser.add_argument("--model", type=str, default=str(MODELS_DIR / "fire_v8s.pt"),
+                       help="Path to YOLO model (.pt or .onnx)")
+    parser.add_argument("--backend", choices=BACKENDS, default='auto',
+                       help="Inference runtime (auto picks onnx for .onnx files)")
+    parser.add_argument("--threads", type=int, default=0, help="ONNX Runtime intra-op threads (0 = default)")
+    parser.add_argument("--address", type=str, default=f"{DEFAULT_ADDRESS[0]}:{DEFAULT_ADDRESS[1]}",
+                       help="host:port to listen on")
+    parser.add_argument("--conf", type=float, default=0.25, help="Detection confidence threshold")
+    parser.add_argument("--max_batch", type=int, default=8, help="Maximum frames per model call")
+    parser.add_argument("--max_wait_ms", type=float, default=10, help="Max time to wait for a fuller batch")
+    parser.add_argument("--stats_interval", type=float, default=10, help="Seconds between stats printouts")
+    args = parser.parse_args()
+
+    server = InferenceServer(
+        args.model,
+        address=parse_address(args.address),
+        conf=args.conf,
+        max_batch=args.max_batch,
+        max_wait_ms=args.max_wait_ms,
+        stats_interval=args.stats_interval,
+        backend=args.backend,
+        threads=args.threads,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Inference server stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,7 +22,6 @@ warnings.filterwarnings('ignore', message='Bad certificate')
 
 import cv2
 import numpy as np
-from ultralytics import YOLO
 import time
 import argparse
 from pathlib import Path
@@ -182,6 +181,7 @@ def main():
     
     # Load YOLO model
     print(f"\n🤖 Loading model: {args.model}...")
+    from ultralytics import YOLO
     model = YOLO(args.model)
     class_names = model.names
     print(f"✅ Model loaded! Classes: {list(class_names.values())}")
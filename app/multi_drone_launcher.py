@@ -8,6 +8,10 @@ import argparse
 # --- ARGUMENT PARSING ---
 parser = argparse.ArgumentParser(description='Multi-Drone Launcher')
 parser.add_argument('--record', action='store_true', help='Enable recording for all drones')
+parser.add_argument('--shared_model', action='store_true',
+                    help='Load the model once in inference_server.py and share it across drones')
+parser.add_argument('--server_address', type=str, default='127.0.0.1:6000',
+                    help='host:port for the shared inference server')
 args = parser.parse_args()
 
 # --- FLEET CONFIGURATION ---
@@ -25,6 +29,13 @@ def launch_fleet():
     print(f"🚀 LAUNCHING FLEET OF {len(DRONES)} DRONES...")
     print("=" * 50)
     
+    if args.shared_model:
+        print(f"   [+] Launching shared inference server on {args.server_address}...")
+        p = subprocess.Popen([sys.executable, "inference_server.py", "--address", args.server_address])
+        processes.append(p)
+        # No need to wait for the model: drones retry the connection and their
+        # handshake completes once the server has loaded it
+    
     for drone in DRONES:
         cmd = [
             sys.executable, "simulation.py",
@@ -37,6 +48,9 @@ def launch_fleet():
         if args.record:
             cmd.append("--record")
         
+        if args.shared_model:
+            cmd.extend(["--inference_server", args.server_address])
+        
         print(f"   [+] Launching Drone {drone['id']} on Port {drone['port']}...")
         # Launch as independent process
         p = subprocess.Popen(cmd)
@@ -49,7 +63,8 @@ def launch_fleet():
 
 def cleanup():
     print("\n🛑 LANDING FLEET...")
-    for p in processes:
+    # Drones first, inference server last
+    for p in reversed(processes):
         p.terminate()
     print("✅ All drones landed.")
 
@@ -0,0 +1,205 @@
+"""
+Staged Frame Pipeline
+Runs each step of the edge loop (capture → preprocess → inference →
+publish → record) on its own worker thread.
+
+Stages are connected by small bounded queues with a "latest frame wins"
+policy: when a downstream stage falls behind, the OLDEST waiting frame is
+dropped instead of blocking the producer. Inference therefore always works
+on the freshest frame and end-to-end latency stays bounded under load.
+
+Usage:
+    pipe = Pipeline()
+    pipe.add_stage("capture", read_frame)          # source: fn() -> packet
+    pipe.add_stage("inference", run_inference)     # fn(packet) -> packet
+    pipe.add_stage("publish", publish)
+    pipe.start()
+    ...
+    pipe.stop()
+"""
+import threading
+import time
+from collections import deque
+
+
+class LatestQueue:
+    """
+    Bounded queue that drops the oldest item when full (latest frame wins)
+    """
+
+    def __init__(self, maxsize=1):
+        """
+        Args:
+            maxsize: Number of items kept before the oldest is dropped
+        """
+        self.maxsize = max(1, maxsize)
+        self.dropped = 0
+        self.closed = False
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        """Add item, never blocks. Drops the oldest item if the queue is full"""
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """
+        Get the next item
+
+        Returns:
+            item, or None on timeout / after close()
+        """
+        with self._cond:
+            if not self._items and not self.closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def close(self):
+        """Wake up all waiting consumers"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class Stage:
+    """
+    One pipeline step running on its own worker thread
+
+    A stage without an inbox is a SOURCE: fn() is called in a loop.
+    Otherwise fn(packet) is called for every packet taken from the inbox.
+    Whatever fn returns (unless None) is pushed to the outbox.
+    """
+
+    def __init__(self, name, fn, inbox=None, outbox=None):
+        self.name = name
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+
+        # Stats
+        self.processed = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self.fps = 0.0
+        self._started_at = None
+        self._last_output = None
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name=f"stage-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            if self.inbox is None:
+                packet = None
+            else:
+                packet = self.inbox.get(timeout=0.1)
+                if packet is None:
+                    continue
+
+            start = time.time()
+            try:
+                out = self.fn() if self.inbox is None else self.fn(packet)
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ Stage '{self.name}' failed: {e}")
+                continue
+            end = time.time()
+            self.busy_time += end - start
+
+            if out is None:
+                continue
+
+            self.processed += 1
+            if self._last_output is not None:
+                # Smoothed output rate of this stage
+                instant_fps = 1.0 / max(end - self._last_output, 1e-6)
+                self.fps = instant_fps if self.fps == 0 else 0.9 * self.fps + 0.1 * instant_fps
+            self._last_output = end
+
+            if self.outbox is not None:
+                self.outbox.put(out)
+
+    def stats(self):
+        """Processed frames, drops at the input, output FPS and utilisation"""
+        elapsed = time.time() - self._started_at if self._started_at else 0
+        return {
+            'processed': self.processed,
+            'dropped': self.inbox.dropped if self.inbox is not None else 0,
+            'errors': self.errors,
+            'fps': round(self.fps, 1),
+            'busy_pct': round(100 * self.busy_time / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+class Pipeline:
+    """
+    Linear chain of stages connected by LatestQueues
+    """
+
+    def __init__(self):
+        self.stages = []
+
+    def add_stage(self, name, fn, maxsize=1):
+        """
+        Append a stage to the chain
+
+        Args:
+            name: Stage name (used in stats)
+            fn: Callable. The first stage is a source fn() -> packet,
+                later stages are fn(packet) -> packet or None to drop
+            maxsize: Inbox size for this stage (ignored for the source)
+
+        Returns:
+            The created Stage
+        """
+        inbox = None
+        if self.stages:
+            inbox = LatestQueue(maxsize)
+            self.stages[-1].outbox = inbox
+        stage = Stage(name, fn, inbox=inbox)
+        self.stages.append(stage)
+        return stage
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self, timeout=2.0):
+        for stage in self.stages:
+            stage.stop()
+            if stage.inbox is not None:
+                stage.inbox.close()
+        for stage in self.stages:
+            stage.join(timeout)
+
+    def stats(self):
+        """Per-stage stats keyed by stage name"""
+        return {stage.name: stage.stats() for stage in self.stages}
+
+    def print_stats(self):
+        print("📊 Pipeline stats:")
+        for name, s in self.stats().items():
+            print(f"   {name:<10} processed={s['processed']:<6} dropped={s['dropped']:<5} "
+                  f"fps={s['fps']:<5} busy={s['busy_pct']}%")
@@ -0,0 +1,333 @@
+"""
+INT8 Post-Training Quantization
+Builds a calibration set from our datasets (config.DATASETS), produces INT8
+artefacts and measures what they cost in accuracy and what they buy in speed:
+
+    1. FP32 ONNX export (baseline)
+    2. INT8 ONNX   - onnxruntime static quantization (QDQ), calibrated on
+                     letterboxed training images, the same preprocessing
+                     OnnxRuntimeBackend uses at runtime
+    3. INT8 TFLite - ultralytics export with int8=True (needs tensorflow)
+
+Every artefact is evaluated with YOLO.val on the dataset's val split
+(mAP50, mAP50-95) and timed on CPU through the same backends the drones
+use. The JSON report names the fastest artefact whose mAP50 drop stays
+within --max_map_drop.
+
+Usage:
+    python quantize_model.py --model fire_v8n.pt --dataset dfire
+    python quantize_model.py --model fire_v8n.pt --imgsz 320 --threads 4 --skip_tflite
+"""
+import argparse
+import json
+import random
+import shutil
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from config import DATASETS, MODELS_DIR
+from inference_backends import letterbox, load_backend
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+EVAL_SPLITS = ('val', 'valid', 'validation', 'test')
+
+
+def find_data_yaml(dataset_dir):
+    """data.yaml of a YOLO dataset folder (None if missing)"""
+    for name in ("data.yaml", "data.yml"):
+        path = Path(dataset_dir) / name
+        if path.exists():
+            return path
+    return None
+
+
+def calibration_images(dataset_dir, count=200, split="train", seed=0):
+    """
+    Random sample of image paths for calibration
+
+    Calibrates on the train split so the val split used for mAP stays unseen.
+    Without <split>/images it searches the whole dataset, minus every
+    val / test folder (e.g. val/images or images/val).
+    """
+    image_dir = Path(dataset_dir) / split / "images"
+    eval_dirs = ()
+    if not image_dir.exists():
+        image_dir = Path(dataset_dir)
+        eval_dirs = EVAL_SPLITS
+    paths = sorted(
+        p for p in image_dir.rglob("*")
+        if p.suffix.lower() in IMAGE_EXTENSIONS
+        and not any(part.lower() in eval_dirs for part in p.relative_to(image_dir).parts[:-1])
+    )
+    random.Random(seed).shuffle(paths)
+    return paths[:count]
+
+
+class CalibrationReader:
+    """
+    onnxruntime CalibrationDataReader: feeds letterboxed images one by one
+
+    Preprocessing matches OnnxRuntimeBackend (BGR -> RGB, CHW, 0..1), so the
+    activation ranges seen during calibration are the ones seen in flight.
+    """
+
+    def __init__(self, image_paths, input_name, size):
+        self.image_paths = list(image_paths)
+        self.input_name = input_name
+        self.size = size
+        self._padded = np.empty((size[0], size[1], 3), np.uint8)
+        self._iter = iter(self.image_paths)
+
+    def get_next(self):
+        for path in self._iter:
+            img = cv2.imread(str(path))
+            if img is None:
+                continue
+            padded, _, _ = letterbox(img, self.size, out=self._padded)
+            blob = (padded[..., ::-1].transpose(2, 0, 1)[None] / 255.0).astype(np.float32)
+            return {self.input_name: blob}
+        return None
+
+    def rewind(self):
+        self._iter = iter(self.image_paths)
+
+
+def export_onnx(model_path, imgsz, out_path):
+    """FP32 ONNX export with a static input shape (what the Pi runs)"""
+    from ultralytics import YOLO
+    # ultralytics writes next to the .pt, move it to the other artefacts
+    exported = YOLO(str(model_path)).export(format='onnx', imgsz=imgsz, dynamic=False, simplify=True)
+    return Path(shutil.move(str(exported), str(out_path)))
+
+
+def quantize_onnx(fp32_path, out_path, image_paths, method="minmax", per_channel=True):
+    """
+    Static INT8 quantization of an ONNX model
+
+    Args:
+        fp32_path: FP32 .onnx
+        out_path: Where to write the INT8 .onnx
+        image_paths: Calibration images
+        method: Calibration method ('minmax', 'entropy', 'percentile')
+        per_channel: Per-channel weight scales (better accuracy for convs)
+    """
+    import onnxruntime as ort
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    session = ort.InferenceSession(str(fp32_path), providers=['CPUExecutionProvider'])
+    model_input = session.get_inputs()[0]
+    _, _, h, w = model_input.shape
+    reader = CalibrationReader(image_paths, model_input.name, (h, w))
+
+    # Shape inference + graph cleanup first, as recommended by onnxruntime
+    prepared = Path(out_path).with_suffix(".prep.onnx")
+    try:
+        quant_pre_process(str(fp32_path), str(prepared))
+        source = prepared
+    except Exception as e:
+        print(f"   ⚠️ Pre-processing skipped: {e}")
+        source = fp32_path
+
+    methods = {
+        'minmax': CalibrationMethod.MinMax,
+        'entropy': CalibrationMethod.Entropy,
+        'percentile': CalibrationMethod.Percentile,
+    }
+    quantize_static(
+        str(source), str(out_path), reader,
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=per_channel,
+        calibrate_method=methods[method],
+    )
+    if prepared.exists():
+        prepared.unlink()
+    return Path(out_path)
+
+
+def export_tflite_int8(model_path, data_yaml, imgsz):
+    """INT8 TFLite export, ultralytics calibrates on the dataset in data_yaml"""
+    from ultralytics import YOLO
+    return Path(YOLO(str(model_path)).export(format='tflite', int8=True, data=str(data_yaml), imgsz=imgsz))
+
+
+def evaluate_map(model_path, data_yaml, imgsz):
+    """mAP50 / mAP50-95 on the val split"""
+    from ultralytics import YOLO
+    metrics = YOLO(str(model_path), task='detect').val(
+        data=str(data_yaml), imgsz=imgsz, batch=1, device='cpu', plots=False, verbose=False)
+    return {'map50': round(float(metrics.box.map50), 4), 'map50_95': round(float(metrics.box.map), 4)}
+
+
+def measure_latency(model_path, image_paths, imgsz, threads=0, runs=50, warmup=5):
+    """
+    Single-frame CPU latency through the same backend the drones use
+
+    Returns:
+        dict with mean / p50 / p95 latency in ms and FPS
+    """
+    backend = load_backend(model_path, threads=threads)
+    frames = [f for f in (cv2.imread(str(p)) for p in image_paths[:max(1, runs)]) if f is not None]
+    if not frames:
+        frames = [np.random.randint(0, 255, (imgsz, imgsz, 3), np.uint8)]
+
+    for i in range(warmup):
+        backend.predict([frames[i % len(frames)]], imgsz=imgsz)
+
+    times = np.empty(runs)
+    for i in range(runs):
+        start = time.perf_counter()
+        backend.predict([frames[i % len(frames)]], imgsz=imgsz)
+        times[i] = (time.perf_counter() - start) * 1000
+    return {
+        'latency_ms': round(float(times.mean()), 2),
+        'p50_ms': round(float(np.percentile(times, 50)), 2),
+        'p95_ms': round(float(np.percentile(times, 95)), 2),
+        'fps': round(1000 / float(times.mean()), 2),
+    }
+
+
+def assess(name, path, precision, data_yaml, image_paths, imgsz, threads, runs):
+    """Size, accuracy and latency of one artefact (errors are recorded, not raised)"""
+    entry = {'name': name, 'path': str(path), 'precision': precision}
+    try:
+        entry['size_mb'] = round(_size_bytes(path) / (1024 * 1024), 2)
+        entry.update(evaluate_map(path, data_yaml, imgsz))
+        entry.update(measure_latency(path, image_paths, imgsz, threads, runs))
+    except Exception as e:
+        entry['error'] = str(e)
+        print(f"   ❌ {name}: {e}")
+    return entry
+
+
+def _size_bytes(path):
+    path = Path(path)
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size
+
+
+def choose(artefacts, baseline, max_map_drop):
+    """
+    Fastest artefact whose mAP50 is within max_map_drop of the baseline
+
+    Adds 'map50_drop' and 'speedup' to every artefact in place.
+    """
+    candidates = []
+    for a in artefacts:
+        if 'error' in a or 'error' in baseline:
+            continue
+        a['map50_drop'] = round(baseline['map50'] - a['map50'], 4)
+        a['speedup'] = round(baseline['latency_ms'] / a['latency_ms'], 2)
+        if a['map50_drop'] <= max_map_drop:
+            candidates.append(a)
+    if not candidates:
+        return None
+    return min(candidates, key=lambda a: a['latency_ms'])['name']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="INT8 post-training quantization with accuracy/latency report")
+    parser.add_argument("--model", type=str, required=True, help="Source model (.pt)")
+    parser.add_argument("--dataset", type=str, default="dfire", choices=list(DATASETS),
+                        help="Dataset (config.DATASETS) for calibration and mAP")
+    parser.add_argument("--imgsz", type=int, default=320, help="Export / evaluation input size")
+    parser.add_argument("--calib_images", type=int, default=200, help="Number of calibration images")
+    parser.add_argument("--calib_method", choices=['minmax', 'entropy', 'percentile'], default='minmax',
+                        help="ONNX Runtime calibration method")
+    parser.add_argument("--threads", type=int, default=0, help="ONNX Runtime intra-op threads (0 = default)")
+    parser.add_argument("--runs", type=int, default=50, help="Timed frames per artefact")
+    parser.add_argument("--max_map_drop", type=float, default=0.01,
+                        help="Accepted mAP50 loss vs FP32 (absolute, 0.01 = 1 point)")
+    parser.add_argument("--skip_tflite", action="store_true", help="Don't build the TFLite INT8 artefact")
+    parser.add_argument("--out_dir", type=str, default=str(MODELS_DIR / "quantized"), help="Output folder")
+    parser.add_argument("--report", type=str, default=None,
+                        help="Report path (default: <out_dir>/<model>_quantization.json)")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("🧮 INT8 QUANTIZATION")
+    print("=" * 70)
+
+    dataset_dir = DATASETS[args.dataset]
+    data_yaml = find_data_yaml(dataset_dir)
+    if data_yaml is None:
+        print(f"❌ No data.yaml in {dataset_dir} (run download_fire_datasets.py first)")
+        return
+
+    image_paths = calibration_images(dataset_dir, args.calib_images)
+    if not image_paths:
+        print(f"❌ No calibration images found in {dataset_dir}")
+        return
+    print(f"📊 Calibration: {len(image_paths)} images from {dataset_dir}")
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = Path(args.model).stem
+    common = dict(data_yaml=data_yaml, image_paths=image_paths, imgsz=args.imgsz,
+                  threads=args.threads, runs=args.runs)
+    artefacts = []
+
+    print("\n1️⃣ FP32 ONNX (baseline)...")
+    fp32 = export_onnx(args.model, args.imgsz, out_dir / f"{stem}_{args.imgsz}_fp32.onnx")
+    baseline = assess("onnx_fp32", fp32, "fp32", **common)
+    artefacts.append(baseline)
+
+    print("\n2️⃣ INT8 ONNX (static, QDQ)...")
+    try:
+        int8 = quantize_onnx(fp32, out_dir / f"{stem}_{args.imgsz}_int8.onnx", image_paths, args.calib_method)
+        artefacts.append(assess("onnx_int8", int8, "int8", **common))
+    except Exception as e:
+        print(f"   ❌ ONNX quantization failed: {e}")
+        artefacts.append({'name': 'onnx_int8', 'precision': 'int8', 'error': str(e)})
+
+    if not args.skip_tflite:
+        print("\n3️⃣ INT8 TFLite...")
+        try:
+            tflite = export_tflite_int8(args.model, data_yaml, args.imgsz)
+            artefacts.append(assess("tflite_int8", tflite, "int8", **common))
+        except Exception as e:
+            print(f"   ⚠️ TFLite export failed (may need tensorflow): {e}")
+            artefacts.append({'name': 'tflite_int8', 'precision': 'int8', 'error': str(e)})
+
+    recommended = choose(artefacts, baseline, args.max_map_drop)
+    report = {
+        'model': str(args.model),
+        'dataset': str(dataset_dir),
+        'imgsz': args.imgsz,
+        'calibration_images': len(image_paths),
+        'calibration_method': args.calib_method,
+        'threads': args.threads,
+        'max_map_drop': args.max_map_drop,
+        'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'artefacts': artefacts,
+        'recommended': recommended,
+    }
+    report_path = Path(args.report) if args.report else out_dir / f"{stem}_quantization.json"
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("\n" + "=" * 70)
+    print("📊 RESULTS")
+    print("=" * 70)
+    print(f"{'Artefact':<14}{'Size MB':>9}{'mAP50':>8}{'mAP50-95':>10}{'ms':>9}{'FPS':>8}{'Speedup':>9}")
+    for a in artefacts:
+        if 'error' in a:
+            print(f"{a['name']:<14}  failed: {a['error'][:50]}")
+            continue
+        print(f"{a['name']:<14}{a['size_mb']:>9}{a['map50']:>8}{a['map50_95']:>10}"
+              f"{a['latency_ms']:>9}{a['fps']:>8}{a.get('speedup', 1.0):>8}x")
+    if recommended:
+        print(f"\n✅ Ship: {recommended} (mAP50 drop <= {args.max_map_drop})")
+    else:
+        print(f"\n⚠️ No artefact within {args.max_map_drop} mAP50 of the baseline")
+    print(f"📄 Report: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+RGB <-> Thermal Registration
+The P2Pro thermal image (256x192) and the RGB camera (1280x720) look at
+the same scene from slightly different places and with different lenses.
+A homography, calibrated ONCE and stored as JSON, maps thermal pixels to
+RGB pixels. From it we precompute:
+
+    - cv2.remap lookup tables (fixed-point, via cv2.convertMaps) that warp
+      a whole thermal frame into RGB geometry, or RGB into thermal
+    - box / point projection in both directions
+
+Maps are built on first use per output size and then reused, so the
+per-frame cost is one cv2.remap into a reusable buffer and no
+recomputation.
+
+Calibration (heated checkerboard visible to both cameras, or point pairs):
+    python registration.py --rgb rgb.jpg --thermal thermal.png --pattern 7x5
+    python registration.py --rgb_size 1280x720 --thermal_size 256x192 --points pairs.json
+
+Usage:
+    reg = Registration.load()                       # default calibration file
+    aligned = reg.warp_thermal(thermal_frame)        # thermal in RGB pixel space
+    rgb_boxes = reg.thermal_to_rgb(thermal_xyxy)
+    fuse(rgb, thermal, transform=reg.thermal_to_rgb)
+"""
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from fusion import transform_boxes
+
+
+def default_path():
+    """Calibration file used when none is given"""
+    from config import DATA_DIR
+    return DATA_DIR / "calibration" / "rgb_thermal.json"
+
+
+def _scale_matrix(sx, sy):
+    return np.array([[sx, 0, 0], [0, sy, 0], [0, 0, 1]], np.float64)
+
+
+class Registration:
+    """Thermal -> RGB homography with cached remap tables"""
+
+    def __init__(self, homography, rgb_size, thermal_size, rms_px=None):
+        """
+        Args:
+            homography: 3x3 matrix mapping thermal pixels to RGB pixels
+            rgb_size: (width, height) of the RGB frames it was calibrated on
+            thermal_size: (width, height) of the thermal frames
+            rms_px: Reprojection error of the calibration in RGB pixels
+        """
+        self.homography = np.asarray(homography, np.float64).reshape(3, 3)
+        self.inverse = np.linalg.inv(self.homography)
+        self.rgb_size = tuple(int(v) for v in rgb_size)
+        self.thermal_size = tuple(int(v) for v in thermal_size)
+        self.rms_px = rms_px
+        self._maps = {}      # (direction, in size, out size) -> (map1, map2)
+        self._buffers = {}   # (direction, out shape) -> reusable output image
+        self._resized = {}   # (rgb size, thermal size) -> Registration
+
+    @classmethod
+    def from_sizes(cls, rgb_size, thermal_size):
+        """Co-boresighted cameras: the thermal image is just a scaled RGB image"""
+        return cls(_scale_matrix(rgb_size[0] / thermal_size[0], rgb_size[1] / thermal_size[1]),
+                   rgb_size, thermal_size)
+
+    @classmethod
+    def from_points(cls, thermal_points, rgb_points, rgb_size, thermal_size):
+        """
+        Fit the homography to matching points (RANSAC when more than 4)
+
+        Args:
+            thermal_points: (N, 2) pixel positions in the thermal image
+            rgb_points: (N, 2) positions of the same spots in the RGB image
+        """
+        src = np.asarray(thermal_points, np.float64).reshape(-1, 2)
+        dst = np.asarray(rgb_points, np.float64).reshape(-1, 2)
+        if len(src) < 4 or len(src) != len(dst):
+            raise ValueError(f"Need at least 4 matching point pairs, got {len(src)} / {len(dst)}")
+        homography, _ = cv2.findHomography(src, dst, cv2.RANSAC if len(src) > 4 else 0, 3.0)
+        if homography is None:
+            raise ValueError("Could not fit a homography to the points")
+        registration = cls(homography, rgb_size, thermal_size)
+        error = registration.project_points(src) - dst
+        registration.rms_px = float(np.sqrt((error ** 2).sum(1).mean()))
+        return registration
+
+    @classmethod
+    def load(cls, path=None):
+        path = path or default_path()
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data['homography'], data['rgb_size'], data['thermal_size'], data.get('rms_px'))
+
+    def save(self, path=None):
+        path = path or default_path()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({
+                'homography': self.homography.tolist(),
+                'rgb_size': list(self.rgb_size),
+                'thermal_size': list(self.thermal_size),
+                'rms_px': self.rms_px,
+                'created': time.strftime("%Y-%m-%d %H:%M:%S"),
+            }, f, indent=2)
+        return path
+
+    def for_sizes(self, rgb_size, thermal_size):
+        """The same calibration for frames captured at other resolutions"""
+        key = (tuple(rgb_size), tuple(thermal_size))
+        if key == (self.rgb_size, self.thermal_size):
+            return self
+        registration = self._resized.get(key)
+        if registration is None:
+            to_rgb = _scale_matrix(rgb_size[0] / self.rgb_size[0], rgb_size[1] / self.rgb_size[1])
+            from_thermal = _scale_matrix(self.thermal_size[0] / thermal_size[0], self.thermal_size[1] / thermal_size[1])
+            registration = Registration(to_rgb @ self.homography @ from_thermal, rgb_size, thermal_size, self.rms_px)
+            self._resized[key] = registration
+        return registration
+
+    # --- Points and boxes ---
+    def project_points(self, points, inverse=False):
+        """(N, 2) thermal points -> RGB (or RGB -> thermal with inverse=True)"""
+        points = np.asarray(points, np.float64).reshape(-1, 1, 2)
+        matrix = self.inverse if inverse else self.homography
+        return cv2.perspectiveTransform(points, matrix).reshape(-1, 2)
+
+    def thermal_to_rgb(self, xyxy):
+        """Thermal xyxy boxes -> axis-aligned RGB boxes"""
+        return transform_boxes(xyxy, self.homography)
+
+    def rgb_to_thermal(self, xyxy):
+        """RGB xyxy boxes -> axis-aligned thermal boxes (e.g. ROI crops on the thermal frame)"""
+        return transform_boxes(xyxy, self.inverse)
+
+    # --- Whole images ---
+    def _remap_tables(self, direction, in_size, out_size):
+        """Fixed-point remap tables, computed once per (direction, sizes)"""
+        key = (direction, in_size, out_size)
+        maps = self._maps.get(key)
+        if maps is None:
+            if direction == 'thermal_to_rgb':
+                registration = self.for_sizes(out_size, in_size)
+                back = registration.inverse           # output RGB pixel -> thermal source pixel
+            else:
+                registration = self.for_sizes(in_size, out_size)
+                back = registration.homography        # output thermal pixel -> RGB source pixel
+            xs, ys = np.meshgrid(np.arange(out_size[0], dtype=np.float64),
+                                 np.arange(out_size[1], dtype=np.float64))
+            denom = back[2, 0] * xs + back[2, 1] * ys + back[2, 2]
+            map_x = ((back[0, 0] * xs + back[0, 1] * ys + back[0, 2]) / denom).astype(np.float32)
+            map_y = ((back[1, 0] * xs + back[1, 1] * ys + back[1, 2]) / denom).astype(np.float32)
+            maps = cv2.convertMaps(map_x, map_y, cv2.CV_16SC2)
+            self._maps[key] = maps
+        return maps
+
+    def _warp(self, image, direction, out_size, dst, interpolation):
+        in_size = (image.shape[1], image.shape[0])
+        map1, map2 = self._remap_tables(direction, in_size, tuple(out_size))
+        if dst is None:
+            # Reuse one output buffer per direction/shape; copy it if you keep the result
+            shape = (out_size[1], out_size[0]) + image.shape[2:]
+            key = (direction, shape, image.dtype.str)
+            dst = self._buffers.get(key)
+            if dst is None:
+                dst = self._buffers[key] = np.empty(shape, image.dtype)
+        return cv2.remap(image, map1, map2, interpolation, dst=dst, borderMode=cv2.BORDER_CONSTANT)
+
+    def warp_thermal(self, thermal, rgb_size=None, dst=None, interpolation=cv2.INTER_LINEAR):
+        """Thermal image resampled into RGB pixel space (default: calibration RGB size)"""
+        return self._warp(thermal, 'thermal_to_rgb', rgb_size or self.rgb_size, dst, interpolation)
+
+    def warp_rgb(self, rgb, thermal_size=None, dst=None, interpolation=cv2.INTER_AREA):
+        """RGB image resampled into thermal pixel space (default: calibration thermal size)"""
+        return self._warp(rgb, 'rgb_to_thermal', thermal_size or self.thermal_size, dst, interpolation)
+
+
+def _parse_size(text):
+    w, h = text.lower().split('x')
+    return int(w), int(h)
+
+
+def _find_pattern(image, pattern):
+    """Inner chessboard corners, refined to sub-pixel accuracy"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    found, corners = cv2.findChessboardCorners(gray, pattern)
+    if not found:
+        return None
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.01)
+    corners = cv2.cornerSubPix(gray, corners, (5, 5), (-1, -1), criteria)
+    return corners.reshape(-1, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate the RGB <-> thermal registration")
+    parser.add_argument("--rgb", type=str, default=None, help="RGB image showing the calibration target")
+    parser.add_argument("--thermal", type=str, default=None, help="Thermal image of the same moment")
+    parser.add_argument("--pattern", type=str, default=None, help="Inner chessboard corners, e.g. 7x5")
+    parser.add_argument("--points", type=str, default=None,
+                        help="JSON list of [[thermal_x, thermal_y], [rgb_x, rgb_y]] pairs")
+    parser.add_argument("--rgb_size", type=str, default=None, help="RGB size WxH (default: from --rgb)")
+    parser.add_argument("--thermal_size", type=str, default="256x192", help="Thermal size WxH")
+    parser.add_argument("--out", type=str, default=None, help="Output JSON (default: data/calibration/rgb_thermal.json)")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("📐 RGB ↔ THERMAL REGISTRATION")
+    print("=" * 70)
+
+    rgb = cv2.imread(args.rgb) if args.rgb else None
+    thermal = cv2.imread(args.thermal) if args.thermal else None
+    rgb_size = _parse_size(args.rgb_size) if args.rgb_size else (rgb.shape[1], rgb.shape[0]) if rgb is not None else None
+    thermal_size = (thermal.shape[1], thermal.shape[0]) if thermal is not None else _parse_size(args.thermal_size)
+    if rgb_size is None:
+        print("❌ Need --rgb or --rgb_size")
+        return
+
+    if args.points:
+        with open(args.points) as f:
+            pairs = np.asarray(json.load(f), np.float64)
+        thermal_points, rgb_points = pairs[:, 0], pairs[:, 1]
+        print(f"📍 {len(pairs)} point pairs from {args.points}")
+    elif args.pattern and rgb is not None and thermal is not None:
+        pattern = _parse_size(args.pattern)
+        rgb_points = _find_pattern(rgb, pattern)
+        thermal_points = _find_pattern(thermal, pattern)
+        if rgb_points is None or thermal_points is None:
+            print(f"❌ Checkerboard {args.pattern} not found in "
+                  f"{'RGB' if rgb_points is None else 'thermal'} image")
+            return
+        print(f"♟️ Checkerboard found in both images ({len(rgb_points)} corners)")
+    else:
+        print("❌ Need --points, or --rgb + --thermal + --pattern")
+        return
+
+    registration = Registration.from_points(thermal_points, rgb_points, rgb_size, thermal_size)
+    path = registration.save(args.out)
+    print(f"✅ Homography fitted, reprojection error {registration.rms_px:.2f}px (RGB)")
+    print(f"💾 Saved: {path}")
+
+    if rgb is not None and thermal is not None:
+        overlay = cv2.addWeighted(rgb, 0.5, registration.warp_thermal(thermal, (rgb.shape[1], rgb.shape[0])), 0.5, 0)
+        preview = os.path.splitext(str(path))[0] + "_preview.jpg"
+        cv2.imwrite(preview, overlay)
+        print(f"🖼️ Overlay preview: {preview}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,19 @@
 import cv2
-from ultralytics import YOLO
 import socket
 import json
 import time
 import os
-import base64
 import argparse
-import numpy as np
+
+from pipeline import Pipeline, LatestQueue
+from inference_backends import load_backend, BACKENDS
+from change_gate import ChangeGate
+from adaptive_resolution import ResolutionController
+from tracking import BoxTracker
+from annotation import Annotator
+from inference_cache import InferenceCache
+from thermal_simulation import ThermalSimulator
+from degradation import DeadlineScheduler, prefilter_detections
 
 # --- ARGUMENT PARSING ---
 parser = argparse.ArgumentParser(description='Drone Simulation')
@@ -14,41 +21,47 @@ parser.add_argument('--id', type=str, default='A1', help='Drone ID')
 parser.add_argument('--port', type=int, default=5005, help='UDP Port')
 parser.add_argument('--file', type=str, default='live_frame.jpg', help='Frame save path')
 parser.add_argument('--start_index', type=int, default=0, help='Start index for image dataset')
+parser.add_argument('--headless', action='store_true', help='No OpenCV window (Ctrl+C to stop)')
+parser.add_argument('--no_frames', action='store_true', help='Do not save annotated frames for the dashboard')
 parser.add_argument('--record', action='store_true', help='Enable recording for training data')
 parser.add_argument('--thermal', action='store_true', help='Enable thermal vision simulation')
 parser.add_argument('--thermal_mode', type=str, default='inferno', 
                    choices=['white_hot', 'black_hot', 'inferno', 'jet', 'hot'],
                    help='Thermal colormap mode')
+parser.add_argument('--model', type=str, default=None, help='Model path (.pt or .onnx)')
+parser.add_argument('--backend', type=str, default='auto', choices=BACKENDS,
+                   help='Inference runtime (auto picks onnx for .onnx files)')
+parser.add_argument('--threads', type=int, default=0, help='ONNX Runtime intra-op threads (0 = default)')
+parser.add_argument('--inference_server', type=str, default=None,
+                   help='host:port of a shared inference_server.py (skips loading a local model)')
+parser.add_argument('--latency_budget', type=float, default=None,
+                   help='Per-frame latency budget in ms; adapts model input size (local model only)')
+parser.add_argument('--gate', action='store_true',
+                   help='Skip inference on frames that barely changed (reuse last detections)')
+parser.add_argument('--gate_ratio', type=float, default=0.01,
+                   help='Fraction of changed thumbnail pixels that triggers inference')
+parser.add_argument('--gate_pixel_delta', type=int, default=15,
+                   help='Gray-level difference for a thumbnail pixel to count as changed')
+parser.add_argument('--gate_max_skip', type=int, default=30,
+                   help='Force inference after this many consecutive skipped frames')
+parser.add_argument('--cache', action='store_true',
+                   help='Cache detections by frame content + model + params (for replayed datasets)')
+parser.add_argument('--cache_dir', type=str, default=None,
+                   help='Also keep cache entries on disk here (shared between drones and runs)')
+parser.add_argument('--detect_every', type=int, default=1,
+                   help='Run the model every N frames and track boxes in between (1 = every frame)')
+parser.add_argument('--deadline', type=float, default=None,
+                   help='Per-frame deadline in ms (capture to telemetry); degrades gracefully when missed')
+parser.add_argument('--low_res', type=int, default=320,
+                   help='Model input size in the LOW_RES degradation mode')
 args = parser.parse_args()
 
 # --- THERMAL SIMULATION ---
 THERMAL_ENABLED = args.thermal
 THERMAL_MODE = args.thermal_mode
 
-def apply_thermal_filter(frame, mode='inferno'):
-    """Convert RGB frame to simulated thermal imagery"""
-    # Convert to grayscale
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    
-    # Enhance contrast
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-    enhanced = clahe.apply(gray)
-    
-    if mode == 'white_hot':
-        thermal = cv2.bitwise_not(enhanced)
-        thermal = cv2.cvtColor(thermal, cv2.COLOR_GRAY2BGR)
-    elif mode == 'black_hot':
-        thermal = cv2.cvtColor(enhanced, cv2.COLOR_GRAY2BGR)
-    elif mode == 'inferno':
-        thermal = cv2.applyColorMap(enhanced, cv2.COLORMAP_INFERNO)
-    elif mode == 'jet':
-        thermal = cv2.applyColorMap(enhanced, cv2.COLORMAP_JET)
-    elif mode == 'hot':
-        thermal = cv2.applyColorMap(enhanced, cv2.COLORMAP_HOT)
-    else:
-        thermal = cv2.applyColorMap(enhanced, cv2.COLORMAP_INFERNO)
-    
-    return thermal
+# One engine for every frame: cached CLAHE and colormap LUTs
+thermal_sim = ThermalSimulator(mode=THERMAL_MODE)
 
 # --- CONFIGURATION ---
 from config import DATA_DIR, MODELS_DIR
@@ -57,15 +70,19 @@ DRONE_ID = args.id
 UDP_IP = "127.0.0.1"
 UDP_PORT = args.port
 VIDEO_PATH = str(DATA_DIR / "DFireDataset/test/images")
-MODEL_PATH = str(MODELS_DIR / "fire_v8s.pt")
+MODEL_PATH = args.model or str(MODELS_DIR / "fire_v8s.pt")
+MODEL_CONF = 0.25
 FRAME_SAVE_PATH = args.file
-SEND_FRAMES_TO_DASHBOARD = True
+SEND_FRAMES_TO_DASHBOARD = not args.no_frames
+HEADLESS = args.headless
 START_INDEX = args.start_index
 ENABLE_RECORDING = args.record
 
 print(f"🦅 DRONE {DRONE_ID} SIMULATION STARTING ON PORT {UDP_PORT}...")
 if THERMAL_ENABLED:
     print(f"🌡️ THERMAL MODE: {THERMAL_MODE}")
+if HEADLESS:
+    print("🕶️ HEADLESS: no window, press Ctrl+C to stop")
 print("=" * 50)
 
 # --- OPTIONAL: RECORDING FOR TRAINING DATA ---
@@ -82,15 +99,71 @@ if ENABLE_RECORDING:
 # --- SETUP UDP ---
 sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
 
-# --- LOAD MODEL ---
-print(f"📥 Loading Model: {MODEL_PATH}")
-try:
-    model = YOLO(MODEL_PATH)
-    print("✅ Model loaded successfully")
-except Exception as e:
-    print(f"❌ Error loading model: {e}")
-    print("   (Make sure you have internet to download it first time)")
-    exit()
+# --- LOAD MODEL (or connect to the shared inference server) ---
+model = None
+inference_client = None
+if args.inference_server:
+    from inference_server import InferenceClient, parse_address
+    print(f"🧠 Using shared inference server at {args.inference_server}")
+    try:
+        inference_client = InferenceClient(DRONE_ID, parse_address(args.inference_server))
+        print("✅ Connected to inference server")
+    except Exception as e:
+        print(f"❌ Could not connect to inference server: {e}")
+        exit()
+else:
+    print(f"📥 Loading Model: {MODEL_PATH}")
+    try:
+        model = load_backend(MODEL_PATH, args.backend, threads=args.threads)
+        print("✅ Model loaded successfully")
+    except Exception as e:
+        print(f"❌ Error loading model: {e}")
+        print("   (Make sure you have internet to download it first time)")
+        exit()
+
+# --- OPTIONAL: ADAPTIVE INPUT RESOLUTION ---
+resolution = None
+if args.latency_budget and model is not None:
+    if model.dynamic_input:
+        resolution = ResolutionController(budget_ms=args.latency_budget)
+        print(f"⏱️ Latency budget {args.latency_budget:.0f}ms, input sizes {resolution.sizes}")
+    else:
+        print("⚠️ Model has a fixed input size, latency budget ignored")
+
+# --- OPTIONAL: CHANGE GATE IN FRONT OF INFERENCE ---
+change_gate = None
+if args.gate:
+    change_gate = ChangeGate(pixel_delta=args.gate_pixel_delta,
+                             change_ratio=args.gate_ratio,
+                             max_skip=args.gate_max_skip)
+    print(f"🚦 Change gate ENABLED (ratio={args.gate_ratio}, delta={args.gate_pixel_delta})")
+
+# --- OPTIONAL: INFERENCE RESULT CACHE ---
+inference_cache = None
+if args.cache or args.cache_dir:
+    if model is not None:
+        cache_model, cache_names = MODEL_PATH, model.names
+        cache_params = {'backend': model.runtime, 'conf': MODEL_CONF}
+    else:
+        # Keyed by the weights and params the server actually runs, not by its address
+        server_info = inference_client.server_info
+        cache_model = f"server:{server_info.get('model_hash', args.inference_server)}"
+        cache_names = server_info.get('names')
+        cache_params = {'backend': server_info.get('backend'), 'conf': server_info.get('conf')}
+    inference_cache = InferenceCache(cache_model, names=cache_names, cache_dir=args.cache_dir)
+    print(f"🗃️ Inference cache ENABLED{f' (disk: {args.cache_dir})' if args.cache_dir else ''}")
+
+# --- OPTIONAL: DETECT EVERY N FRAMES, TRACK IN BETWEEN ---
+tracker = None
+if args.detect_every > 1:
+    tracker = BoxTracker(every=args.detect_every)
+    print(f"🎯 Tracking ENABLED (model every {args.detect_every} frames)")
+
+# --- OPTIONAL: DEADLINE SCHEDULER (graceful degradation under load) ---
+degradation = None
+if args.deadline:
+    degradation = DeadlineScheduler(deadline_ms=args.deadline)
+    print(f"⏳ Deadline {args.deadline:.0f}ms per frame, degrading gracefully when missed")
 
 # --- OPEN VIDEO SOURCE ---
 image_files = []
@@ -129,16 +202,26 @@ print("   Press 'm' to cycle thermal colormap")
 print("   Press 'q' to quit")
 print("=" * 50)
 
-# Thermal mode state (can toggle at runtime)
+# Runtime state (toggled from the key handler, read by the pipeline stages)
 thermal_modes = ['white_hot', 'black_hot', 'inferno', 'jet', 'hot']
-thermal_mode_idx = thermal_modes.index(THERMAL_MODE) if THERMAL_MODE in thermal_modes else 2
+state = {
+    'thermal_enabled': THERMAL_ENABLED,
+    'thermal_mode': THERMAL_MODE,
+    'thermal_mode_idx': thermal_modes.index(THERMAL_MODE) if THERMAL_MODE in thermal_modes else 2,
+    # Manual fire override
+    'manual_fire_frames': 0,
+}
+
+# Latest annotated frame for the OpenCV window (shown from the main thread)
+display_queue = LatestQueue(1)
+# Reusable buffers for annotated frames (display may lag a frame or two behind)
+annotator = Annotator(buffers=3)
 
-# Manual fire override state
-manual_fire_active = False
-manual_fire_frames = 0
 
-while True:
-    # --- READ FRAME ---
+# --- PIPELINE STAGES ---
+def read_frame():
+    """Source stage: next image from the dataset or next video frame"""
+    global current_img_idx
     if using_images:
         frame = cv2.imread(image_files[current_img_idx])
         current_img_idx = (current_img_idx + 1) % len(image_files)
@@ -148,136 +231,266 @@ while True:
         if not ret:
             print("End of video, looping...")
             cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            continue
+            return None
 
     if frame is None:
         print("⚠️ Empty frame, skipping...")
-        continue
+        return None
+
+    return {
+        'frame': frame,
+        'frame_idx': current_img_idx if using_images else -1,
+        't_capture': time.time(),
+    }
+
+
+def preprocess(packet):
+    """Thermal simulation (if enabled)"""
+    # REDUCED_FPS: shed frames before doing any work on them
+    if degradation is not None and not degradation.admit():
+        return None
+    packet['thermal'] = state['thermal_enabled']
+    packet['thermal_mode'] = state['thermal_mode']
+    if packet['thermal']:
+        packet['frame'] = thermal_sim.convert(packet['frame'], mode=packet['thermal_mode'])
+    return packet
+
+
+def low_res():
+    """LOW_RES degradation mode is active and the local model can use it"""
+    return degradation is not None and degradation.low_res and model is not None and model.dynamic_input
+
+
+def infer(frame):
+    """Detections for a frame, from the cache when it has seen these pixels before"""
+    if inference_cache is not None:
+        imgsz = args.low_res if low_res() else resolution.size if resolution is not None else None
+        return inference_cache.lookup(frame, run_model, imgsz=imgsz, **cache_params)
+    return run_model(frame)
+
 
-    # --- APPLY THERMAL FILTER (if enabled) ---
-    if THERMAL_ENABLED:
-        frame = apply_thermal_filter(frame, THERMAL_MODE)
+def run_model(frame):
+    """Run the local model or the shared inference server"""
+    if inference_client is not None:
+        return inference_client(frame)
+    if low_res():
+        return model.predict([frame], conf=MODEL_CONF, imgsz=args.low_res)[0]
+    if resolution is not None:
+        start = time.time()
+        detections = model.predict([frame], conf=MODEL_CONF, imgsz=resolution.size)[0]
+        resolution.update((time.time() - start) * 1000)
+        return detections
+    return model.predict([frame], conf=MODEL_CONF)[0]
 
-    # --- INFERENCE ---
+
+last_detections = None
+
+
+def run_inference(packet):
+    """Run the model (unless the change gate or tracker make it unnecessary) and summarise the detections"""
+    global last_detections
     start_time = time.time()
-    results = model(frame, verbose=False)
+    prefilter_only = degradation is not None and degradation.prefilter_only
+    skip = not prefilter_only and change_gate is not None and not change_gate.should_infer(packet['frame'])
+    tracked = False
+    if prefilter_only:
+        # Overloaded: cheap brightness / heat prefilter instead of the model
+        detections = prefilter_detections(packet['frame'], model.names if model is not None else None,
+                                          thermal=packet['thermal'])
+        last_detections = detections
+    elif skip and last_detections is not None:
+        detections = last_detections
+    elif tracker is not None:
+        detections, ran = tracker.step(packet['frame'], infer)
+        tracked = not ran
+        last_detections = detections
+    else:
+        detections = infer(packet['frame'])
+        last_detections = detections
+    packet['reused'] = skip
+    packet['tracked'] = tracked
     end_time = time.time()
-    inference_time = (end_time - start_time) * 1000  # ms
-    
-    # --- PROCESS RESULTS ---
-    fire_detected = False
-    confidence = 0.0
-    detections_count = 0
-    
+
     # Check detections
     # NOTE: Standard YOLOv8n uses COCO classes (no 'fire' class)
     # For demo, any detection triggers alert. Train on D-Fire for real fire detection.
-    for r in results:
-        boxes = r.boxes
-        detections_count = len(boxes)
-        if detections_count > 0:
-            fire_detected = True
-            confidence = float(boxes.conf[0])
+    detections_count = len(detections)
+    fire_detected = detections_count > 0
+    confidence = float(detections.conf[0]) if fire_detected else 0.0
+
+    packet.update({
+        'boxes': detections,
+        'inference_ms': (end_time - start_time) * 1000,
+        'fire': fire_detected,
+        'conf': confidence,
+        'detections': detections_count,
+    })
+    return packet
+
+
+def publish(packet):
+    """Send telemetry, save the dashboard frame and prepare the display frame"""
+    detections = packet['boxes']
+    fire_detected = packet['fire']
+    confidence = packet['conf']
+    detections_count = packet['detections']
+    inference_time = packet['inference_ms']
 
     # --- MANUAL FIRE OVERRIDE ---
-    if manual_fire_active:
+    if state['manual_fire_frames'] > 0:
         fire_detected = True
         confidence = 0.95
-        manual_fire_frames -= 1
-        if manual_fire_frames <= 0:
-            manual_fire_active = False
+        state['manual_fire_frames'] -= 1
+        if state['manual_fire_frames'] <= 0:
             print("🔥 Manual fire override ended")
+    packet['fire'] = fire_detected
+    packet['conf'] = confidence
 
     # --- BUILD TELEMETRY ---
     lat = 44.8125 + (time.time() % 100) * 0.0001
     lon = 20.4612 + (time.time() % 50) * 0.0001
-    
-    fps = 1.0 / (end_time - start_time) if (end_time - start_time) > 0 else 0
-    
+    packet['gps'] = [lat, lon]
+
+    # Throughput of the inference stage (not 1 / inference time)
+    fps = inference_stage.fps
+    latency_ms = (time.time() - packet['t_capture']) * 1000
+
     telemetry = {
         "id": DRONE_ID,
-        "gps": [lat, lon], 
+        "gps": [lat, lon],
         "fire": fire_detected,
         "conf": confidence,
         "fps": round(fps, 1),
         "inference_ms": round(inference_time, 1),
+        "latency_ms": round(latency_ms, 1),
         "detections": detections_count,
         "timestamp": time.strftime("%H:%M:%S"),
-        "frame_idx": current_img_idx if using_images else -1
+        "frame_idx": packet['frame_idx']
     }
-    
-    # --- SEND TELEMETRY VIA UDP ---
+    if resolution is not None:
+        telemetry["imgsz"] = resolution.size
+    if change_gate is not None:
+        telemetry["reused"] = packet['reused']
+        telemetry["inferred"] = change_gate.inferred
+        telemetry["skipped"] = change_gate.skipped
+    if tracker is not None:
+        telemetry["tracked"] = packet['tracked']
+        telemetry["track_ids"] = [int(i) for i in detections.ids] if detections.ids is not None else []
+    if degradation is not None:
+        telemetry["mode"] = degradation.mode_name
+    packet['telemetry'] = telemetry
+
+    # --- SEND TELEMETRY VIA UDP (in every degradation mode, alerts must get out) ---
     message = json.dumps(telemetry).encode()
     sock.sendto(message, (UDP_IP, UDP_PORT))
-    
-    # --- RECORD FOR TRAINING DATA ---
-    if ENABLE_RECORDING and recorder:
-        recorder.save_frame(frame)
-        recorder.log_telemetry(telemetry)
-        if fire_detected:
-            recorder.log_detection({
-                "timestamp": time.time(),
-                "gps": [lat, lon],
-                "confidence": confidence,
-                "detections": detections_count,
-                "frame_idx": current_img_idx if using_images else -1
-            })
-    
+
+    if degradation is not None:
+        degradation.update((time.time() - packet['t_capture']) * 1000)
+        if not degradation.annotate:
+            return packet
+
+    # --- ANNOTATED FRAME (rendered once, only if someone reads it) ---
+    annotation = annotator.annotate(packet['frame'], detections)
+    status_color = (0, 0, 255) if fire_detected else (0, 255, 0)
+    status_text = "🔥 FIRE DETECTED" if fire_detected else "✓ SCANNING"
+    mode_text = f"[THERMAL: {packet['thermal_mode']}]" if packet['thermal'] else "[RGB MODE]"
+    annotation.text(status_text, (10, 30), status_color, 0.8, 2)
+    annotation.text(f"FPS: {fps:.1f} | Inference: {inference_time:.0f}ms", (10, 60))
+    annotation.text(f"Conf: {confidence:.2f} | Detections: {detections_count}", (10, 85))
+    annotation.text(f"{mode_text} | 'f'=Fire 't'=Thermal 'm'=Mode 'q'=Quit", (10, 110), (0, 255, 255), 0.5, 2)
+
     # --- SAVE FRAME FOR DASHBOARD ---
     if SEND_FRAMES_TO_DASHBOARD:
-        # Draw annotations on frame
-        annotated_frame = results[0].plot()
-        
-        # Add status overlay
-        status_color = (0, 0, 255) if fire_detected else (0, 255, 0)
-        status_text = "🔥 FIRE DETECTED" if fire_detected else "✓ SCANNING"
-        cv2.putText(annotated_frame, status_text, (10, 30), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, status_color, 2)
-        cv2.putText(annotated_frame, f"FPS: {fps:.1f} | Inference: {inference_time:.0f}ms", 
-                    (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-        cv2.putText(annotated_frame, f"Conf: {confidence:.2f} | Detections: {detections_count}", 
-                    (10, 85), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-        
-        # Save frame for dashboard to read
         try:
-            cv2.imwrite(FRAME_SAVE_PATH, annotated_frame)
+            cv2.imwrite(FRAME_SAVE_PATH, annotation.image)
         except Exception as e:
             print(f"⚠️ Could not save frame: {e}")
-    
-    # --- DISPLAY IN OPENCV WINDOW (Optional - can be disabled) ---
-    display_frame = results[0].plot()
-    
-    # Build info text
-    mode_text = f"[THERMAL: {THERMAL_MODE}]" if THERMAL_ENABLED else "[RGB MODE]"
-    cv2.putText(display_frame, f"{mode_text} | 'f'=Fire 't'=Thermal 'm'=Mode 'q'=Quit", (10, 30), 
-                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 2)
-    
-    if fire_detected:
-        cv2.putText(display_frame, "!!! FIRE DETECTED !!!", (10, 60), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
-    
-    window_title = f"DRONE {DRONE_ID} VIEW {'[THERMAL]' if THERMAL_ENABLED else ''}"
-    cv2.imshow(window_title, display_frame)
-    
-    # --- HANDLE KEY PRESSES ---
-    key = cv2.waitKey(1) & 0xFF
-    if key == ord('f'):
-        manual_fire_active = True
-        manual_fire_frames = 50  # Keep fire active for ~5 seconds
-        print("🔥 MANUAL FIRE TRIGGER ACTIVATED (5 seconds)")
-    elif key == ord('t'):
-        THERMAL_ENABLED = not THERMAL_ENABLED
-        print(f"🌡️ THERMAL MODE: {'ON' if THERMAL_ENABLED else 'OFF'}")
-    elif key == ord('m'):
-        thermal_mode_idx = (thermal_mode_idx + 1) % len(thermal_modes)
-        THERMAL_MODE = thermal_modes[thermal_mode_idx]
-        print(f"🎨 THERMAL COLORMAP: {THERMAL_MODE}")
-    elif key == ord('q'):
-        print("👋 Shutting down...")
-        break
+
+    # --- DISPLAY FRAME FOR OPENCV WINDOW (shown by the main thread) ---
+    if not HEADLESS:
+        display_queue.put({'display': annotation, 'thermal': packet['thermal']})
+
+    return packet
+
+
+def record(packet):
+    """Save frame, telemetry and detections for training data"""
+    recorder.save_frame(packet['frame'])
+    recorder.log_telemetry(packet['telemetry'])
+    if packet['fire']:
+        recorder.log_detection({
+            "timestamp": time.time(),
+            "gps": packet['gps'],
+            "confidence": packet['conf'],
+            "detections": packet['detections'],
+            "frame_idx": packet['frame_idx']
+        })
+    return packet
+
+
+# --- BUILD PIPELINE ---
+# capture → preprocess/thermal → inference → annotate/publish → record
+# Queues hold 1 frame (latest wins) so inference never works on stale input.
+# The recorder gets a few slots of slack so short disk stalls don't drop frames.
+pipeline = Pipeline()
+pipeline.add_stage("capture", read_frame)
+pipeline.add_stage("preprocess", preprocess)
+inference_stage = pipeline.add_stage("inference", run_inference)
+pipeline.add_stage("publish", publish)
+if ENABLE_RECORDING and recorder:
+    pipeline.add_stage("record", record, maxsize=8)
+pipeline.start()
+
+# --- MAIN THREAD: DISPLAY + KEY HANDLING (OpenCV GUI must stay here) ---
+try:
+    while HEADLESS:
+        time.sleep(0.5)
+    while True:
+        shown = display_queue.get(timeout=0.05)
+        if shown is not None:
+            window_title = f"DRONE {DRONE_ID} VIEW {'[THERMAL]' if shown['thermal'] else ''}"
+            cv2.imshow(window_title, shown['display'].image)
+
+        # --- HANDLE KEY PRESSES ---
+        key = cv2.waitKey(1) & 0xFF
+        if key == ord('f'):
+            state['manual_fire_frames'] = 50  # Keep fire active for ~5 seconds
+            print("🔥 MANUAL FIRE TRIGGER ACTIVATED (5 seconds)")
+        elif key == ord('t'):
+            state['thermal_enabled'] = not state['thermal_enabled']
+            print(f"🌡️ THERMAL MODE: {'ON' if state['thermal_enabled'] else 'OFF'}")
+        elif key == ord('m'):
+            state['thermal_mode_idx'] = (state['thermal_mode_idx'] + 1) % len(thermal_modes)
+            state['thermal_mode'] = thermal_modes[state['thermal_mode_idx']]
+            print(f"🎨 THERMAL COLORMAP: {state['thermal_mode']}")
+        elif key == ord('q'):
+            print("👋 Shutting down...")
+            break
+except KeyboardInterrupt:
+    print("👋 Shutting down...")
 
 # --- CLEANUP ---
 print("🧹 Cleaning up...")
+pipeline.stop()
+pipeline.print_stats()
+if change_gate is not None:
+    gate_stats = change_gate.stats()
+    print(f"🚦 Change gate: inferred={gate_stats['inferred']} skipped={gate_stats['skipped']} "
+          f"({gate_stats['skip_pct']}% skipped)")
+if inference_cache is not None:
+    cache_stats = inference_cache.stats()
+    print(f"🗃️ Inference cache: {cache_stats['hits']} hits ({cache_stats['disk_hits']} from disk), "
+          f"{cache_stats['misses']} misses, hit rate {100 * cache_stats['hit_rate']:.1f}%")
+if degradation is not None:
+    deadline_stats = degradation.stats()
+    print(f"⏳ Deadline: {deadline_stats['missed']}/{deadline_stats['frames']} frames missed "
+          f"({deadline_stats['miss_pct']}%), {deadline_stats['shed']} shed, "
+          f"{deadline_stats['changes']} mode changes, final mode {deadline_stats['mode']}")
+    print(f"   Time per mode (s): {deadline_stats['time_in_mode']}")
+if tracker is not None:
+    track_stats = tracker.stats()
+    print(f"🎯 Tracker: model ran on {track_stats['detector_runs']} frames, "
+          f"{track_stats['predicted_frames']} tracked ({track_stats['speedup']}x fewer model calls)")
 
 # Finalize recording
 if ENABLE_RECORDING and recorder:
@@ -286,7 +499,10 @@ if ENABLE_RECORDING and recorder:
 
 if cap is not None:
     cap.release()
-cv2.destroyAllWindows()
+if inference_client is not None:
+    inference_client.close()
+if not HEADLESS:
+    cv2.destroyAllWindows()
 
 # Remove temp frame file
 if os.path.exists(FRAME_SAVE_PATH):
@@ -0,0 +1,261 @@
+"""
+Confidence / NMS Threshold Sweep
+Runs the model ONCE per frame at a very low threshold without NMS and keeps
+the raw predictions as compact NumPy arrays (optionally saved to .npz).
+Every (confidence, IoU, classes) setting is then just a filter on those
+arrays, so sweeping a recorded sortie takes seconds instead of one full
+re-inference per setting.
+
+Greedy NMS and greedy label matching both go in descending confidence,
+and boxes below a threshold never affect boxes above it. So NMS / matching
+runs once per IoU value at the lowest threshold, and each confidence
+threshold is a mask on top.
+
+Usage:
+    python threshold_sweep.py --source recordings/A1/.../frames --model fire.pt --raw sortie_raw.npz
+    python threshold_sweep.py --raw sortie_raw.npz --labels path/to/labels --iou 0.5 0.7
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from detections import RAW_CONF, RAW_MAX_DET, Detections, box_iou
+from inference_backends import load_backend, BACKENDS
+
+DEFAULT_CONFS = [0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5, 0.6, 0.7]
+
+
+def iter_frames(source):
+    """(name, frame) from an image folder or a video file"""
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, "*.jpg")) + glob.glob(os.path.join(source, "*.png")))
+        for path in paths:
+            frame = cv2.imread(path)
+            if frame is not None:
+                yield os.path.splitext(os.path.basename(path))[0], frame
+        return
+    cap = cv2.VideoCapture(source)
+    idx = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield f"frame_{idx:06d}", frame
+        idx += 1
+    cap.release()
+
+
+class RawPredictions:
+    """
+    Raw predictions of a whole sequence in flat arrays
+
+    Boxes of frame i are xyxy[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, xyxy, conf, cls, offsets, names, frame_names, shapes):
+        self.xyxy = np.asarray(xyxy, np.float32).reshape(-1, 4)
+        self.conf = np.asarray(conf, np.float32)
+        self.cls = np.asarray(cls, np.int32)
+        self.offsets = np.asarray(offsets, np.int64)
+        self.names = names
+        self.frame_names = list(frame_names)
+        self.shapes = np.asarray(shapes, np.int32).reshape(-1, 2)
+
+    @classmethod
+    def collect(cls, backend, frames, imgsz=None):
+        """Run the model once per frame at RAW_CONF, without NMS"""
+        xyxy, conf, classes, offsets, frame_names, shapes = [], [], [], [0], [], []
+        for name, frame in frames:
+            raw = backend.predict([frame], conf=RAW_CONF, iou=None, imgsz=imgsz, max_det=RAW_MAX_DET)[0]
+            xyxy.append(raw.xyxy)
+            conf.append(raw.conf)
+            classes.append(raw.cls)
+            offsets.append(offsets[-1] + len(raw))
+            frame_names.append(name)
+            shapes.append(frame.shape[:2])
+        if not frame_names:
+            return cls(np.zeros((0, 4)), [], [], [0], backend.names, [], np.zeros((0, 2)))
+        return cls(np.concatenate(xyxy), np.concatenate(conf), np.concatenate(classes),
+                   offsets, backend.names, frame_names, shapes)
+
+    def __len__(self):
+        return len(self.frame_names)
+
+    def frame(self, i):
+        s, e = self.offsets[i], self.offsets[i + 1]
+        return Detections(self.xyxy[s:e], self.conf[s:e], self.cls[s:e], self.names)
+
+    def save(self, path):
+        np.savez_compressed(path, xyxy=self.xyxy, conf=self.conf, cls=self.cls, offsets=self.offsets,
+                            names=json.dumps(self.names), frame_names=np.array(self.frame_names),
+                            shapes=self.shapes)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            names = {int(k): v for k, v in json.loads(str(data['names'])).items()}
+            return cls(data['xyxy'], data['conf'], data['cls'], data['offsets'], names,
+                       data['frame_names'].tolist(), data['shapes'])
+
+
+def load_labels(labels_dir, raw):
+    """
+    YOLO txt labels (class cx cy w h, normalized) per frame, in pixels
+
+    Returns:
+        list of (boxes (M, 4), classes (M,)) or None if labels_dir is None
+    """
+    if labels_dir is None:
+        return None
+    labels = []
+    for name, (h, w) in zip(raw.frame_names, raw.shapes):
+        path = os.path.join(labels_dir, f"{name}.txt")
+        rows = np.loadtxt(path, ndmin=2) if os.path.exists(path) and os.path.getsize(path) else np.zeros((0, 5))
+        cx, cy, bw, bh = rows[:, 1] * w, rows[:, 2] * h, rows[:, 3] * w, rows[:, 4] * h
+        boxes = np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1)
+        labels.append((boxes, rows[:, 0].astype(np.int32)))
+    return labels
+
+
+def _match(dets, gt_boxes, gt_cls, match_iou):
+    """Greedy, class-aware matching in descending confidence: True per detection if it hits a label"""
+    tp = np.zeros(len(dets), bool)
+    if not len(dets) or not len(gt_boxes):
+        return tp
+    iou = box_iou(dets.xyxy, gt_boxes)
+    iou[dets.cls[:, None] != gt_cls[None, :]] = 0
+    taken = np.zeros(len(gt_boxes), bool)
+    # Only detections that overlap some label enough can match
+    order = np.argsort(-dets.conf, kind='stable')
+    for i in order[iou[order].max(1) >= match_iou]:
+        candidates = np.where(taken, 0, iou[i])
+        j = candidates.argmax()
+        if candidates[j] >= match_iou:
+            tp[i] = taken[j] = True
+    return tp
+
+
+def sweep(raw, confs=DEFAULT_CONFS, ious=(0.7,), classes=None, labels=None, match_iou=0.5):
+    """
+    Evaluate every (iou, conf) setting on the cached raw predictions
+
+    Returns:
+        list of dict rows, one per setting
+    """
+    confs = np.sort(np.asarray(confs, np.float32))
+    rows = []
+    n_frames = len(raw)
+    n_gt = 0
+    if labels is not None:
+        n_gt = sum(len(c) if classes is None else int(np.isin(c, classes).sum()) for _, c in labels)
+
+    for iou in ious:
+        # NMS (and matching) once at the lowest threshold
+        conf, frame_idx, tp = [], [], []
+        for i in range(n_frames):
+            dets = raw.frame(i).filter(float(confs[0]), iou, classes, max_det=RAW_MAX_DET)
+            conf.append(dets.conf)
+            frame_idx.append(np.full(len(dets), i))
+            if labels is not None:
+                gt_boxes, gt_cls = labels[i]
+                if classes is not None:
+                    keep = np.isin(gt_cls, classes)
+                    gt_boxes, gt_cls = gt_boxes[keep], gt_cls[keep]
+                tp.append(_match(dets, gt_boxes, gt_cls, match_iou))
+        conf = np.concatenate(conf) if conf else np.zeros(0, np.float32)
+        frame_idx = np.concatenate(frame_idx) if frame_idx else np.zeros(0, np.int64)
+        tp = np.concatenate(tp) if tp else np.zeros(0, bool)
+
+        # Every confidence threshold is a mask: (n_confs, n_boxes)
+        above = conf[None, :] >= confs[:, None]
+        for c, mask in zip(confs, above):
+            per_frame = np.bincount(frame_idx[mask], minlength=n_frames)
+            row = {
+                'conf': round(float(c), 3),
+                'iou': iou,
+                'detections': int(mask.sum()),
+                'frames_with_detections': int((per_frame > 0).sum()),
+                'detection_rate': round(float((per_frame > 0).mean()), 4) if n_frames else 0.0,
+                'avg_per_frame': round(float(per_frame.mean()), 3) if n_frames else 0.0,
+            }
+            if labels is not None:
+                hits = int((tp & mask).sum())
+                precision = hits / max(1, int(mask.sum()))
+                recall = hits / max(1, n_gt)
+                row.update({
+                    'tp': hits,
+                    'fp': int(mask.sum()) - hits,
+                    'fn': n_gt - hits,
+                    'precision': round(precision, 4),
+                    'recall': round(recall, 4),
+                    'f1': round(2 * precision * recall / max(1e-9, precision + recall), 4),
+                })
+            rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep confidence / NMS thresholds over cached raw predictions")
+    parser.add_argument("--source", type=str, default=None, help="Image folder or video (runs the model once)")
+    parser.add_argument("--model", type=str, default=None, help="Model path (.pt or .onnx), needed with --source")
+    parser.add_argument("--backend", choices=BACKENDS, default='auto', help="Inference runtime")
+    parser.add_argument("--imgsz", type=int, default=None, help="Model input size")
+    parser.add_argument("--raw", type=str, default=None,
+                        help="Raw predictions .npz: loaded if it exists, otherwise written after --source")
+    parser.add_argument("--labels", type=str, default=None, help="YOLO labels folder (adds precision/recall)")
+    parser.add_argument("--conf", type=float, nargs='+', default=DEFAULT_CONFS, help="Confidence thresholds")
+    parser.add_argument("--iou", type=float, nargs='+', default=[0.7], help="NMS IoU thresholds")
+    parser.add_argument("--classes", type=int, nargs='+', default=None, help="Keep only these class ids")
+    parser.add_argument("--match_iou", type=float, default=0.5, help="IoU for a detection to match a label")
+    parser.add_argument("--report", type=str, default=None, help="Write the sweep as JSON")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("🎚️ THRESHOLD SWEEP")
+    print("=" * 70)
+
+    if args.raw and os.path.exists(args.raw):
+        raw = RawPredictions.load(args.raw)
+        print(f"📂 Loaded raw predictions for {len(raw)} frames from {args.raw}")
+    elif args.source and args.model:
+        backend = load_backend(args.model, args.backend)
+        start = time.time()
+        raw = RawPredictions.collect(backend, iter_frames(args.source), args.imgsz)
+        print(f"🔥 Inference on {len(raw)} frames in {time.time() - start:.1f}s "
+              f"({len(raw.conf)} raw boxes)")
+        if args.raw:
+            raw.save(args.raw)
+            print(f"💾 Raw predictions saved to {args.raw}")
+    else:
+        print("❌ Need --raw <existing .npz> or --source + --model")
+        return
+
+    start = time.time()
+    rows = sweep(raw, args.conf, args.iou, args.classes, load_labels(args.labels, raw), args.match_iou)
+    print(f"⚡ {len(rows)} settings evaluated in {time.time() - start:.2f}s\n")
+
+    header = f"{'IoU':>5}{'Conf':>7}{'Dets':>8}{'Frames%':>9}{'Avg/frame':>11}"
+    if args.labels:
+        header += f"{'P':>8}{'R':>8}{'F1':>8}"
+    print(header)
+    for row in rows:
+        line = (f"{row['iou']:>5}{row['conf']:>7}{row['detections']:>8}"
+                f"{100 * row['detection_rate']:>8.1f}%{row['avg_per_frame']:>11}")
+        if args.labels:
+            line += f"{row['precision']:>8}{row['recall']:>8}{row['f1']:>8}"
+        print(line)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'frames': len(raw), 'match_iou': args.match_iou, 'classes': args.classes,
+                       'rows': rows}, f, indent=2)
+        print(f"\n📄 Report: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Tiled (sliced) Inference Helpers
+Small, distant fires are only a few pixels wide at patrol altitude and
+vanish when a 1280x720 frame is letterboxed down to 640. Cutting the frame
+into overlapping tiles keeps them at native resolution; boxes from all
+tiles are shifted back to frame coordinates and merged with NMS.
+
+Usage:
+    tiler = Tiler(tile_size=640, overlap=0.2)
+    tiles = tiler.split(frame)                       # reused buffers
+    per_tile = backend.predict(tiles, conf=0.25)     # one batched call
+    detections = tiler.merge(per_tile)
+"""
+import numpy as np
+
+from detections import Detections, nms
+
+# merge() default: use the Tiler's own IoU threshold
+_TILER_IOU = object()
+
+
+def tile_origins(length, tile, overlap):
+    """
+    Start offsets along one axis so tiles cover [0, length) with at least
+    `overlap` (fraction) overlap between neighbours
+    """
+    if length <= tile:
+        return [0]
+    stride = max(1, int(tile * (1 - overlap)))
+    n = int(np.ceil((length - tile) / stride)) + 1
+    # Spread tiles evenly; first and last are flush with the edges
+    return np.linspace(0, length - tile, n).round().astype(int).tolist()
+
+
+class Tiler:
+    """Splits frames into overlapping tiles and merges per-tile detections"""
+
+    def __init__(self, tile_size=640, overlap=0.2, iou=0.5):
+        """
+        Args:
+            tile_size: Tile edge in pixels (int) or (height, width)
+            overlap: Fractional overlap between neighbouring tiles
+            iou: NMS IoU threshold when merging boxes across tiles
+        """
+        self.tile_h, self.tile_w = (tile_size, tile_size) if isinstance(tile_size, int) else tile_size
+        self.overlap = overlap
+        self.iou = iou
+
+        # Reused between frames of the same size
+        self._frame_shape = None
+        self._buffer = None
+        self._offsets = None
+
+    def _prepare(self, shape):
+        h, w = shape[:2]
+        tile_h, tile_w = min(self.tile_h, h), min(self.tile_w, w)
+        ys = tile_origins(h, tile_h, self.overlap)
+        xs = tile_origins(w, tile_w, self.overlap)
+        self._offsets = np.array([(x, y) for y in ys for x in xs], np.float32)
+        self._buffer = np.empty((len(self._offsets), tile_h, tile_w) + tuple(shape[2:]), np.uint8)
+        self._frame_shape = shape
+
+    def split(self, frame):
+        """
+        Copy the tiles of a frame into the preallocated tile buffer
+
+        Returns:
+            list of tile views (valid until the next split() call)
+        """
+        if frame.shape != self._frame_shape:
+            self._prepare(frame.shape)
+        tile_h, tile_w = self._buffer.shape[1:3]
+        for i, (x, y) in enumerate(self._offsets.astype(int)):
+            self._buffer[i] = frame[y:y + tile_h, x:x + tile_w]
+        return list(self._buffer)
+
+    def merge(self, tile_detections, max_det=300, iou=_TILER_IOU):
+        """
+        Shift per-tile boxes into frame coordinates and suppress duplicates
+        from the overlap regions
+
+        Args:
+            tile_detections: list of Detections, same order as split()
+            max_det: Maximum boxes to keep
+            iou: NMS IoU threshold (default: the Tiler's); None = no NMS, for raw
+                 predictions that are NMS'd later by Detections.filter
+
+        Returns:
+            Detections for the whole frame
+        """
+        names = tile_detections[0].names if tile_detections else {}
+        counts = [len(d) for d in tile_detections]
+        if sum(counts) == 0:
+            return Detections(names=names)
+
+        shift = np.repeat(np.tile(self._offsets, (1, 2)), counts, axis=0)
+        xyxy = np.concatenate([d.xyxy for d in tile_detections]) + shift
+        conf = np.concatenate([d.conf for d in tile_detections])
+        cls = np.concatenate([d.cls for d in tile_detections])
+
+        if iou is _TILER_IOU:
+            iou = self.iou
+        if iou is None:
+            keep = np.argsort(-conf, kind='stable')[:max_det]
+        else:
+            keep = nms(xyxy, conf, iou, cls=cls, max_det=max_det)
+        return Detections(xyxy[keep], conf[keep], cls[keep], names)
+
+    @property
+    def num_tiles(self):
+        return 0 if self._offsets is None else len(self._offsets)
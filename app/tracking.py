@@ -0,0 +1,184 @@
+"""
+Detect-Every-N Box Tracker
+Fires don't teleport between frames. The full detector runs every N frames
+(or earlier, when tracked confidence decays); in between, boxes are moved
+with a constant-velocity model at almost zero cost.
+
+Detections are associated to tracks by IoU, so every fire keeps a stable
+track id across frames - handy for alert deduplication downstream.
+
+Usage:
+    tracker = BoxTracker(every=5)
+    detections, ran_model = tracker.step(frame, lambda f: backend.predict([f])[0])
+    detections.ids   # stable track ids
+"""
+import numpy as np
+
+from detections import Detections, box_iou
+
+
+class BoxTracker:
+    """IoU-associated, constant-velocity tracker with a detect-every-N schedule"""
+
+    def __init__(self, every=5, iou_threshold=0.3, max_age=None, conf_decay=0.95,
+                 refresh_conf=0.2, velocity_smoothing=0.5):
+        """
+        Args:
+            every: Run the full detector every N frames
+            iou_threshold: Minimum IoU to match a detection to a track
+            max_age: Drop a track after this many frames without a match
+                     (default: 3 detection cycles)
+            conf_decay: Multiply track confidence by this on predicted frames
+            refresh_conf: Run the detector early if any track falls below this confidence
+            velocity_smoothing: Weight of the newest motion in the velocity estimate
+        """
+        self.every = max(1, every)
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age if max_age is not None else 3 * self.every
+        self.conf_decay = conf_decay
+        self.refresh_conf = refresh_conf
+        self.velocity_smoothing = velocity_smoothing
+
+        # Track state, one row per track
+        self.boxes = np.zeros((0, 4), np.float32)
+        self.velocity = np.zeros((0, 4), np.float32)    # per frame
+        self.conf = np.zeros(0, np.float32)
+        self.cls = np.zeros(0, np.int32)
+        self.ids = np.zeros(0, np.int64)
+        self.age = np.zeros(0, np.int32)                # frames since last match
+        self.names = {}
+
+        self.next_id = 1
+        self.frames_since_detect = None
+        self.detector_runs = 0
+        self.predicted_frames = 0
+
+    def needs_detection(self):
+        """True if the detector should run on the next frame"""
+        if self.frames_since_detect is None or self.frames_since_detect + 1 >= self.every:
+            return True
+        conf = self.conf[self._visible()]
+        return bool(len(conf) and conf.min() < self.refresh_conf)
+
+    def _visible(self):
+        """Tracks matched at the last detector run (lost tracks coast silently)"""
+        return self.age <= (self.frames_since_detect or 0)
+
+    def _current(self):
+        out = Detections(self.boxes.copy(), self.conf.copy(), self.cls.copy(), self.names, self.ids.copy())
+        return out[self._visible()]
+
+    def predict(self):
+        """
+        Advance all tracks one frame without running the detector
+
+        Returns:
+            Detections with track ids
+        """
+        self.boxes += self.velocity
+        self.conf *= self.conf_decay
+        self.age += 1
+        self._drop_stale()
+        self.frames_since_detect = (self.frames_since_detect or 0) + 1
+        self.predicted_frames += 1
+        return self._current()
+
+    def update(self, detections):
+        """
+        Associate fresh detections with tracks
+
+        Args:
+            detections: Detections from the full detector (for this frame)
+
+        Returns:
+            Detections with track ids
+        """
+        self.names = detections.names or self.names
+        # Frames since the last detector run (predict() already moved the
+        # boxes for the frames in between, one more step brings them to now)
+        gap = (self.frames_since_detect or 0) + 1
+        predicted = self.boxes + self.velocity
+
+        matched_tracks = np.zeros(len(self.boxes), bool)
+        matched_dets = np.zeros(len(detections), bool)
+        det_track = np.full(len(detections), -1)
+
+        if len(self.boxes) and len(detections):
+            iou = box_iou(detections.xyxy, predicted)
+            # Same-class only
+            iou[detections.cls[:, None] != self.cls[None, :]] = 0
+            # Greedy: best pairs first
+            order = np.argsort(-iou, axis=None)
+            for det_i, trk_i in zip(*np.unravel_index(order, iou.shape)):
+                if iou[det_i, trk_i] < self.iou_threshold:
+                    break
+                if matched_dets[det_i] or matched_tracks[trk_i]:
+                    continue
+                matched_dets[det_i] = matched_tracks[trk_i] = True
+                det_track[det_i] = trk_i
+
+        # Matched: refresh box / confidence, blend in the observed motion
+        d_idx = np.nonzero(matched_dets)[0]
+        t_idx = det_track[d_idx]
+        if len(d_idx):
+            # Observed motion per frame since the last detector run
+            motion = self.velocity[t_idx] + (detections.xyxy[d_idx] - predicted[t_idx]) / gap
+            a = self.velocity_smoothing
+            self.velocity[t_idx] = a * motion + (1 - a) * self.velocity[t_idx]
+            self.boxes[t_idx] = detections.xyxy[d_idx]
+            self.conf[t_idx] = detections.conf[d_idx]
+            self.age[t_idx] = 0
+
+        # Unmatched tracks: coast along their velocity
+        lost = ~matched_tracks
+        self.boxes[lost] = predicted[lost]
+        self.age[lost] += 1
+
+        # Unmatched detections: new tracks
+        new = np.nonzero(~matched_dets)[0]
+        if len(new):
+            self.boxes = np.concatenate([self.boxes, detections.xyxy[new]])
+            self.velocity = np.concatenate([self.velocity, np.zeros((len(new), 4), np.float32)])
+            self.conf = np.concatenate([self.conf, detections.conf[new]])
+            self.cls = np.concatenate([self.cls, detections.cls[new]])
+            self.ids = np.concatenate([self.ids, np.arange(self.next_id, self.next_id + len(new))])
+            self.age = np.concatenate([self.age, np.zeros(len(new), np.int32)])
+            self.next_id += len(new)
+
+        self._drop_stale()
+        self.frames_since_detect = 0
+        self.detector_runs += 1
+
+        # Only report tracks that were seen in this frame
+        return self._current()
+
+    def _drop_stale(self):
+        keep = self.age <= self.max_age
+        if not keep.all():
+            self.boxes, self.velocity = self.boxes[keep], self.velocity[keep]
+            self.conf, self.cls = self.conf[keep], self.cls[keep]
+            self.ids, self.age = self.ids[keep], self.age[keep]
+
+    def step(self, frame, detect_fn):
+        """
+        Process one frame: detect if due, otherwise predict
+
+        Args:
+            frame: Image passed to detect_fn
+            detect_fn: frame -> Detections
+
+        Returns:
+            (Detections with track ids, True if the detector ran)
+        """
+        if self.needs_detection():
+            return self.update(detect_fn(frame)), True
+        return self.predict(), False
+
+    def stats(self):
+        total = self.detector_runs + self.predicted_frames
+        return {
+            'detector_runs': self.detector_runs,
+            'predicted_frames': self.predicted_frames,
+            'speedup': round(total / max(1, self.detector_runs), 2),
+            'active_tracks': len(self.ids),
+        }